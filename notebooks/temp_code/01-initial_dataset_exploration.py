@@ -8,6 +8,7 @@ Replace the table_name and customize queries as needed for your specific dataset
 
 Template demonstrates:
 - Connection testing
+- A single-scan column profile (client.profile_table)
 - Basic row count and structure
 - Sample data preview
 - Column statistics
@@ -19,6 +20,8 @@ import os
 import sys
 from pathlib import Path
 
+import pandas as pd
+
 # Add utils to path for importing - use absolute path to avoid issues
 project_root = Path(__file__).parent.parent.parent
 utils_path = project_root / "utils"
@@ -48,39 +51,25 @@ def main():
     print(f"\n📊 Exploring table: {table_name}")
     print("-" * 80)
 
-    # 1. Get basic row count
-    print("\n1️⃣ Getting row count...")
-    query = f"""
-    SELECT COUNT(*) as total_rows
-    FROM {table_name}
-    """
+    # 1. Profile every column in one table scan: row count, schema, NULLs,
+    #    distinct counts, ranges, numeric stats and most frequent values
+    print("\n1️⃣ Profiling columns (single scan)...")
 
     try:
-        result = client.execute_query(query, "Row Count")
-        total = int(result["total_rows"].iloc[0])
-        print(f"   Total rows: {total:,}")
+        profile = client.profile_table(table_name)
     except Exception as e:
         print(f"   ❌ Error: {e}")
         return
 
-    # 2. Get table schema by examining first row
-    print("\n2️⃣ Getting table schema...")
-    query = f"""
-    SELECT *
-    FROM {table_name}
-    LIMIT 1
-    """
+    total = int(profile["rows"].iloc[0]) if len(profile) else 0
+    print(f"   Total rows: {total:,}")
+    print(f"   Table has {len(profile)} columns")
 
-    try:
-        first_row = client.execute_query(query, "Schema Check")
-        print(f"   Table has {len(first_row.columns)} columns")
-        print("\n   Column Names:")
-        for i, col in enumerate(first_row.columns, 1):
-            dtype = first_row[col].dtype
-            print(f"     {i:2d}. {col:<30} ({dtype})")
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-        return
+    # 2. Schema
+    print("\n2️⃣ Table schema...")
+    print("\n   Column Names:")
+    for row in profile.itertuples():
+        print(f"     {row.position + 1:2d}. {row.column:<30} ({row.data_type})")
 
     # 3. Sample data preview
     print("\n3️⃣ Sample data preview...")
@@ -98,67 +87,36 @@ def main():
     except Exception as e:
         print(f"   ❌ Error: {e}")
 
-    # 4. Column-level statistics (customize based on your schema)
-    print("\n4️⃣ Getting basic statistics...")
-    # Example: Adjust column names as needed
-    query = f"""
-    SELECT
-        COUNT(*) as total_records,
-        COUNT(DISTINCT id) as unique_ids
-        -- Add more column-specific stats here
-    FROM {table_name}
-    """
+    # 4. Column-level statistics (distinct counts and quantiles are approximate)
+    print("\n4️⃣ Column statistics...")
+    stats_columns = ["column", "distinct_approx", "min", "max", "mean", "stddev"]
+    # Plus the quantile columns (p25, p50, p75)
+    stats_columns += profile.attrs["quantile_columns"]
+    print(profile[stats_columns].to_string(index=False))
 
-    try:
-        stats = client.execute_query(query, "Basic Stats")
-        print("\n   Dataset Statistics:")
-        for col in stats.columns:
-            val = stats[col].iloc[0]
-            if isinstance(val, (int, float)):
-                print(f"     {col}: {val:,}")
-            else:
-                print(f"     {col}: {val}")
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-
-    # 5. Check for NULL values (customize column list)
+    # 5. NULL value analysis
     print("\n5️⃣ NULL value analysis...")
-    # Example: Replace column names with your actual columns
-    query = f"""
-    SELECT
-        COUNT(*) as total_rows,
-        SUM(CASE WHEN column1 IS NULL THEN 1 ELSE 0 END) as null_column1,
-        SUM(CASE WHEN column2 IS NULL THEN 1 ELSE 0 END) as null_column2
-        -- Add more columns as needed
-    FROM {table_name}
-    LIMIT 1000000
-    """
-
-    try:
-        nulls = client.execute_query(query, "NULL Analysis")
-        print("\n   NULL Value Counts (1M row sample):")
-        for col in nulls.columns:
-            val = nulls[col].iloc[0]
-            print(f"     {col}: {val:,}")
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
+    print("\n   NULL Value Counts:")
+    for row in profile.itertuples():
+        # null_pct is missing when the table has no rows
+        null_pct = "n/a" if pd.isna(row.null_pct) else f"{row.null_pct:.2f}%"
+        print(f"     {row.column:<30} {row.nulls:>14,} ({null_pct})")
 
     # 6. Data quality summary
     print("\n6️⃣ Data quality assessment...")
-    query = f"""
-    SELECT
-        COUNT(*) as total_records,
-        -- Add completeness checks for key columns
-        ROUND(COUNT(CASE WHEN column1 IS NOT NULL THEN 1 END) * 100.0 / COUNT(*), 2) as pct_complete_column1
-    FROM {table_name}
-    """
-
-    try:
-        quality = client.execute_query(query, "Data Quality")
-        print("\n   Data Quality Metrics:")
-        print(quality.to_string(index=False))
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
+    completeness = 100 - profile["null_pct"].fillna(0)
+    print(f"\n   Fully populated columns: {(completeness == 100).sum()}")
+    print(f"   Columns under 90% complete: {(completeness < 90).sum()}")
+    constant = profile[profile["distinct_approx"] == 1]["column"].tolist()
+    if constant:
+        print(f"   Constant columns: {', '.join(constant)}")
+    print("\n   Most frequent values:")
+    for row in profile.itertuples():
+        if row.top_values:
+            values = ", ".join(
+                f"{value!r} ({count:,})" for value, count in row.top_values
+            )
+            print(f"     {row.column:<30} {values}")
 
     print("\n" + "=" * 80)
     print("Initial exploration complete!")
@@ -21,9 +21,9 @@ def main():
     print("Airline Performance Dataset - Deep Dive Analysis")
     print("=" * 80)
 
-    # Initialize client
+    # Initialize client - cached results make re-runs near-instant
     try:
-        client = DatabricksQueryClient(debug=False)
+        client = DatabricksQueryClient(debug=False, cache=True)
         print("✅ Connected to Databricks")
     except Exception as e:
         print(f"❌ Failed to connect: {e}")
@@ -92,8 +92,13 @@ def main():
             WHEN 'Severe Delay (> 120 min)' THEN 7
         END
     """
-    result = client.execute_query(query, "Delay Distribution")
-    print(result.to_string(index=False))
+    # A 1% sample answers in seconds with error bounds; the full scan confirms it
+    for result in client.execute_progressive(
+        query, "Delay Distribution", percents=(1, 100)
+    ):
+        label = "exact" if not result.attrs["approximate"] else "1% sample, 95% CI"
+        print(f"\n   [{label}]")
+        print(result.to_string(index=False))
 
     # 4. Aircraft (TailNum) analysis
     print("\n4. Aircraft utilization insights...")
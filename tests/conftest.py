@@ -0,0 +1,102 @@
+# ABOUTME: Shared pytest fixtures: MockStatementServer instances and clients pointed at them
+# ABOUTME: Every client gets its own warehouse id so process-wide query slots don't leak between tests
+
+import asyncio
+import uuid
+
+import pytest
+
+from utils.async_databricks_query import AsyncDatabricksQueryClient
+from utils.databricks_query import DatabricksQueryClient
+from utils.mock_statement_server import MockStatementServer
+
+# Poll quickly so PENDING statements don't slow the suite down
+FAST_POLLING = {"poll_interval": 0.01, "max_poll_interval": 0.05}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("baseline", "benchmark baseline (test_benchmarks.py)")
+    group.addoption(
+        "--update-baseline",
+        action="store_true",
+        help="Record the benchmark results as the new baseline instead of "
+        "comparing against it",
+    )
+    group.addoption(
+        "--baseline-tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed relative regression against the baseline (default 0.5)",
+    )
+
+
+@pytest.fixture
+def make_server():
+    """Start MockStatementServer(**options); every server is stopped afterwards."""
+    servers = []
+
+    def make(**options) -> MockStatementServer:
+        options.setdefault("seed", 0)
+        server = MockStatementServer(**options).start()
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def env_file(tmp_path):
+    """Write a .env file pointing at a server and return its path."""
+
+    def write(server: MockStatementServer, warehouse_id: str = None):
+        warehouse_id = warehouse_id or f"mock-{uuid.uuid4().hex[:8]}"
+        path = tmp_path / f"{warehouse_id}.env"
+        path.write_text(
+            f"DATABRICKS_SERVER_HOSTNAME={server.url}\n"
+            f"DATABRICKS_HTTP_PATH=/sql/1.0/warehouses/{warehouse_id}\n"
+            "DATABRICKS_ACCESS_TOKEN=mock-token\n"
+        )
+        return path
+
+    return write
+
+
+@pytest.fixture
+def make_client(env_file):
+    """Create DatabricksQueryClient instances for a server; closed afterwards."""
+    clients = []
+
+    def make(server: MockStatementServer, **options) -> DatabricksQueryClient:
+        options = {**FAST_POLLING, "preconnect": False, **options}
+        client = DatabricksQueryClient(env_path=env_file(server), **options)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def run_async(env_file):
+    """
+    Run ``scenario(client)`` in a fresh event loop and return its result.
+
+    The AsyncDatabricksQueryClient is created for ``server`` with
+    ``options`` and closed when the scenario ends.
+    """
+
+    def run(server: MockStatementServer, scenario, **options):
+        options = {**FAST_POLLING, **options}
+
+        async def main():
+            async with AsyncDatabricksQueryClient(
+                env_path=env_file(server), **options
+            ) as client:
+                return await scenario(client)
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,229 @@
+# ABOUTME: Tests for approximate execution: the TABLESAMPLE rewrite, eligibility and confidence intervals
+# ABOUTME: Also runs execute_approximate() and execute_progressive() against MockStatementServer
+
+from statistics import NormalDist
+
+import pandas as pd
+import pytest
+
+from utils.approximate import (
+    ApproximatePlan,
+    Estimate,
+    add_confidence_intervals,
+    plan_approximate,
+    sample_percent_literal,
+    sampled_table,
+)
+
+FLIGHTS = (
+    "SELECT Origin, COUNT(*) AS flights, SUM(Delay) AS delay, AVG(Delay) AS avg_delay "
+    "FROM main.default.flights WHERE Year = 2008 GROUP BY Origin"
+)
+
+
+def test_counts_and_sums_are_scaled_and_helpers_added():
+    plan = plan_approximate(FLIGHTS, 10, seed=7)
+
+    assert plan.sql == (
+        "SELECT Origin, (COUNT(*) * 10.0D) AS flights, (SUM(Delay) * 10.0D) AS delay, "
+        "AVG(Delay) AS avg_delay, "
+        "SUM(POWER(CAST(Delay AS DOUBLE), 2)) AS __approx_1_sumsq, "
+        "STDDEV_SAMP(Delay) AS __approx_2_sd, COUNT(Delay) AS __approx_2_n "
+        "FROM main.default.flights TABLESAMPLE (10 PERCENT) REPEATABLE (7) "
+        "WHERE Year = 2008 GROUP BY Origin"
+    )
+    assert plan.table == "main.default.flights"
+    assert plan.estimates == (
+        Estimate("flights", "COUNT", ()),
+        Estimate("delay", "SUM", ("__approx_1_sumsq",)),
+        Estimate("avg_delay", "AVG", ("__approx_2_sd", "__approx_2_n")),
+    )
+
+
+def test_count_if_and_filter_are_scaled_but_window_aggregates_are_not():
+    plan = plan_approximate(
+        "SELECT COUNT_IF(Cancelled = 1) AS cancelled, "
+        "COUNT(*) FILTER (WHERE Delay > 0) AS late, "
+        "SUM(COUNT(*)) OVER () AS total FROM flights",
+        50,
+    )
+
+    assert plan.sql == (
+        "SELECT (COUNT_IF(Cancelled = 1) * 2.0D) AS cancelled, "
+        "(COUNT(*) FILTER (WHERE Delay > 0) * 2.0D) AS late, "
+        "SUM((COUNT(*) * 2.0D)) OVER () AS total "
+        "FROM flights TABLESAMPLE (50 PERCENT) REPEATABLE (42)"
+    )
+
+
+def test_full_percent_returns_the_original_query():
+    plan = plan_approximate(FLIGHTS, 100)
+
+    assert plan.sql == FLIGHTS
+    assert all(not estimate.helpers for estimate in plan.estimates)
+
+
+@pytest.mark.parametrize(
+    "percent,literal",
+    [
+        (12.5, "12.5"),
+        (1, "1"),
+        (0.00001, "0.00001"),
+        (0.0000015, "0.000002"),
+        (1e-9, "0.000001"),
+    ],
+)
+def test_sample_percent_is_written_in_fixed_point(percent, literal):
+    assert sample_percent_literal(percent) == literal
+
+    plan = plan_approximate("SELECT COUNT(*) AS n FROM t", percent)
+
+    assert f"TABLESAMPLE ({literal} PERCENT)" in plan.sql
+    assert "e-" not in plan.sql
+    # Scaling matches the sample that is actually read
+    assert plan.percent == float(literal)
+    assert f"* {100 / float(literal)!r}D" in plan.sql
+
+
+@pytest.mark.parametrize(
+    "query,reason",
+    [
+        ("SELECT COUNT(*) FROM a JOIN b ON a.id = b.id", "no joins"),
+        ("SELECT COUNT(*) FROM a LEFT OUTER JOIN b ON a.id = b.id", "no joins"),
+        ("SELECT COUNT(*) FROM a, b", "no joins"),
+        ("SELECT COUNT(*) FROM (SELECT * FROM a)", "subqueries"),
+        ("SELECT COUNT(*) FROM a WHERE id IN (SELECT id FROM b)", "subqueries"),
+        ("SELECT COUNT(*) FROM a UNION ALL SELECT COUNT(*) FROM b", "UNION"),
+        ("SELECT COUNT(*) FROM a EXCEPT SELECT COUNT(*) FROM b", "EXCEPT"),
+        ("SELECT MIN(Delay) FROM flights", "MIN can't be estimated"),
+        ("SELECT COUNT(*), MAX(Delay) FROM flights", "MAX can't be estimated"),
+        ("SELECT COUNT(DISTINCT Origin) FROM flights", "COUNT(DISTINCT"),
+        ("SELECT Origin FROM flights", "no aggregate"),
+        ("SELECT COUNT(*) OVER () FROM flights", "no aggregate"),
+        ("SELECT 1", "no table"),
+        ("WITH f AS (SELECT 1) SELECT COUNT(*) FROM f", "plain SELECT"),
+    ],
+)
+def test_ineligible_queries_are_rejected(query, reason):
+    with pytest.raises(ValueError, match="not eligible") as error:
+        plan_approximate(query, 10)
+    assert reason in str(error.value)
+
+
+def test_sampled_table_keeps_the_qualified_name():
+    assert sampled_table(FLIGHTS) == "main.default.flights"
+
+
+def test_non_positive_percent_is_rejected():
+    with pytest.raises(ValueError, match="positive"):
+        plan_approximate(FLIGHTS, 0)
+
+
+def test_confidence_interval_math():
+    rate = 0.1
+    plan = ApproximatePlan(
+        "unused",
+        "flights",
+        rate * 100,
+        42,
+        (
+            Estimate("n", "COUNT", ()),
+            Estimate("total", "SUM", ("__approx_1_sumsq",)),
+            Estimate("mean", "AVG", ("__approx_2_sd", "__approx_2_n")),
+        ),
+    )
+    df = pd.DataFrame(
+        {
+            "n": [1000.0],
+            "total": [5000.0],
+            "mean": [5.0],
+            "__approx_1_sumsq": [400.0],
+            "__approx_2_sd": [2.0],
+            "__approx_2_n": [100.0],
+        }
+    )
+
+    result = add_confidence_intervals(df, plan, confidence=0.95)
+
+    z = NormalDist().inv_cdf(0.975)
+    count_error = (1000 * rate * (1 - rate)) ** 0.5 / rate
+    sum_error = ((1 - rate) * 400) ** 0.5 / rate
+    mean_error = 2 * ((1 - rate) / 100) ** 0.5
+    assert list(result.columns) == [
+        "n",
+        "n_ci_low",
+        "n_ci_high",
+        "total",
+        "total_ci_low",
+        "total_ci_high",
+        "mean",
+        "mean_ci_low",
+        "mean_ci_high",
+    ]
+    row = result.iloc[0]
+    assert row["n_ci_low"] == pytest.approx(1000 - z * count_error)
+    assert row["n_ci_high"] == pytest.approx(1000 + z * count_error)
+    assert row["total_ci_low"] == pytest.approx(5000 - z * sum_error)
+    assert row["mean_ci_high"] == pytest.approx(5 + z * mean_error)
+    assert result.attrs["approximate"] is True
+    assert result.attrs["sample_percent"] == 10.0
+    assert result.attrs["sampled_table"] == "flights"
+
+
+def test_exact_run_has_collapsed_intervals():
+    plan = plan_approximate("SELECT COUNT(*) AS n FROM t", 100)
+
+    result = add_confidence_intervals(pd.DataFrame({"n": [42]}), plan)
+
+    assert result.iloc[0].tolist() == [42, 42.0, 42.0]
+    assert result.attrs["approximate"] is False
+
+
+COUNT_COLUMNS = [{"name": "n", "type_name": "BIGINT"}]
+
+
+def test_execute_approximate_sends_the_sampled_query(make_server, make_client):
+    server = make_server(rows=3, columns=COUNT_COLUMNS)
+    client = make_client(server)
+
+    df = client.execute_approximate(
+        "SELECT COUNT(*) AS n FROM flights GROUP BY Origin", sample_percent=0.00001
+    )
+
+    assert server.statements == [
+        "SELECT (COUNT(*) * 10000000.0D) AS n FROM flights "
+        "TABLESAMPLE (0.00001 PERCENT) REPEATABLE (42) GROUP BY Origin"
+    ]
+    assert list(df.columns) == ["n", "n_ci_low", "n_ci_high"]
+    assert df["n"].tolist() == [0, 1, 2]
+    assert (df["n_ci_low"] <= df["n"]).all() and (df["n"] <= df["n_ci_high"]).all()
+    assert df.attrs["sample_percent"] == 0.00001
+
+
+def test_execute_progressive_refines_until_exact(make_server, make_client):
+    server = make_server(rows=2, columns=COUNT_COLUMNS)
+    client = make_client(server)
+    query = "SELECT COUNT(*) AS n FROM flights"
+
+    results = client.execute_progressive(query, "Count", percents=(1, 100))
+    assert server.statements == []
+
+    first = next(results)
+    assert "TABLESAMPLE (1 PERCENT)" in server.statements[-1]
+    assert first.attrs["approximate"] is True
+
+    last = next(results)
+    assert server.statements[-1] == query
+    assert last.attrs["approximate"] is False
+    assert last["n_ci_low"].tolist() == last["n"].astype(float).tolist()
+
+
+def test_execute_progressive_rejects_ineligible_queries_before_running(
+    make_server, make_client
+):
+    server = make_server()
+    client = make_client(server)
+
+    with pytest.raises(ValueError, match="MAX"):
+        client.execute_progressive("SELECT MAX(id) FROM t")
+    assert server.stats["submit"] == 0
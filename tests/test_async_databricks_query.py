@@ -0,0 +1,131 @@
+# ABOUTME: Tests for AsyncDatabricksQueryClient against MockStatementServer
+# ABOUTME: Covers polling, multi-chunk results, retries and cancelling statements with their task
+
+import asyncio
+
+import pytest
+
+from utils.retry_policy import CircuitBreaker, RetryPolicy
+
+pytest.importorskip("aiohttp")
+
+
+def test_pending_statement_is_polled_until_it_succeeds(make_server, run_async):
+    server = make_server(rows=30, pending_polls=4)
+
+    df = run_async(server, lambda client: client.execute_query("SELECT 1"))
+
+    assert len(df) == 30
+    # The submit's server-side wait takes the statement one step further
+    assert server.stats["status"] == 4
+
+
+def test_async_mode_submits_without_a_server_side_wait(make_server, run_async):
+    server = make_server(rows=30, pending_polls=4)
+
+    df = run_async(
+        server, lambda client: client.execute_query("SELECT 1", async_mode=True)
+    )
+
+    assert len(df) == 30
+    assert server.stats["status"] == 5
+
+
+def test_task_cancelled_during_submit_cancels_the_statement(make_server, run_async):
+    server = make_server(pending_polls=50, latency=0.3)
+
+    async def scenario(client):
+        task = asyncio.ensure_future(client.execute_query("SELECT 1"))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    # Closing the client waits for the submit to return and cancels it
+    run_async(server, scenario)
+
+    assert server.stats["submit"] == 1
+    assert server.stats["cancel"] == 1
+
+
+def test_queries_run_concurrently(make_server, run_async):
+    server = make_server(pending_polls=4)
+
+    async def scenario(client):
+        return await asyncio.gather(
+            *(client.execute_query(f"SELECT * FROM t LIMIT {n}") for n in (5, 6, 7))
+        )
+
+    frames = run_async(server, scenario)
+
+    assert [len(df) for df in frames] == [5, 6, 7]
+    assert server.peak_running == 3
+
+
+def test_external_links_result_spanning_chunks(make_server, run_async):
+    pytest.importorskip("pyarrow")
+    server = make_server(rows=25_000, chunk_size=10_000)
+
+    df = run_async(
+        server,
+        lambda client: client.execute_query(
+            "SELECT * FROM t", disposition="EXTERNAL_LINKS"
+        ),
+    )
+
+    assert len(df) == 25_000
+    assert df["id"].iloc[:3].tolist() == [0, 1, 2]
+    assert server.stats["download"] == 3
+
+
+def test_rejected_requests_are_retried(make_server, run_async):
+    server = make_server(rows=10, error_rate=0.5, error_status=429, retry_after=0.01)
+
+    async def scenario(client):
+        return [await client.execute_query("SELECT * FROM t") for _ in range(3)]
+
+    frames = run_async(
+        server,
+        scenario,
+        retry_policy=RetryPolicy(max_attempts=10),
+        circuit_breaker=CircuitBreaker(failure_threshold=100),
+    )
+
+    assert [len(df) for df in frames] == [10, 10, 10]
+    assert server.stats["error_429"] > 0
+
+
+def test_failed_statement_raises(make_server, run_async):
+    server = make_server(failure_rate=1.0)
+
+    with pytest.raises(RuntimeError, match="MOCK_FAILURE"):
+        run_async(server, lambda client: client.execute_query("SELECT 1"))
+
+
+def test_cancelling_the_task_cancels_the_statement(make_server, run_async):
+    server = make_server(pending_polls=1_000)
+
+    async def scenario(client):
+        task = asyncio.create_task(client.execute_query("SELECT 1", timeout=None))
+        await asyncio.sleep(0.2)
+        assert len(client._in_flight) == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return client._in_flight
+
+    assert run_async(server, scenario) == {}
+    (statement,) = server._statements.values()
+    assert statement.state == "CANCELED"
+
+
+def test_close_cancels_submitted_statements(make_server, run_async):
+    server = make_server(pending_polls=1_000)
+
+    async def scenario(client):
+        return [await client.submit_query(f"SELECT {i}") for i in range(2)]
+
+    submitted = run_async(server, scenario)
+
+    assert [server._statements[s].state for s in submitted] == ["CANCELED"] * 2
+    assert server.running == 0
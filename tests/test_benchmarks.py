@@ -0,0 +1,146 @@
+# ABOUTME: pytest-benchmark timings of execute_query() against MockStatementServer
+# ABOUTME: Fails when a case is slower or needs more memory than benchmark_baseline.json allows
+
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from utils.databricks_query import DatabricksQueryClient
+from utils.mock_statement_server import MockStatementServer
+
+pytest.importorskip("pytest_benchmark")
+
+# Timings need a quiet machine: excluded from the default run, see pyproject
+pytestmark = pytest.mark.benchmark
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+
+# (disposition, rows) per case
+CASES = [
+    ("INLINE", 100),
+    ("INLINE", 10_000),
+    ("EXTERNAL_LINKS", 10_000),
+    ("EXTERNAL_LINKS", 100_000),
+]
+
+ROUNDS = 10
+
+# Absolute slack on top of the tolerance, so sub-10ms cases don't fail on
+# scheduler noise
+NOISE_FLOOR = {"min_ms": 5.0, "peak_mb": 0.5}
+
+# Extra timing passes before a slow case fails. A busy shared machine can
+# slow a whole case down; a real regression stays slow when re-measured.
+CONFIRM_PASSES = 2
+
+
+@pytest.fixture(scope="module")
+def benchmark_client():
+    """One client and mock server shared by every case, as in real use."""
+    server = MockStatementServer(chunk_size=20_000)
+    with server, tempfile.TemporaryDirectory() as directory:
+        env_path = Path(directory) / ".env"
+        env_path.write_text(
+            f"DATABRICKS_SERVER_HOSTNAME={server.url}\n"
+            "DATABRICKS_HTTP_PATH=/sql/1.0/warehouses/benchmark\n"
+            "DATABRICKS_ACCESS_TOKEN=mock-token\n"
+        )
+        with DatabricksQueryClient(env_path=env_path, preconnect=False) as client:
+            yield client
+
+
+@pytest.fixture(scope="module")
+def baseline(request):
+    """
+    The stored baseline, by case. With --update-baseline the cases measured
+    by this run replace their entries when the module finishes.
+    """
+    stored = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    measured = {}
+    yield stored, measured
+    if measured:
+        updated = {**stored, **measured}
+        BASELINE_PATH.write_text(json.dumps(updated, indent=2, sort_keys=True) + "\n")
+
+
+def _peak_mb(function, *args, **kwargs) -> float:
+    """Peak Python memory of one call, in MB."""
+    # Separate from the timed rounds: tracemalloc slows allocation down
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024**2
+
+
+def _best_ms(function, *args, **kwargs) -> float:
+    """Fastest of ROUNDS calls, in milliseconds."""
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+@pytest.mark.parametrize(
+    "disposition, rows", CASES, ids=[f"{d.lower()}_{rows}" for d, rows in CASES]
+)
+def test_execute_query(
+    benchmark, benchmark_client, baseline, request, disposition, rows
+):
+    if disposition == "EXTERNAL_LINKS":
+        pytest.importorskip("pyarrow")
+    query = f"SELECT * FROM benchmark LIMIT {rows}"
+    options = {"disposition": disposition}
+
+    df = benchmark.pedantic(
+        benchmark_client.execute_query,
+        args=(query, "benchmark"),
+        kwargs=options,
+        rounds=ROUNDS,
+        warmup_rounds=1,
+    )
+    assert len(df) == rows
+    if benchmark.disabled:
+        return
+
+    metrics = {
+        "min_ms": benchmark.stats.stats.min * 1000,
+        "peak_mb": _peak_mb(benchmark_client.execute_query, query, **options),
+    }
+    benchmark.extra_info.update(metrics)
+
+    case = request.node.callspec.id
+    stored, measured = baseline
+    if request.config.getoption("--update-baseline"):
+        measured[case] = {name: round(value, 3) for name, value in metrics.items()}
+        return
+    if case not in stored:
+        pytest.skip(f"No baseline for {case}; record one with --update-baseline")
+
+    tolerance = request.config.getoption("--baseline-tolerance")
+    limits = {
+        name: reference * (1 + tolerance) + NOISE_FLOOR[name]
+        for name, reference in stored[case].items()
+    }
+    for _ in range(CONFIRM_PASSES):
+        if metrics["min_ms"] <= limits["min_ms"]:
+            break
+        again = _best_ms(benchmark_client.execute_query, query, **options)
+        metrics["min_ms"] = min(metrics["min_ms"], again)
+
+    regressions = [
+        f"{name} {value:,.2f} vs baseline {stored[case][name]:,.2f}"
+        for name, value in metrics.items()
+        if value > limits[name]
+    ]
+    assert not regressions, f"{case} regressed more than {tolerance:.0%}: " + (
+        "; ".join(regressions)
+    )
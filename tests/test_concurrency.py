@@ -0,0 +1,67 @@
+# ABOUTME: Tests for concurrent use of one DatabricksQueryClient against MockStatementServer
+# ABOUTME: execute_many() and threads sharing a client must get their own results and respect the query cap
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Statements stay PENDING/RUNNING for this many status reads, so they overlap
+PENDING_POLLS = 4
+
+
+def _assert_rows(df, rows):
+    assert len(df) == rows
+    assert df["id"].tolist()[:5] == list(range(min(rows, 5)))
+    assert df["id"].iloc[-1] == rows - 1
+
+
+def test_execute_many_returns_each_querys_result(make_server, make_client):
+    server = make_server(pending_polls=PENDING_POLLS)
+    client = make_client(server, max_concurrent_queries=3)
+    queries = {f"q{n}": f"SELECT * FROM t LIMIT {n}" for n in range(10, 22)}
+
+    results, errors = client.execute_many(queries, max_workers=8)
+
+    assert errors == {}
+    assert list(results) == list(queries)
+    for n in range(10, 22):
+        _assert_rows(results[f"q{n}"], n)
+    assert 1 < server.peak_running <= 3
+    assert server.running == 0
+
+
+def test_execute_many_cap_holds_across_threads(make_server, make_client):
+    server = make_server(pending_polls=PENDING_POLLS)
+    client = make_client(server, max_concurrent_queries=4)
+
+    def batch(thread: int):
+        queries = {
+            f"t{thread}-{i}": f"SELECT * FROM t LIMIT {thread * 100 + i + 1}"
+            for i in range(5)
+        }
+        return thread, client.execute_many(queries, max_workers=5)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        batches = list(pool.map(batch, range(1, 5)))
+
+    for thread, (results, errors) in batches:
+        assert errors == {}
+        for i in range(5):
+            _assert_rows(results[f"t{thread}-{i}"], thread * 100 + i + 1)
+    assert 1 < server.peak_running <= 4
+    assert server.running == 0
+
+
+def test_threads_sharing_a_client_get_their_own_results(make_server, make_client):
+    server = make_server(pending_polls=PENDING_POLLS)
+    client = make_client(server)
+    start = threading.Barrier(8)
+
+    def query(n: int):
+        start.wait()
+        return n, client.execute_query(f"SELECT * FROM t LIMIT {n}", f"Query {n}")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for n, df in pool.map(query, range(50, 58)):
+            _assert_rows(df, n)
+    assert server.peak_running > 1
+    assert client._in_flight == {}
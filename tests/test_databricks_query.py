@@ -0,0 +1,285 @@
+# ABOUTME: Tests for DatabricksQueryClient against MockStatementServer
+# ABOUTME: Covers polling, multi-chunk results, 429/503 retries with Retry-After and failed or cancelled statements
+
+import _thread
+import threading
+import time
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from utils import databricks_query
+from utils.retry_policy import CircuitBreaker, RetryPolicy
+
+
+def _capture_metrics(options: dict) -> list:
+    """Add a metrics hook to client options and return the list it fills."""
+    captured = []
+    options["metrics_hooks"] = [captured.append]
+    return captured
+
+
+def _assert_ids(df, rows):
+    """The mock numbers rows from 0 and makes every 97th one NULL."""
+    assert len(df) == rows
+    assert df["id"].dropna().tolist() == [i for i in range(rows) if i % 97 != 96]
+
+
+def test_pending_statement_is_polled_until_it_succeeds(make_server, make_client):
+    server = make_server(rows=40, pending_polls=6)
+    options = {}
+    metrics = _capture_metrics(options)
+    client = make_client(server, **options)
+
+    df = client.execute_query("SELECT * FROM t", "Slow")
+
+    assert len(df) == 40
+    assert server.stats["submit"] == 1
+    # The submit's server-side wait and every status read each move the
+    # statement one step closer to finishing
+    assert server.stats["status"] == 6
+    assert metrics[0].polls == 6
+    assert client._in_flight == {}
+
+
+def test_metrics_carry_the_query_shape_fingerprint(make_server, make_client):
+    options = {}
+    metrics = _capture_metrics(options)
+    client = make_client(make_server(rows=5), **options)
+
+    client.execute_query("SELECT * FROM t WHERE Year = 2008")
+    client.execute_query("select *\n  from t -- again\n where Year = 2009")
+    client.execute_query("SELECT * FROM t WHERE Year = :year", parameters={"year": 1})
+    with pytest.raises(ValueError):
+        client.execute_query("DROP TABLE t")
+
+    first, edited, bound, rejected = (m.fingerprint for m in metrics)
+    assert first == edited
+    assert bound != first and bound is not None
+    assert rejected is not None
+    assert metrics[0].as_dict()["fingerprint"] == first
+
+
+def test_async_mode_submits_without_a_server_side_wait(make_server, make_client):
+    server = make_server(rows=40, pending_polls=6)
+    client = make_client(server)
+
+    df = client.execute_query("SELECT * FROM t", "Slow", async_mode=True)
+
+    assert len(df) == 40
+    assert server.stats["status"] == 7
+
+
+def test_interrupt_during_submit_cancels_the_statement(make_server, make_client):
+    server = make_server(pending_polls=50, latency=0.3)
+    client = make_client(server)
+
+    # Ctrl-C while the server is still holding the submit request
+    timer = threading.Timer(0.1, _thread.interrupt_main)
+    timer.start()
+    with pytest.raises(KeyboardInterrupt):
+        client.execute_query("SELECT * FROM t", "Interrupted")
+    timer.join()
+
+    deadline = time.monotonic() + 5
+    while server.stats["cancel"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert server.stats["submit"] == 1
+    assert server.stats["cancel"] == 1
+    assert client._in_flight == {}
+
+
+def test_submit_and_wait_for_query(make_server, make_client):
+    server = make_server(pending_polls=3)
+    client = make_client(server)
+
+    statement_id = client.submit_query("SELECT * FROM t LIMIT 12", "Later")
+    assert client._in_flight == {statement_id: "Later"}
+
+    df = client.wait_for_query(statement_id, "Later", timeout=10)
+    assert df["id"].tolist() == list(range(12))
+    assert client._in_flight == {}
+
+
+def test_results_keep_the_declared_types(make_server, make_client):
+    server = make_server(rows=100)
+    client = make_client(server)
+
+    df = client.execute_query("SELECT * FROM t")
+
+    assert str(df["id"].dtype) == "Int64"
+    assert str(df["value"].dtype) == "float64"
+    assert str(df["flag"].dtype) == "boolean"
+    assert isinstance(df["created"].dtype, pd.DatetimeTZDtype)
+    assert str(df["created"].dtype.tz) == "UTC"
+    # Every 97th generated row is NULL
+    assert df["name"].isna().tolist().index(True) == 96
+
+
+DECIMAL_COLUMNS = [
+    {"name": "id", "type_name": "BIGINT"},
+    {"name": "amount", "type_name": "DECIMAL", "type_precision": 38, "type_scale": 2},
+]
+
+
+def _expected_amounts(rows):
+    """The mock's DECIMAL values, beyond what float64 can hold exactly."""
+    return [
+        None if row % 97 == 96 else Decimal(f"{10**30 + row}.{row % 100:02d}")
+        for row in range(rows)
+    ]
+
+
+@pytest.mark.parametrize("disposition", ["INLINE", "EXTERNAL_LINKS"])
+def test_decimal_round_trips_exactly(make_server, make_client, disposition):
+    pa = pytest.importorskip("pyarrow")
+    server = make_server(rows=200, columns=DECIMAL_COLUMNS)
+    client = make_client(server)
+
+    df = client.execute_query("SELECT * FROM t", disposition=disposition)
+
+    assert df["amount"].dtype == pd.ArrowDtype(pa.decimal128(38, 2))
+    amounts = [None if pd.isna(v) else v for v in df["amount"]]
+    assert amounts == _expected_amounts(200)
+
+
+def test_decimal_without_pyarrow_becomes_decimal_objects(monkeypatch):
+    def missing():
+        raise ImportError("no pyarrow")
+
+    monkeypatch.setattr(databricks_query, "_import_pyarrow", missing)
+    column = {"type_name": "DECIMAL", "type_precision": 38, "type_scale": 2}
+    values = ["1000000000000000000000000000001.23", None, "-0.05"]
+
+    series = databricks_query._convert_column(values, column)
+
+    assert series.tolist() == [
+        Decimal("1000000000000000000000000000001.23"),
+        None,
+        Decimal("-0.05"),
+    ]
+
+
+def test_inline_result_spanning_chunks(make_server, make_client):
+    server = make_server(rows=2_500, chunk_size=1_000)
+    client = make_client(server)
+
+    df = client.execute_query("SELECT * FROM t")
+
+    _assert_ids(df, 2_500)
+    assert server.stats["chunk"] == 2
+
+
+def test_external_links_result_spanning_chunks(make_server, make_client):
+    pytest.importorskip("pyarrow")
+    server = make_server(rows=25_000, chunk_size=10_000)
+    options = {}
+    metrics = _capture_metrics(options)
+    client = make_client(server, **options)
+
+    df = client.execute_query("SELECT * FROM t", disposition="EXTERNAL_LINKS")
+
+    _assert_ids(df, 25_000)
+    assert server.stats["download"] == 3
+    assert server.stats["chunk"] == 2
+    assert metrics[0].chunks == 3
+
+
+def test_external_links_iter_yields_chunks_in_order(make_server, make_client):
+    pytest.importorskip("pyarrow")
+    server = make_server(rows=25_000, chunk_size=10_000)
+    client = make_client(server)
+
+    pieces = list(
+        client.execute_query_iter(
+            "SELECT * FROM t", disposition="EXTERNAL_LINKS", max_in_flight=2
+        )
+    )
+
+    assert [len(piece) for piece in pieces] == [10_000, 10_000, 5_000]
+    assert pieces[2]["id"].iloc[-1] == 24_999
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_rejected_requests_are_retried_after_retry_after(
+    make_server, make_client, status
+):
+    server = make_server(rows=10, error_rate=0.5, error_status=status, retry_after=0.05)
+    options = {
+        "retry_policy": RetryPolicy(max_attempts=10),
+        "circuit_breaker": CircuitBreaker(failure_threshold=100),
+    }
+    metrics = _capture_metrics(options)
+    client = make_client(server, **options)
+
+    start = time.perf_counter()
+    for _ in range(3):
+        df = client.execute_query("SELECT * FROM t")
+        assert df["id"].tolist() == list(range(10))
+    elapsed = time.perf_counter() - start
+
+    errors = server.stats[f"error_{status}"]
+    assert errors > 0
+    assert sum(m.retries for m in metrics) == errors
+    # Each retry waited for the server's Retry-After
+    assert elapsed >= errors * 0.05
+
+
+def test_retries_give_up_after_max_attempts(make_server, make_client):
+    server = make_server(error_rate=1.0, error_status=503, retry_after=0.02)
+    client = make_client(
+        server,
+        retry_policy=RetryPolicy(max_attempts=3),
+        circuit_breaker=CircuitBreaker(failure_threshold=100),
+    )
+
+    with pytest.raises(RuntimeError, match="status 503"):
+        client.execute_query("SELECT * FROM t")
+    assert server.stats["submit"] == 3
+    assert server._statements == {}
+
+
+def test_failed_statement_raises_with_server_message(make_server, make_client):
+    server = make_server(failure_rate=1.0, pending_polls=2)
+    client = make_client(server)
+
+    with pytest.raises(RuntimeError, match="MOCK_FAILURE"):
+        client.execute_query("SELECT * FROM t", "Doomed")
+    assert client._in_flight == {}
+
+
+def test_cancelled_statement_raises(make_server, make_client):
+    server = make_server(pending_polls=1_000)
+    client = make_client(server)
+
+    statement_id = client.submit_query("SELECT * FROM t", "Abandoned")
+    client.cancel_statement(statement_id)
+
+    with pytest.raises(RuntimeError, match="Abandoned was canceled"):
+        client.wait_for_query(statement_id, "Abandoned")
+    assert server._statements[statement_id].state == "CANCELED"
+
+
+def test_timeout_cancels_the_statement(make_server, make_client):
+    server = make_server(pending_polls=1_000)
+    client = make_client(server)
+
+    with pytest.raises(TimeoutError, match="now cancelled"):
+        client.execute_query("SELECT * FROM t", "Too slow", timeout=0.2)
+
+    (statement,) = server._statements.values()
+    assert statement.state == "CANCELED"
+    assert server.running == 0
+    assert client._in_flight == {}
+
+
+def test_cancel_all_stops_submitted_statements(make_server, make_client):
+    server = make_server(pending_polls=1_000)
+    client = make_client(server)
+
+    submitted = {client.submit_query(f"SELECT {i}") for i in range(3)}
+
+    assert set(client.cancel_all()) == submitted
+    assert {s.state for s in server._statements.values()} == {"CANCELED"}
+    assert client.cancel_all() == []
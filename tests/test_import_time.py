@@ -0,0 +1,124 @@
+# ABOUTME: Import-time regression tests for the Databricks query utilities
+# ABOUTME: Imports run in fresh interpreters; heavy dependencies must wait until first use
+
+import json
+import re
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Best cumulative import time allowed per module
+BUDGET_MS = 100.0
+
+# Fresh interpreters per module; the fastest run counts
+RUNS = 5
+
+# Modules that must only be loaded once a query actually runs
+HEAVY_MODULES = (
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "requests",
+    "urllib3",
+    "dotenv",
+    "aiohttp",
+    "duckdb",
+)
+
+# Prints the heavy modules loaded so far, comma-separated
+_PRINT_LOADED = f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+
+# "import time:      self [us] | cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _run(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_import(module: str) -> Tuple[float, List[str]]:
+    """
+    Import ``module`` in a fresh interpreter.
+
+    Returns:
+        tuple: ``(cumulative_ms, heavy_modules_loaded)``
+    """
+    completed = _run(f"import sys, {module}; {_PRINT_LOADED}", "-X", "importtime")
+
+    package = module.split(".")[0]
+    cumulative_us = 0
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match or len(match.group(3)) != 1:
+            # Nested entries are already counted in their parent
+            continue
+        name = match.group(4)
+        if name == package or name.startswith(f"{package}."):
+            cumulative_us += int(match.group(2))
+
+    heavy = [name for name in completed.stdout.strip().split(",") if name]
+    return cumulative_us / 1000, heavy
+
+
+@pytest.mark.parametrize(
+    "module", ["utils", "utils.databricks_query", "utils.async_databricks_query"]
+)
+def test_import_is_fast_and_light(module):
+    results = [measure_import(module) for _ in range(RUNS)]
+
+    heavy = sorted({name for _, loaded in results for name in loaded})
+    assert heavy == [], f"importing {module} loads {', '.join(heavy)}"
+    best_ms = min(ms for ms, _ in results)
+    assert best_ms <= BUDGET_MS, f"{module} took {best_ms:.1f}ms to import"
+
+
+def test_heavy_dependencies_wait_for_first_use():
+    # One interpreter: import, create a client, then run an inline query
+    code = textwrap.dedent(f"""
+        import json, sys, tempfile
+        from pathlib import Path
+
+        def loaded():
+            return [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+
+        steps = {{}}
+        from utils.databricks_query import DatabricksQueryClient
+        from utils.mock_statement_server import MockStatementServer
+        steps["import"] = loaded()
+
+        with MockStatementServer(rows=5) as server, tempfile.TemporaryDirectory() as d:
+            env = Path(d) / ".env"
+            env.write_text(
+                f"DATABRICKS_SERVER_HOSTNAME={{server.url}}\\n"
+                "DATABRICKS_HTTP_PATH=/sql/1.0/warehouses/mock\\n"
+                "DATABRICKS_ACCESS_TOKEN=mock-token\\n"
+            )
+            with DatabricksQueryClient(env_path=env, preconnect=False) as client:
+                steps["client"] = loaded()
+                client.execute_query("SELECT * FROM t")
+                steps["query"] = loaded()
+        print(json.dumps(steps))
+        """)
+    steps = json.loads(_run(code).stdout)
+
+    assert steps["import"] == []
+    # Creating a client needs the HTTP stack and .env parsing, nothing else
+    assert set(steps["client"]) <= {"requests", "urllib3", "dotenv"}
+    # An inline query needs pandas; Arrow, aiohttp and DuckDB stay unloaded
+    # unless pandas itself imports them (pandas 3 loads pyarrow if present)
+    pandas_loads = _run(f"import sys, pandas; {_PRINT_LOADED}").stdout.strip()
+    by_pandas = set(pandas_loads.split(","))
+    assert "pandas" in steps["query"]
+    assert not ({"pyarrow", "aiohttp", "duckdb"} - by_pandas) & set(steps["query"])
@@ -0,0 +1,155 @@
+# ABOUTME: Tests for incremental refresh: watermark literals, look-back shifts, merging and execute_incremental()
+# ABOUTME: Runs against MockStatementServer, applying the range filter the mock itself ignores
+
+import datetime
+import re
+
+import pandas as pd
+import pytest
+
+from utils.incremental import (
+    IncrementalStore,
+    incremental_query,
+    merge_incremental,
+    shift,
+    sql_literal,
+)
+
+pytest.importorskip("pyarrow")
+
+QUERY = "SELECT id, value FROM events"
+
+
+@pytest.mark.parametrize(
+    "value,literal",
+    [
+        (7, "7"),
+        (2.5, "2.5"),
+        (True, "TRUE"),
+        (datetime.date(2024, 3, 1), "DATE'2024-03-01'"),
+        (pd.Timestamp("2024-03-01"), "DATE'2024-03-01'"),
+        (pd.Timestamp("2024-03-01 12:30"), "TIMESTAMP_NTZ'2024-03-01 12:30:00'"),
+        (
+            pd.Timestamp("2024-03-01 12:30", tz="UTC"),
+            "TIMESTAMP'2024-03-01 12:30:00+00:00'",
+        ),
+        ("it's", "'it\\'s'"),
+    ],
+)
+def test_watermarks_become_sql_literals(value, literal):
+    assert sql_literal(value) == literal
+
+
+def test_missing_watermark_is_rejected():
+    with pytest.raises(ValueError, match="missing"):
+        sql_literal(pd.NaT)
+
+
+def test_shift_uses_days_for_dates():
+    day = datetime.date(2024, 3, 10)
+
+    assert shift(day, 2) == datetime.date(2024, 3, 8)
+    assert shift(pd.Timestamp(day), datetime.timedelta(hours=6)) == pd.Timestamp(
+        "2024-03-09 18:00"
+    )
+    assert shift(10, 3) == 7
+    assert shift(10, None) == 10
+    with pytest.raises(ValueError, match="timedelta"):
+        shift(10, datetime.timedelta(days=1))
+
+
+def test_incremental_query_wraps_and_quotes():
+    sql = incremental_query(" SELECT * FROM t -- trailing comment; ", "odd`col", 5)
+
+    assert sql == (
+        "SELECT * FROM (\nSELECT * FROM t -- trailing comment\n) AS _incremental\n"
+        "WHERE _incremental.`odd``col` >= 5"
+    )
+
+
+def test_merge_replaces_rows_from_the_bound_on():
+    stored = pd.DataFrame({"day": [1, 2, 3, 4], "n": [10, 20, 30, 40]})
+    fresh = pd.DataFrame({"day": [3, 5], "n": [31, 50]})
+
+    merged = merge_incremental(stored, fresh, "day", 3)
+
+    # Day 4 disappeared from the fresh result, so it is gone
+    assert merged.to_dict("list") == {"day": [1, 2, 3, 5], "n": [10, 20, 31, 50]}
+
+
+_BOUND = re.compile(r"WHERE _incremental\.`id` >= (\d+)$")
+
+
+@pytest.fixture
+def incremental_client(make_server, make_client, tmp_path):
+    """
+    A client over a 10-row server whose incremental queries are filtered.
+
+    MockStatementServer ignores WHERE clauses, so the client applies the
+    ``id >= bound`` range of a wrapped query to its result, as a warehouse
+    would.
+    """
+    server = make_server(rows=10, columns=[{"name": "id", "type_name": "BIGINT"}])
+    client = make_client(server, incremental_store=IncrementalStore(tmp_path))
+    execute = client.execute_query
+
+    def execute_query(query, *args, **options):
+        df = execute(query, *args, **options)
+        match = _BOUND.search(query)
+        if match:
+            df = df[df["id"] >= int(match.group(1))].reset_index(drop=True)
+        return df
+
+    client.execute_query = execute_query
+    return server, client
+
+
+def test_lookback_re_reads_recent_rows(incremental_client):
+    server, client = incremental_client
+
+    first = client.execute_incremental(QUERY, "id")
+    assert first["id"].tolist() == list(range(10))
+    assert first.attrs == {"incremental_from": None, "watermark": "9"}
+
+    server.rows = 14
+    second = client.execute_incremental(QUERY, "id", lookback=3)
+
+    assert server.statements == [
+        QUERY,
+        f"SELECT * FROM (\n{QUERY}\n) AS _incremental\nWHERE _incremental.`id` >= 6",
+    ]
+    assert second["id"].tolist() == list(range(14))
+    assert second.attrs == {"incremental_from": "6", "watermark": "13"}
+
+
+def test_retention_keeps_a_rolling_window(incremental_client):
+    server, client = incremental_client
+    client.execute_incremental(QUERY, "id", retention=100)
+
+    server.rows = 14
+    df = client.execute_incremental(QUERY, "id", retention=5)
+    assert df["id"].tolist() == [8, 9, 10, 11, 12, 13]
+
+    # The trimmed result is what is stored
+    server.rows = 15
+    df = client.execute_incremental(QUERY, "id", lookback=1)
+    assert server.statements[-1].endswith(">= 12")
+    assert df["id"].tolist() == [8, 9, 10, 11, 12, 13, 14]
+
+
+def test_full_refresh_runs_the_whole_query(incremental_client):
+    server, client = incremental_client
+    client.execute_incremental(QUERY, "id")
+
+    df = client.execute_incremental(QUERY, "id", full_refresh=True)
+
+    assert server.statements == [QUERY, QUERY]
+    assert df.attrs["incremental_from"] is None
+    assert len(df) == 10
+
+
+def test_result_without_the_watermark_column_is_rejected(incremental_client):
+    _, client = incremental_client
+
+    with pytest.raises(ValueError, match="has no column 'day'"):
+        client.execute_incremental(QUERY, "day")
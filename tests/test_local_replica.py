@@ -0,0 +1,94 @@
+# ABOUTME: Tests for LocalReplica: table keys, the DuckDB query rewrite and end-to-end local queries
+# ABOUTME: Slices are materialized from MockStatementServer into a temporary directory
+
+import pytest
+
+from utils.local_replica import LocalReplica, table_key
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("duckdb")
+
+
+@pytest.mark.parametrize(
+    "table,key",
+    [
+        ("orders", "orders"),
+        ("Main.Sales.`Orders`", "main.sales.orders"),
+        (" main.sales.orders ", "main.sales.orders"),
+        ("`odd``name`", "odd`name"),
+    ],
+)
+def test_table_keys_are_canonical(table, key):
+    assert table_key(table) == key
+
+
+@pytest.mark.parametrize(
+    "table", ["", "a.b.c.d", "a..b", "orders; DROP TABLE x", "`main.sales.orders`"]
+)
+def test_invalid_table_names_are_rejected(table):
+    with pytest.raises(ValueError, match="Invalid table name"):
+        table_key(table)
+
+
+@pytest.fixture
+def replica(tmp_path):
+    replica = LocalReplica(tmp_path / "replicas")
+    yield replica
+    replica.close()
+
+
+def test_rewrite_only_touches_replicated_table_names(replica):
+    replica._path("main.sales.orders").mkdir()
+    query = (
+        "SELECT o.id, orders.name, 'main.sales.orders' AS label, "
+        "`main.sales.orders` AS quoted\n"
+        "FROM Main.Sales.`Orders` o\n"
+        "JOIN main.sales.orders_archive a ON a.id = o.id\n"
+        "JOIN sales.orders s ON s.id = o.id -- main.sales.orders\n"
+        "WHERE x.main.sales.orders > 0 AND main.sales.orders(1);"
+    )
+
+    sql, used = replica.rewrite(query)
+
+    assert used == ["main.sales.orders"]
+    assert sql == (
+        "SELECT o.id, orders.name, 'main.sales.orders' AS label, "
+        "`main.sales.orders` AS quoted\n"
+        'FROM "main.sales.orders" o\n'
+        "JOIN main.sales.orders_archive a ON a.id = o.id\n"
+        "JOIN sales.orders s ON s.id = o.id -- main.sales.orders\n"
+        "WHERE x.main.sales.orders > 0 AND main.sales.orders(1)"
+    )
+
+
+def test_rewrite_without_replicas_leaves_the_query_alone(replica):
+    assert replica.rewrite("SELECT * FROM orders") == ("SELECT * FROM orders", [])
+
+
+def test_materialized_slice_is_queried_locally(make_server, make_client, replica):
+    server = make_server(rows=250)
+    client = make_client(server, replica=replica)
+
+    info = client.replicate_table(
+        "main.sales.orders", columns=["id", "value"], where="id < 1000"
+    )
+
+    assert server.statements == [
+        "SELECT `id`, `value` FROM main.sales.orders WHERE id < 1000"
+    ]
+    assert (info.table, info.rows) == ("main.sales.orders", 250)
+    assert replica.tables() == [info]
+
+    df = client.execute_query(
+        "SELECT COUNT(*) AS n, MAX(id) AS top FROM Main.Sales.Orders", local=True
+    )
+
+    assert df.to_dict("records") == [{"n": 250, "top": 249}]
+    assert server.stats["submit"] == 1
+
+
+def test_unreplicated_query_is_refused_locally(make_server, make_client, replica):
+    client = make_client(make_server(), replica=replica)
+
+    with pytest.raises(LookupError, match="replicated: none"):
+        client.execute_query("SELECT * FROM main.sales.orders", local=True)
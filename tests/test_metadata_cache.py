@@ -0,0 +1,219 @@
+# ABOUTME: Tests for MetadataCache: snapshot loading, TTL refresh, invalidation and find_columns() filtering
+# ABOUTME: Uses a recording client that answers information_schema and DESCRIBE queries with canned frames
+
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from utils.metadata_cache import MetadataCache
+
+# (schema, table, column, type) rows of the "main" and "sales" catalogs
+CATALOGS = {
+    "main": [
+        ("default", "flights", "Year", "INT"),
+        ("default", "flights", "DepDelay", "DOUBLE"),
+        ("default", "flights", "ArrDelay", "DECIMAL(10,2)"),
+        ("default", "flights", "Origin", "STRING"),
+        ("default", "airports", "Code", "STRING"),
+        ("ops", "delays", "delay_minutes", "BIGINT"),
+    ],
+    "sales": [
+        ("retail", "orders", "order_id", "BIGINT"),
+        ("retail", "orders", "ship_delay", "INT"),
+        ("retail", "orders", "created", "TIMESTAMP"),
+    ],
+}
+
+
+class _MetadataClient:
+    """Records queries and answers them from CATALOGS."""
+
+    hostname = "adb-1.azuredatabricks.net"
+
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, query, query_name="Query", timeout=None, **options):
+        self.queries.append(query_name)
+        assert options.get("cache") == "bypass"
+        if query.startswith("DESCRIBE TABLE"):
+            return pd.DataFrame(
+                {
+                    "col_name": ["id", "note", "", "# Partition Information", "id"],
+                    "data_type": ["bigint", "string", "", "", "bigint"],
+                    "comment": [None, "free text", "", "", None],
+                }
+            )
+        catalog = query_name.split()[-1]
+        rows = CATALOGS[catalog]
+        return pd.DataFrame(
+            {
+                "table_schema": [row[0] for row in rows],
+                "table_name": [row[1] for row in rows],
+                "column_name": [row[2] for row in rows],
+                "ordinal_position": [
+                    sum(r[:2] == row[:2] for r in rows[:i]) + 1
+                    for i, row in enumerate(rows)
+                ],
+                "full_data_type": [row[3] for row in rows],
+                "is_nullable": ["YES"] * len(rows),
+                "comment": [None] * len(rows),
+            }
+        )
+
+
+@pytest.fixture
+def client():
+    return _MetadataClient()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return MetadataCache(tmp_path / "metadata", ttl=3600)
+
+
+def _age(cache, seconds):
+    """Make every snapshot on disk look ``seconds`` old."""
+    then = time.time() - seconds
+    for path in cache.directory.glob("*/*.json"):
+        os.utime(path, (then, then))
+
+
+def test_catalog_is_read_once(cache, client):
+    columns = cache.get_columns(client, "Main.Default.Flights")
+
+    assert [info.column for info in columns] == [
+        "Year",
+        "DepDelay",
+        "ArrDelay",
+        "Origin",
+    ]
+    assert columns[2].data_type == "decimal(10,2)"
+    assert cache.list_schemas(client, "main") == ["default", "ops"]
+    assert cache.list_tables(client, "main", schema="default") == [
+        "main.default.airports",
+        "main.default.flights",
+    ]
+    assert client.queries == ["Metadata main"]
+
+
+def test_snapshot_is_shared_through_disk(cache, client):
+    cache.get_columns(client, "main.default.flights")
+
+    other = MetadataCache(cache.directory, ttl=3600)
+
+    assert len(other.get_columns(client, "main.default.airports")) == 1
+    assert client.queries == ["Metadata main"]
+
+
+def test_expired_snapshot_is_read_again(cache, client):
+    cache.get_columns(client, "main.default.flights")
+
+    _age(cache, 3000)
+    cache.get_columns(client, "main.default.flights")
+    assert client.queries == ["Metadata main"]
+
+    _age(cache, 3700)
+    cache.get_columns(client, "main.default.flights")
+    assert client.queries == ["Metadata main", "Metadata main"]
+
+
+def test_without_ttl_snapshots_never_expire(tmp_path, client):
+    cache = MetadataCache(tmp_path, ttl=None)
+    cache.catalog_columns(client, "main")
+
+    _age(cache, 10 * 365 * 24 * 3600)
+    cache.catalog_columns(client, "main")
+
+    assert client.queries == ["Metadata main"]
+
+
+def test_refresh_and_invalidate_read_again(cache, client):
+    cache.catalog_columns(client, "main")
+    cache.catalog_columns(client, "sales")
+
+    cache.catalog_columns(client, "main", refresh=True)
+    cache.invalidate(table="sales.retail.orders")
+    cache.catalog_columns(client, "main")
+    cache.catalog_columns(client, "sales")
+
+    assert client.queries == [
+        "Metadata main",
+        "Metadata sales",
+        "Metadata main",
+        "Metadata sales",
+    ]
+
+
+def test_unqualified_tables_are_described(cache, client):
+    columns = cache.get_columns(client, "ops.events")
+
+    assert [(i.schema, i.table, i.column) for i in columns] == [
+        ("ops", "events", "id"),
+        ("ops", "events", "note"),
+    ]
+    assert columns[1].comment == "free text"
+    cache.get_columns(client, "OPS.EVENTS")
+    assert client.queries == ["Describe ops.events"]
+
+
+def test_unknown_table_and_invalid_catalog(cache, client):
+    with pytest.raises(LookupError, match="Table not found"):
+        cache.get_columns(client, "main.default.missing")
+    with pytest.raises(ValueError, match="Invalid catalog name"):
+        cache.catalog_columns(client, "main; DROP")
+
+
+def _found(columns):
+    return [f"{i.catalog}.{i.schema}.{i.table}.{i.column}" for i in columns]
+
+
+@pytest.mark.parametrize(
+    "pattern,data_type,found",
+    [
+        (
+            "*delay*",
+            None,
+            [
+                "main.default.flights.DepDelay",
+                "main.default.flights.ArrDelay",
+                "main.ops.delays.delay_minutes",
+                "sales.retail.orders.ship_delay",
+            ],
+        ),
+        ("ORIGIN", None, ["main.default.flights.Origin"]),
+        ("origin?", None, []),
+        (
+            "*delay*",
+            ("int", "bigint"),
+            ["main.ops.delays.delay_minutes", "sales.retail.orders.ship_delay"],
+        ),
+        ("*", "decimal(38,0)", ["main.default.flights.ArrDelay"]),
+        ("*", "timestamp", ["sales.retail.orders.created"]),
+    ],
+)
+def test_find_columns_filters_by_name_and_type(
+    cache, client, pattern, data_type, found
+):
+    for catalog in CATALOGS:
+        cache.catalog_columns(client, catalog)
+
+    assert _found(cache.find_columns(client, pattern, data_type)) == found
+
+
+def test_find_columns_searches_cached_or_named_catalogs(cache, client):
+    cache.catalog_columns(client, "main")
+
+    # Only cached catalogs by default, without touching the warehouse
+    assert _found(cache.find_columns(client, "*_delay")) == []
+    assert client.queries == ["Metadata main"]
+
+    found = cache.find_columns(client, "*delay*", catalogs=["SALES"])
+    assert _found(found) == ["sales.retail.orders.ship_delay"]
+    assert client.queries == ["Metadata main", "Metadata sales"]
+
+    # Snapshots of another process are picked up from disk
+    other = MetadataCache(cache.directory, ttl=3600)
+    assert len(other.find_columns(client, "*delay*")) == 4
@@ -0,0 +1,189 @@
+# ABOUTME: Tests for QueryResultCache and the result cache modes of DatabricksQueryClient
+# ABOUTME: Covers TTL expiry, LRU eviction under the size cap, refresh/only/bypass and key stability
+
+import pandas as pd
+import pytest
+
+from utils import query_cache
+from utils.query_cache import QueryResultCache
+from utils.query_parameters import api_parameter
+
+pytest.importorskip("pyarrow")
+
+
+class _Clock:
+    """Stands in for time.time() in query_cache."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(query_cache.time, "time", clock)
+    return clock
+
+
+def _frame(rows=10):
+    return pd.DataFrame({"id": range(rows), "name": [f"n{i}" for i in range(rows)]})
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = QueryResultCache(tmp_path, default_ttl=60)
+    cache.put("default", _frame())
+    cache.put("short", _frame(), ttl=5)
+    cache.put("forever", _frame(), ttl=None)
+
+    clock.now += 10
+    assert cache.get("short") is None
+    assert len(cache.get("default")) == 10
+
+    clock.now += 60
+    assert cache.get("default") is None
+    # ttl=None falls back to default_ttl; only default_ttl=None never expires
+    assert cache.get("forever") is None
+    assert not list(tmp_path.glob("*.feather"))
+
+
+def test_no_default_ttl_keeps_entries(tmp_path, clock):
+    cache = QueryResultCache(tmp_path, default_ttl=None)
+    cache.put("key", _frame())
+
+    clock.now += 10 * 365 * 24 * 3600
+    assert cache.get("key") is not None
+
+
+def test_least_recently_used_entry_is_evicted_over_the_cap(tmp_path, clock):
+    cache = QueryResultCache(tmp_path, compression="uncompressed")
+    cache.put("probe", _frame(1000))
+    entry_size = cache.size_bytes()
+    cache.clear()
+    cache.max_bytes = int(entry_size * 2.5)
+
+    for key in ("a", "b"):
+        cache.put(key, _frame(1000))
+        clock.now += 1
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    clock.now += 1
+
+    cache.put("c", _frame(1000))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.size_bytes() <= cache.max_bytes
+    assert not (tmp_path / "b.feather").exists()
+
+
+def test_round_trip_keeps_dtypes(tmp_path):
+    cache = QueryResultCache(tmp_path)
+    df = pd.DataFrame(
+        {"id": pd.array([1, None], dtype="Int64"), "flag": [True, False]},
+        index=[5, 6],
+    )
+
+    assert cache.put("key", df)
+    cached = cache.get("key")
+
+    assert cached["id"].dtype == "Int64"
+    assert cached["id"].isna().tolist() == [False, True]
+    assert cached.index.tolist() == [0, 1]
+
+
+def test_uncacheable_frame_is_reported(tmp_path):
+    cache = QueryResultCache(tmp_path)
+    df = pd.DataFrame([[1, 2]], columns=["a", "a"])
+
+    assert cache.put("key", df) is False
+    assert cache.get("key") is None
+
+
+def test_make_key_is_stable_and_separates_parts():
+    key = QueryResultCache.make_key("warehouse", "INLINE", "SELECT 1")
+
+    assert key == QueryResultCache.make_key("warehouse", "INLINE", "SELECT 1")
+    assert key != QueryResultCache.make_key("warehouse", "INLINE", "SELECT 2")
+    assert QueryResultCache.make_key("ab", "c") != QueryResultCache.make_key("a", "bc")
+
+
+def _cached_client(make_server, make_client, tmp_path, **server_options):
+    server = make_server(**server_options)
+    return server, make_client(server, cache=QueryResultCache(tmp_path))
+
+
+def test_cache_modes(make_server, make_client, tmp_path):
+    server, client = _cached_client(make_server, make_client, tmp_path, rows=5)
+    query = "SELECT * FROM t"
+
+    with pytest.raises(LookupError):
+        client.execute_query(query, cache="only")
+    assert server.stats["submit"] == 0
+
+    first = client.execute_query(query)
+    assert server.stats["submit"] == 1
+    # "use" (the default) and "only" read the stored result
+    pd.testing.assert_frame_equal(client.execute_query(query), first)
+    client.execute_query(query, cache="only")
+    assert server.stats["submit"] == 1
+
+    client.execute_query(query, cache="refresh")
+    assert server.stats["submit"] == 2
+
+    client.cache.clear()
+    client.execute_query(query, cache="bypass")
+    assert server.stats["submit"] == 3
+    with pytest.raises(LookupError):
+        client.execute_query(query, cache="only")
+
+
+def test_refresh_overwrites_the_stored_result(make_server, make_client, tmp_path):
+    server, client = _cached_client(make_server, make_client, tmp_path, rows=5)
+    query = "SELECT * FROM t"
+
+    client.execute_query(query)
+    server.rows = 8
+    assert len(client.execute_query(query)) == 5
+    assert len(client.execute_query(query, cache="refresh")) == 8
+    assert len(client.execute_query(query, cache="only")) == 8
+
+
+def test_expired_result_is_fetched_again(make_server, make_client, tmp_path, clock):
+    server, client = _cached_client(make_server, make_client, tmp_path, rows=5)
+
+    client.execute_query("SELECT * FROM t", cache_ttl=30)
+    clock.now += 31
+    client.execute_query("SELECT * FROM t")
+
+    assert server.stats["submit"] == 2
+
+
+def test_modes_need_a_cache_and_a_known_name(make_server, make_client):
+    client = make_client(make_server())
+
+    with pytest.raises(ValueError, match="needs a client created with a cache"):
+        client.execute_query("SELECT 1", cache="only")
+    with pytest.raises(ValueError, match="cache must be one of"):
+        client.execute_query("SELECT 1", cache="sometimes")
+
+
+def test_client_keys_follow_the_normalized_query(make_server, make_client, tmp_path):
+    _, client = _cached_client(make_server, make_client, tmp_path)
+    key = client._cache_key("SELECT a FROM t WHERE x = 1", "INLINE", None)
+
+    # Layout and keyword case do not matter; literals, disposition and
+    # parameter values do
+    assert key == client._cache_key("select a\n  from t where x = 1", "INLINE", None)
+    assert key != client._cache_key("SELECT a FROM t WHERE x = 2", "INLINE", None)
+    assert key != client._cache_key(
+        "SELECT a FROM t WHERE x = 1", "EXTERNAL_LINKS", None
+    )
+    assert client._cache_key("SELECT a FROM t", "INLINE", "bypass") is None
+
+    bound = [api_parameter("x", 1)]
+    assert key != client._cache_key(
+        "SELECT a FROM t WHERE x = 1", "INLINE", None, bound
+    )
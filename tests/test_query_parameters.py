@@ -0,0 +1,173 @@
+# ABOUTME: Tests for named query parameters: type inference, identifier validation and binding
+# ABOUTME: Also checks that result cache and incremental keys follow the bound values
+
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from utils.incremental import IncrementalStore
+from utils.query_parameters import (
+    Identifier,
+    TypedValue,
+    api_parameter,
+    bind_parameters,
+    parameters_key,
+)
+
+UTC = datetime.timezone.utc
+
+
+@pytest.mark.parametrize(
+    "value,sql_type,text",
+    [
+        (42, "INT", "42"),
+        (-(2**31), "INT", "-2147483648"),
+        (2**31, "BIGINT", "2147483648"),
+        (np.int64(7), "INT", "7"),
+        (1.5, "DOUBLE", "1.5"),
+        (0.1, "DOUBLE", "0.1"),
+        (Decimal("12.50"), "DECIMAL(4,2)", "12.50"),
+        (Decimal("0.001"), "DECIMAL(3,3)", "0.001"),
+        (Decimal("-123"), "DECIMAL(3,0)", "-123"),
+        (datetime.date(2024, 1, 31), "DATE", "2024-01-31"),
+        (
+            datetime.datetime(2024, 1, 31, 12, 30),
+            "TIMESTAMP_NTZ",
+            "2024-01-31 12:30:00",
+        ),
+        (
+            datetime.datetime(2024, 1, 31, 12, 30, tzinfo=UTC),
+            "TIMESTAMP",
+            "2024-01-31 12:30:00+00:00",
+        ),
+        (True, "BOOLEAN", "true"),
+        (np.bool_(False), "BOOLEAN", "false"),
+        ("O'Hare", "STRING", "O'Hare"),
+        (Identifier("main.default.flights"), "STRING", "main.default.flights"),
+    ],
+)
+def test_types_are_inferred_from_values(value, sql_type, text):
+    assert api_parameter("p", value) == {"name": "p", "value": text, "type": sql_type}
+
+
+def test_none_is_sent_as_null():
+    assert api_parameter("p", None) == {"name": "p"}
+    assert api_parameter("p", TypedValue(None, "DATE")) == {"name": "p", "type": "DATE"}
+
+
+def test_typed_value_sets_the_type():
+    entry = api_parameter("p", TypedValue("12.5", "DECIMAL(10,2)"))
+
+    assert entry == {"name": "p", "type": "DECIMAL(10,2)", "value": "12.5"}
+
+
+@pytest.mark.parametrize("value", [[1, 2], b"raw", object(), Decimal("NaN")])
+def test_uninferable_values_are_rejected(value):
+    with pytest.raises(ValueError):
+        api_parameter("p", value)
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "flights",
+        "airlines.flights",
+        "samples.airlines.flights",
+        "`my table`.`odd``name`",
+        "2024_results",
+    ],
+)
+def test_valid_identifiers(name):
+    assert Identifier(name).name == name
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "",
+        "flights; DROP TABLE flights",
+        "a.b.c.d",
+        "a..b",
+        ".flights",
+        "my table",
+        "`unterminated",
+        "flights -- comment",
+        "t)",
+        None,
+        42,
+    ],
+)
+def test_invalid_identifiers_are_rejected(name):
+    with pytest.raises(ValueError, match="Invalid identifier"):
+        Identifier(name)
+
+
+def test_identifiers_are_bound_through_identifier_clause():
+    query, parameters = bind_parameters(
+        "SELECT COUNT(*) FROM :table JOIN IDENTIFIER(:other) WHERE raw:year = :year",
+        {"table": Identifier("a.b"), "other": Identifier("c"), "year": 2008},
+    )
+
+    assert query == (
+        "SELECT COUNT(*) FROM IDENTIFIER(:table) JOIN IDENTIFIER(:other) "
+        "WHERE raw:year = :year"
+    )
+    assert [entry["name"] for entry in parameters] == ["table", "other", "year"]
+
+
+def test_binding_without_parameters_leaves_the_query_alone():
+    assert bind_parameters("SELECT :x", None) == ("SELECT :x", None)
+
+
+@pytest.mark.parametrize(
+    "parameters,message",
+    [
+        ({"year": 2008}, r"No value for parameter\(s\): month"),
+        ({"year": 2008, "month": 1, "bad-name": 1}, "Invalid parameter name"),
+    ],
+)
+def test_binding_errors(parameters, message):
+    with pytest.raises(ValueError, match=message):
+        bind_parameters("SELECT * FROM t WHERE y = :year AND m = :month", parameters)
+
+
+def test_parameters_key_follows_values_not_order():
+    key = parameters_key([api_parameter("a", 1), api_parameter("b", "x")])
+
+    assert key == parameters_key([api_parameter("b", "x"), api_parameter("a", 1)])
+    assert key != parameters_key([api_parameter("a", 2), api_parameter("b", "x")])
+    # The same text with another type is another value
+    assert key != parameters_key([api_parameter("a", 1.0), api_parameter("b", "x")])
+    assert parameters_key(None) == ""
+
+
+def test_cache_key_changes_with_a_bound_value(make_server, make_client, tmp_path):
+    client = make_client(make_server(), cache=tmp_path / "cache")
+    query = "SELECT * FROM t WHERE Year = :year"
+
+    def key(year):
+        _, parameters = bind_parameters(query, {"year": year})
+        return client._cache_key(query, "INLINE", None, parameters)
+
+    assert key(2008) == key(2008)
+    assert key(2008) != key(2009)
+    assert key(2008) != client._cache_key(query, "INLINE", None)
+
+
+def test_incremental_key_changes_with_a_bound_value(make_server, make_client, tmp_path):
+    server = make_server(rows=20)
+    store = IncrementalStore(tmp_path / "incremental")
+    client = make_client(server, incremental_store=store)
+    query = "SELECT * FROM t WHERE Year = :year"
+
+    def run(year):
+        return client.execute_incremental(query, "id", parameters={"year": year})
+
+    assert run(2008).attrs["incremental_from"] is None
+    # Another value is another stored result, refreshed in full
+    assert run(2009).attrs["incremental_from"] is None
+    assert len(list(store.directory.glob("*.feather"))) == 2
+    assert run(2008).attrs["incremental_from"] == "19"
+    assert server.stats["submit"] == 3
@@ -0,0 +1,160 @@
+# ABOUTME: Tests for execute_to_file(): single-file and partitioned output, reading back and atomic replacement
+# ABOUTME: Streams MockStatementServer results to Parquet, Feather and CSV in a temporary directory
+
+import pandas as pd
+import pytest
+
+from utils.result_files import ResultFile
+
+pa = pytest.importorskip("pyarrow")
+pc = pytest.importorskip("pyarrow.compute")
+pq = pytest.importorskip("pyarrow.parquet")
+
+QUERY = "SELECT * FROM t"
+
+
+@pytest.fixture
+def server(make_server):
+    return make_server(rows=300, chunk_size=100)
+
+
+@pytest.fixture
+def out(tmp_path):
+    """Output directory; tmp_path itself also holds the client's .env file."""
+    path = tmp_path / "out"
+    path.mkdir()
+    return path
+
+
+def _expected(client):
+    return client.execute_query(QUERY, disposition="EXTERNAL_LINKS")
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather", "csv"])
+def test_result_is_written_and_read_back(server, make_client, tmp_path, file_format):
+    client = make_client(server)
+    path = tmp_path / f"result.{file_format}"
+
+    handle = client.execute_to_file(QUERY, path, format=file_format)
+
+    assert (handle.path, handle.rows, handle.partition_by) == (path, 300, [])
+    assert handle.bytes == path.stat().st_size
+    pd.testing.assert_frame_equal(handle.to_pandas(), _expected(client))
+    assert handle.open(["id"]).column_names == ["id"]
+    assert handle.scan(filter=pc.field("id") < 10).count_rows() == 10
+
+
+def test_parquet_row_groups_follow_row_group_size(server, make_client, tmp_path):
+    client = make_client(server)
+
+    handle = client.execute_to_file(QUERY, tmp_path / "r.parquet", row_group_size=128)
+
+    metadata = pq.ParquetFile(handle.path).metadata
+    sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    assert sizes == [128, 128, 44]
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather", "csv"])
+def test_partitioned_output(server, make_client, tmp_path, file_format):
+    client = make_client(server)
+    path = tmp_path / "by_flag"
+
+    handle = client.execute_to_file(
+        QUERY, path, format=file_format, partition_by=["flag"]
+    )
+
+    files = sorted(str(f.relative_to(path)) for f in path.rglob("*") if f.is_file())
+    assert files == [
+        f"flag=__HIVE_DEFAULT_PARTITION__/part-0.{file_format}",
+        f"flag=false/part-0.{file_format}",
+        f"flag=true/part-0.{file_format}",
+    ]
+    assert handle.rows == 300
+    # Partitions are read back one directory at a time
+    expected = _expected(client).sort_values("id", ignore_index=True)
+    df = handle.to_pandas().sort_values("id", ignore_index=True)
+    pd.testing.assert_frame_equal(df[expected.columns], expected)
+    # Filters on the partition column only read the matching directory
+    assert handle.scan(filter=[("flag", "=", True)]).count_rows() == 149
+
+    # A fresh handle without the schema still reads the partitions
+    reopened = ResultFile(path, file_format, partition_by=["flag"])
+    assert reopened.scan(["id"]).count_rows() == 300
+
+
+def test_unknown_partition_column_is_rejected(server, make_client, out):
+    client = make_client(server)
+
+    with pytest.raises(ValueError, match="unknown column"):
+        client.execute_to_file(QUERY, out / "result", partition_by=["missing"])
+    assert list(out.iterdir()) == []
+
+
+def _failing_after_first_chunk(client):
+    """Make every chunk download after the first one fail."""
+    stream = client.execute_query_iter
+
+    def execute_query_iter(*args, **options):
+        batches = stream(*args, **options)
+        yield next(batches)
+        batches.close()
+        raise RuntimeError("chunk download failed")
+
+    client.execute_query_iter = execute_query_iter
+
+
+@pytest.mark.parametrize("partition_by", [None, ["flag"]])
+def test_failed_write_keeps_the_previous_result(server, make_client, out, partition_by):
+    client = make_client(server)
+    path = out / "result"
+    client.execute_to_file(
+        QUERY + " LIMIT 5", path, partition_by=partition_by, row_group_size=2
+    )
+    before = sorted(out.rglob("*"))
+
+    _failing_after_first_chunk(client)
+    with pytest.raises(RuntimeError, match="chunk download failed"):
+        client.execute_to_file(
+            QUERY, path, partition_by=partition_by, row_group_size=2, overwrite=True
+        )
+
+    # No staging leftovers, and the old result is untouched
+    assert sorted(out.rglob("*")) == before
+    assert ResultFile(path, partition_by=partition_by).scan().count_rows() == 5
+
+
+def test_failed_first_write_leaves_nothing(server, make_client, out):
+    client = make_client(server)
+    _failing_after_first_chunk(client)
+
+    with pytest.raises(RuntimeError):
+        client.execute_to_file(QUERY, out / "result.parquet", row_group_size=2)
+
+    assert list(out.iterdir()) == []
+
+
+def test_existing_file_needs_overwrite(server, make_client, tmp_path):
+    client = make_client(server)
+    path = tmp_path / "result.parquet"
+    path.write_bytes(b"old")
+
+    with pytest.raises(FileExistsError, match="overwrite=True"):
+        client.execute_to_file(QUERY, path)
+    assert path.read_bytes() == b"old"
+    assert server.stats["submit"] == 0
+
+    handle = client.execute_to_file(QUERY + " LIMIT 7", path, overwrite=True)
+    assert handle.open().num_rows == 7
+
+
+def test_empty_result_keeps_its_columns(server, make_client, tmp_path):
+    client = make_client(server)
+
+    handle = client.execute_to_file(QUERY + " LIMIT 0", tmp_path / "empty.parquet")
+
+    assert handle.rows == 0
+    assert handle.open().column_names == ["id", "name", "value", "flag", "created"]
+    assert (
+        server.statements[-1]
+        == f"SELECT * FROM (\n{QUERY} LIMIT 0\n) AS _schema LIMIT 0"
+    )
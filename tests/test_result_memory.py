@@ -0,0 +1,105 @@
+# ABOUTME: Tests for memory-optimized results: lossless numeric downcasts and categorical strings
+# ABOUTME: Checks downcast() on each dtype family and memory_mode="compact" end to end against the mock server
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.result_memory import MemoryPlan, downcast
+
+pa = pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize(
+    "values,dtype,expected",
+    [
+        ([0, 127, -128], "int64", "int8"),
+        ([0, 128], "int64", "int16"),
+        ([-32769, 0], "int64", "int32"),
+        ([0, 2**31], "int64", None),
+        ([1, 2], "int8", None),
+        ([1, None, 300], "Int64", "Int16"),
+        ([1, None, 2**40], "Int64", None),
+        ([1, None, 100], "int64[pyarrow]", "int8[pyarrow]"),
+        ([0.5, 1.25, np.nan], "float64", "float32"),
+        ([2.0**-149, -(2.0**127)], "float64", "float32"),
+        # Lossy: 0.1 and 1e39 don't survive a float32 round trip
+        ([0.5, 0.1], "float64", None),
+        ([1.0, 1e39], "float64", None),
+        ([16_777_217.0], "float64", None),
+        ([0.5, None], "Float64", "Float32"),
+        ([0.1, None], "Float64", None),
+        ([0.75, None], "double[pyarrow]", "float[pyarrow]"),
+        ([0.1], "double[pyarrow]", None),
+        ([0.5], "float32", None),
+        ([True, False], "bool", None),
+        (["a", "b"], "category", None),
+        ([None, None], "Int64", None),
+    ],
+)
+def test_downcast_only_when_lossless(values, dtype, expected):
+    series = pd.Series(values, dtype=dtype)
+
+    target = downcast(series)
+
+    assert (None if target is None else str(target)) == expected
+    if target is not None:
+        narrow = series.astype(target)
+        pd.testing.assert_series_equal(narrow.astype(dtype), series)
+
+
+def test_unsigned_and_decimal_columns_are_left_alone():
+    assert downcast(pd.Series([1, 2], dtype="uint64")) is None
+    decimals = pd.Series(
+        pd.array(["1.50", None], dtype=pd.ArrowDtype(pa.decimal128(10, 2)))
+    )
+    assert downcast(decimals) is None
+
+
+def test_plan_reports_conversions_and_savings():
+    df = pd.DataFrame(
+        {
+            "id": pd.Series(range(1000), dtype="int64"),
+            "ratio": np.arange(1000) / 3,
+            "origin": ["ORD", "ATL"] * 500,
+        }
+    )
+
+    result = MemoryPlan("compact").apply(df)
+
+    memory = result.attrs["memory"]
+    assert memory["converted"] == {"id": "int64 -> int16", "origin": "str -> category"}
+    assert memory["after"] < memory["before"]
+    # Thirds aren't representable in float32, so the column stays float64
+    assert result["ratio"].dtype == "float64"
+
+
+def test_overrides_win_over_the_automatic_choice():
+    df = pd.DataFrame({"id": [1, 2, 3], "code": ["a", "b", "c"]})
+
+    result = MemoryPlan("compact", {"id": None, "code": "category"}).apply(df)
+
+    assert result["id"].dtype == "int64"
+    assert isinstance(result["code"].dtype, pd.CategoricalDtype)
+    with pytest.raises(ValueError, match="Can't convert column 'code'"):
+        MemoryPlan(column_dtypes={"code": "int8"}).apply(df)
+    with pytest.raises(ValueError, match="unknown column"):
+        MemoryPlan(column_dtypes={"missing": "int8"}).apply(df)
+
+
+@pytest.mark.parametrize("disposition", ["INLINE", "EXTERNAL_LINKS"])
+def test_compact_results_keep_every_value(make_server, make_client, disposition):
+    server = make_server(rows=300, chunk_size=100)
+    client = make_client(server)
+    query = "SELECT * FROM t"
+
+    exact = client.execute_query(query, disposition=disposition)
+    compact = client.execute_query(
+        query, disposition=disposition, memory_mode="compact"
+    )
+
+    assert set(compact.attrs["memory"]["converted"]) == {"id", "value"}
+    assert compact["id"].dtype.itemsize == 2
+    assert compact["value"].dtype.itemsize == 4
+    # NULLs included, every value converts back unchanged
+    pd.testing.assert_frame_equal(compact.astype(exact.dtypes.to_dict()), exact)
@@ -0,0 +1,63 @@
+# ABOUTME: Tests for SQL normalization and fingerprinting
+# ABOUTME: Cosmetic edits must share a fingerprint; names differing in case must not
+
+import pytest
+
+from utils.sql_fingerprint import fingerprint_sql, normalize_sql, parameterize_sql
+
+
+def test_cosmetic_edits_share_a_fingerprint():
+    a = "select count(*) as n  -- rows\nfrom flights where year = 2008;"
+    b = "SELECT COUNT(*) AS n\n  FROM flights /* all */ WHERE year = 2008"
+    assert normalize_sql(a) == "SELECT COUNT(*) AS n FROM flights WHERE year = 2008"
+    assert fingerprint_sql(a) == fingerprint_sql(b)
+
+
+def test_keywords_in_keyword_position_are_upper_cased():
+    query = "select * from t where a between 1 and 2 order by a desc nulls first"
+    assert normalize_sql(query) == (
+        "SELECT * FROM t WHERE a BETWEEN 1 AND 2 ORDER BY a DESC NULLS FIRST"
+    )
+
+
+@pytest.mark.parametrize(
+    "lower, upper",
+    [
+        ("SELECT first FROM t", "SELECT FIRST FROM t"),
+        ("SELECT id, last FROM t", "SELECT id, LAST FROM t"),
+        ("SELECT a AS first FROM t", "SELECT a AS FIRST FROM t"),
+        ("SELECT a first, b FROM t", "SELECT a FIRST, b FROM t"),
+        ("SELECT t.first FROM t", "SELECT t.FIRST FROM t"),
+        ("SELECT (SELECT max(v) FROM u) last", "SELECT (SELECT max(v) FROM u) LAST"),
+        ("SELECT n FROM t WHERE first = 1", "SELECT n FROM t WHERE FIRST = 1"),
+        ("SELECT a AS cnt FROM t", "SELECT a AS CNT FROM t"),
+    ],
+)
+def test_names_differing_in_case_do_not_collide(lower, upper):
+    # Databricks reports result columns with the case they were written in
+    assert normalize_sql(lower) != normalize_sql(upper)
+    assert fingerprint_sql(lower) != fingerprint_sql(upper)
+
+
+def test_case_expression_end_is_a_keyword():
+    query = "select case when x then 1 else 0 end as flag from t"
+    assert normalize_sql(query) == (
+        "SELECT CASE WHEN x THEN 1 ELSE 0 END AS flag FROM t"
+    )
+
+
+def test_function_names_are_upper_cased():
+    assert normalize_sql("select first(x), max(y) from t") == (
+        "SELECT FIRST(x), MAX(y) FROM t"
+    )
+
+
+def test_parameterize_lifts_literals_in_order():
+    query = "SELECT * FROM t WHERE Year = 2008 AND Carrier = 'AA'"
+    assert parameterize_sql(query) == (
+        "SELECT * FROM t WHERE Year = ? AND Carrier = ?",
+        ["2008", "'AA'"],
+    )
+    assert fingerprint_sql(query, lift_literals=True) == fingerprint_sql(
+        "select * from t where Year = 1999 and Carrier = 'UA'", lift_literals=True
+    )
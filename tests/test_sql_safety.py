@@ -0,0 +1,101 @@
+# ABOUTME: Table-driven tests for the read-only SQL classifier in utils/sql_safety.py
+# ABOUTME: Covers keywords hidden in literals and comments, data-modifying statements and the short path
+
+import pytest
+
+from utils import sql_safety
+from utils.sql_safety import check_sql_safety, classify
+
+# Queries that mention data-modifying keywords only where they do no harm
+SAFE = [
+    ("SELECT * FROM t WHERE note = 'drop table t'", "SELECT"),
+    ("SELECT * FROM t WHERE note = 'x; DELETE FROM t'", "SELECT"),
+    ('SELECT "insert into t" AS label', "SELECT"),
+    ("SELECT `delete from` FROM t", "SELECT"),
+    ("SELECT `update` FROM t WHERE `set` = 1", "SELECT"),
+    ("SELECT 1 -- DROP TABLE t", "SELECT"),
+    ("SELECT 1 /* ; MERGE INTO t USING s */ FROM t", "SELECT"),
+    ("SELECT 1 FROM t;", "SELECT"),
+    ("SELECT 1 FROM t; ;", "SELECT"),
+    ("WITH x AS (SELECT 1 AS a) SELECT a FROM x", "WITH"),
+    ("SELECT updated_at, deleted FROM t WHERE created > '2024-01-01'", "SELECT"),
+    ("SHOW TABLES IN main.default", "SHOW"),
+    ("SHOW CREATE TABLE main.default.flights", "SHOW"),
+    ("DESCRIBE TABLE main.default.flights", "DESCRIBE"),
+    ("DESC flights", "DESCRIBE"),
+    ("-- leading comment\n  SELECT 1", "SELECT"),
+    ("/* header */ select 1", "SELECT"),
+]
+
+# Queries that must be rejected, with the reason they are rejected for
+UNSAFE = [
+    ("INSERT INTO t VALUES (1)", "Only SELECT"),
+    ("DELETE FROM t WHERE id = 1", "Only SELECT"),
+    ("MERGE INTO t USING s ON t.id = s.id WHEN MATCHED THEN DELETE", "Only SELECT"),
+    ("DROP TABLE t", "Only SELECT"),
+    ("UPDATE t SET a = 1", "Only SELECT"),
+    ("TRUNCATE TABLE t", "Only SELECT"),
+    ("WITH s AS (SELECT 1 AS id) INSERT INTO t SELECT * FROM s", "INSERT INTO"),
+    ("WITH s AS (SELECT 1) INSERT OVERWRITE t SELECT * FROM s", "INSERT OVERWRITE"),
+    ("WITH s AS (SELECT 1 AS id) MERGE INTO t USING s ON t.id = s.id", "MERGE INTO"),
+    ("WITH s AS (SELECT 1) MERGE WITH SCHEMA EVOLUTION INTO t USING s", "MERGE INTO"),
+    ("SELECT 1; DROP TABLE t", "DROP TABLE"),
+    ("SELECT 1; SELECT 2", "single statement"),
+    ("SELECT 1 FROM t; DELETE FROM t", "DELETE FROM"),
+    ("SELECT 1; UPDATE main.default.t SET a = 1", "UPDATE MAIN . DEFAULT . T SET"),
+    ("-- just a comment\nDROP TABLE t", "Only SELECT"),
+    ("/* a */  \n\t DELETE FROM t", "Only SELECT"),
+    ("SHOW GRANTS ON TABLE t", "SHOW commands"),
+    ("SHOW CREATE VIEW v", "SHOW commands"),
+    ("SHOW", "SHOW commands"),
+    ("", "Only SELECT"),
+]
+
+
+@pytest.mark.parametrize("query,statement_type", SAFE)
+def test_read_only_queries_pass(query, statement_type):
+    assert classify(query) == (statement_type, True, None)
+    check_sql_safety(query)
+
+
+@pytest.mark.parametrize("query,reason", UNSAFE)
+def test_data_modifying_queries_are_rejected(query, reason):
+    verdict = classify(query)
+    assert not verdict.is_safe
+    assert reason in verdict.reason
+    with pytest.raises(ValueError, match=reason.split()[0]):
+        check_sql_safety(query)
+
+
+@pytest.mark.parametrize(
+    "query,statement_type",
+    [
+        ("DROP TABLE t", "DROP"),
+        ("`weird` SELECT", "UNKNOWN"),
+        ("(SELECT 1)", "UNKNOWN"),
+    ],
+)
+def test_rejected_statement_type_is_the_first_word(query, statement_type):
+    assert classify(query).statement_type == statement_type
+
+
+def test_short_path_reads_only_the_first_tokens(monkeypatch):
+    lexed = []
+    leading_tokens = sql_safety._leading_tokens
+
+    def spy(upper, count):
+        tokens = leading_tokens(upper, count)
+        lexed.append(tokens)
+        return tokens
+
+    monkeypatch.setattr(sql_safety, "_leading_tokens", spy)
+    columns = ", ".join(f"c{i}" for i in range(500))
+    classify.cache_clear()
+
+    assert classify(f"SELECT {columns} FROM t").is_safe
+    assert lexed == [["SELECT", "C0", ","]]
+
+    # A forbidden keyword anywhere, however late, forces a full scan
+    late = classify(f"SELECT {columns} FROM t; DELETE FROM t")
+    assert late == ("SELECT", False, "Dangerous SQL pattern detected: DELETE FROM")
+    assert len(lexed) == 1
@@ -0,0 +1,179 @@
+# ABOUTME: Tests for the one-scan table profiler: the generated aggregation SQL and column batching
+# ABOUTME: Uses a recording client that answers profile queries with canned one-row results
+
+import re
+
+import pandas as pd
+import pytest
+
+from utils.metadata_cache import ColumnInfo
+from utils.table_profile import build_profile_query, profile_table, read_schema
+
+SCHEMA = [
+    ("id", "bigint"),
+    ("name", "string"),
+    ("tags", "array<string>"),
+    ("amount", "decimal(10,2)"),
+    ("odd`name", "int"),
+]
+
+
+class _ProfileClient:
+    """
+    Records profile queries and answers each with one canned row.
+
+    Every statistic column gets a plausible value: 10 rows, 8 non-NULL,
+    quantiles as JSON text and one top value, like a JSON_ARRAY result.
+    """
+
+    def __init__(self, schema=SCHEMA):
+        self.schema = schema
+        self.metadata_cache = self
+        self.single = []
+        self.batches = []
+
+    def get_columns(self, client, table):
+        return [
+            ColumnInfo("main", "default", "t", name, i, data_type, True, None)
+            for i, (name, data_type) in enumerate(self.schema)
+        ]
+
+    def execute_query(self, query, query_name="Query", timeout=None, **options):
+        self.single.append((query_name, query))
+        return self._answer(query)
+
+    def execute_many(self, queries, timeout=None, **options):
+        self.batches.append(dict(queries))
+        return {name: self._answer(query) for name, query in queries.items()}, {}
+
+    @staticmethod
+    def _answer(query):
+        row = {}
+        for alias in re.findall(r" AS (\w+)", query):
+            if alias == "row_count":
+                row[alias] = 10
+            elif alias.endswith("_non_null"):
+                row[alias] = 8
+            elif alias.endswith("_quantiles"):
+                row[alias] = "[1.0, 2.0, 3.0]"
+            elif alias.endswith("_top_k"):
+                row[alias] = '[{"item": "a", "count": 3}]'
+            else:
+                row[alias] = 1
+        return pd.DataFrame([row])
+
+
+def test_profile_query_covers_each_column_by_type():
+    sql = build_profile_query("main.default.t", SCHEMA[:4], top_k=3, quantiles=(0.5,))
+
+    assert sql.splitlines() == [
+        "SELECT",
+        "    COUNT(*) AS row_count,",
+        "    COUNT(`id`) AS c0_non_null,",
+        "    approx_count_distinct(`id`) AS c0_distinct,",
+        "    MIN(`id`) AS c0_min,",
+        "    MAX(`id`) AS c0_max,",
+        "    approx_top_k(CAST(`id` AS STRING), 3) AS c0_top_k,",
+        "    AVG(`id`) AS c0_mean,",
+        "    STDDEV(`id`) AS c0_stddev,",
+        "    percentile_approx(`id`, array(0.5)) AS c0_quantiles,",
+        "    COUNT(`name`) AS c1_non_null,",
+        "    approx_count_distinct(`name`) AS c1_distinct,",
+        "    MIN(`name`) AS c1_min,",
+        "    MAX(`name`) AS c1_max,",
+        "    approx_top_k(CAST(`name` AS STRING), 3) AS c1_top_k,",
+        "    COUNT(`tags`) AS c2_non_null,",
+        "    COUNT(`amount`) AS c3_non_null,",
+        "    approx_count_distinct(`amount`) AS c3_distinct,",
+        "    MIN(`amount`) AS c3_min,",
+        "    MAX(`amount`) AS c3_max,",
+        "    approx_top_k(CAST(`amount` AS STRING), 3) AS c3_top_k,",
+        "    AVG(`amount`) AS c3_mean,",
+        "    STDDEV(`amount`) AS c3_stddev,",
+        "    percentile_approx(`amount`, array(0.5)) AS c3_quantiles",
+        "FROM main.default.t",
+    ]
+
+
+def test_profile_query_can_skip_top_values_and_quantiles():
+    sql = build_profile_query("t", [("odd`name", "int")], top_k=0, quantiles=())
+
+    assert "COUNT(`odd``name`) AS c0_non_null" in sql
+    assert "approx_top_k" not in sql
+    assert "percentile_approx" not in sql
+
+
+def test_read_schema_uses_the_metadata_cache():
+    assert read_schema(_ProfileClient(), "t") == SCHEMA
+
+
+def test_single_batch_runs_one_query():
+    client = _ProfileClient()
+
+    profile = profile_table(client, "main.default.t", quantiles=(0.25, 0.999))
+
+    assert [name for name, _ in client.single] == ["Profile main.default.t [1-5]"]
+    assert client.batches == []
+    assert profile["column"].tolist() == [name for name, _ in SCHEMA]
+    assert profile["nulls"].tolist() == [2] * 5
+    assert profile["null_pct"].tolist() == [20.0] * 5
+    assert profile.attrs["quantile_columns"] == ["p25", "p99.9"]
+    assert profile.loc[0, ["p25", "p99.9"]].tolist() == [1.0, 2.0]
+    assert profile.loc[1, "top_values"] == [("a", 3)]
+    # Complex columns only get their non-NULL count
+    assert pd.isna(profile.loc[2, "min"]) and profile.loc[2, "top_values"] is None
+
+
+def test_wide_tables_are_split_into_concurrent_batches():
+    client = _ProfileClient()
+
+    profile = profile_table(client, "t", max_columns_per_query=2)
+
+    assert client.single == []
+    [queries] = client.batches
+    assert list(queries) == [
+        "Profile t [1-2]",
+        "Profile t [3-4]",
+        "Profile t [5-5]",
+    ]
+    assert "`id`" in queries["Profile t [1-2]"]
+    assert "`name`" in queries["Profile t [1-2]"]
+    assert "`tags`" in queries["Profile t [3-4]"]
+    assert "`amount`" in queries["Profile t [3-4]"]
+    assert "`odd``name`" in queries["Profile t [5-5]"]
+    # Each batch numbers its columns from c0; positions are table-wide
+    assert all("c2_" not in query for query in queries.values())
+    assert profile["position"].tolist() == [0, 1, 2, 3, 4]
+    assert profile["column"].tolist() == [name for name, _ in SCHEMA]
+
+
+def test_selected_columns_keep_the_requested_order():
+    client = _ProfileClient()
+
+    profile = profile_table(client, "t", columns=["amount", "id"])
+
+    assert profile["column"].tolist() == ["amount", "id"]
+    assert profile["data_type"].tolist() == ["decimal(10,2)", "bigint"]
+
+
+def test_failed_batch_is_raised():
+    class FailingClient(_ProfileClient):
+        def execute_many(self, queries, timeout=None, **options):
+            return {}, {"Profile t [3-4]": RuntimeError("warehouse stopped")}
+
+    with pytest.raises(RuntimeError, match=r"Profile t \[3-4\] failed"):
+        profile_table(FailingClient(), "t", max_columns_per_query=2)
+
+
+@pytest.mark.parametrize(
+    "table,options,message",
+    [
+        ("t; DROP TABLE x", {}, "Invalid table name"),
+        ("a.b.c.d", {}, "Invalid table name"),
+        ("t", {"columns": ["id", "missing"]}, "no column"),
+        ("t", {"max_columns_per_query": 0}, "at least 1"),
+    ],
+)
+def test_invalid_arguments_are_rejected(table, options, message):
+    with pytest.raises(ValueError, match=message):
+        profile_table(_ProfileClient(), table, **options)
@@ -1,2 +1,52 @@
 # ABOUTME: Utils package for analysis
 # ABOUTME: Contains reusable utilities for data analysis tasks
+
+# Public names are resolved on first access (PEP 562), so `import utils` and
+# `from utils import classify` never load pandas, requests or aiohttp.
+_EXPORTS = {
+    "DatabricksQueryClient": "databricks_query",
+    "query_databricks": "databricks_query",
+    "test_databricks_connection": "databricks_query",
+    "get_client": "databricks_query",
+    "close_clients": "databricks_query",
+    "invalidate_config_cache": "databricks_query",
+    "AsyncDatabricksQueryClient": "async_databricks_query",
+    "QueryResultCache": "query_cache",
+    "QueryMetrics": "query_metrics",
+    "MetricsRegistry": "query_metrics",
+    "RetryPolicy": "retry_policy",
+    "CircuitBreaker": "retry_policy",
+    "CircuitOpenError": "retry_policy",
+    "classify": "sql_safety",
+    "check_sql_safety": "sql_safety",
+    "fingerprint_sql": "sql_fingerprint",
+    "normalize_sql": "sql_fingerprint",
+    "parameterize_sql": "sql_fingerprint",
+    "profile_table": "table_profile",
+    "plan_approximate": "approximate",
+    "add_confidence_intervals": "approximate",
+    "LocalReplica": "local_replica",
+    "MetadataCache": "metadata_cache",
+    "IncrementalStore": "incremental",
+    "Identifier": "query_parameters",
+    "TypedValue": "query_parameters",
+    "MemoryPlan": "result_memory",
+    "ResultFile": "result_files",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
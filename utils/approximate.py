@@ -0,0 +1,449 @@
+# ABOUTME: Approximate execution of aggregate queries over a TABLESAMPLE with error bounds
+# ABOUTME: Rewrites eligible queries, scales counts and sums, and adds confidence intervals
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    from .sql_fingerprint import tokenize_sql
+except ImportError:  # utils/ itself is on sys.path (the temp_code scripts)
+    from sql_fingerprint import tokenize_sql
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Aggregates whose sample value is divided by the sampling rate
+SCALED_AGGREGATES = frozenset({"COUNT", "SUM", "COUNT_IF"})
+
+# Aggregates that estimate the population value as they are
+UNSCALED_AGGREGATES = frozenset(
+    {
+        "AVG",
+        "MEAN",
+        "STDDEV",
+        "STDDEV_SAMP",
+        "STDDEV_POP",
+        "VARIANCE",
+        "VAR_SAMP",
+        "VAR_POP",
+        "MEDIAN",
+        "PERCENTILE",
+        "PERCENTILE_APPROX",
+        "APPROX_PERCENTILE",
+        "PERCENTILE_CONT",
+        "PERCENTILE_DISC",
+    }
+)
+
+# Aggregates a sample says little about (extremes, distinct values, lists)
+UNSUPPORTED_AGGREGATES = frozenset(
+    {
+        "MIN",
+        "MAX",
+        "MIN_BY",
+        "MAX_BY",
+        "APPROX_COUNT_DISTINCT",
+        "APPROX_TOP_K",
+        "COLLECT_LIST",
+        "COLLECT_SET",
+        "ARRAY_AGG",
+        "FIRST",
+        "FIRST_VALUE",
+        "LAST",
+        "LAST_VALUE",
+        "ANY_VALUE",
+        "BOOL_AND",
+        "BOOL_OR",
+        "EVERY",
+        "STRING_AGG",
+        "LISTAGG",
+    }
+)
+
+# Aggregates that get a confidence interval when they are a whole column
+_INTERVAL_AGGREGATES = frozenset({"COUNT", "COUNT_IF", "SUM", "AVG", "MEAN"})
+
+# Words after the sampled table that mean more than one relation
+_MULTI_RELATION = frozenset(
+    {
+        "JOIN",
+        "INNER",
+        "LEFT",
+        "RIGHT",
+        "FULL",
+        "CROSS",
+        "NATURAL",
+        "LATERAL",
+        "PIVOT",
+        "UNPIVOT",
+        "TABLESAMPLE",
+        "VERSION",
+        "TIMESTAMP",
+    }
+)
+_SET_OPERATIONS = frozenset({"UNION", "INTERSECT", "EXCEPT", "MINUS"})
+_SKIPPED = ("line_comment", "block_comment", "whitespace")
+
+# Prefix of the helper columns added for confidence intervals
+_HELPER_PREFIX = "__approx_"
+
+# Smallest sample written into TABLESAMPLE, in percent (six decimals)
+MIN_SAMPLE_PERCENT = 0.000001
+
+
+class Estimate(NamedTuple):
+    """
+    A result column that gets a confidence interval.
+
+    Attributes:
+        column: Result column name (the alias)
+        aggregate: COUNT, COUNT_IF, SUM, AVG or MEAN
+        helpers: Helper columns the interval is computed from
+    """
+
+    column: str
+    aggregate: str
+    helpers: Tuple[str, ...]
+
+
+class ApproximatePlan(NamedTuple):
+    """
+    A query rewritten to run over a sample.
+
+    Attributes:
+        sql: The query to execute (the original one for 100 percent)
+        table: The sampled table
+        percent: Sample size in percent of the table's rows
+        seed: REPEATABLE seed, so reruns see the same sample
+        estimates: Columns that get confidence intervals
+    """
+
+    sql: str
+    table: str
+    percent: float
+    seed: int
+    estimates: Tuple[Estimate, ...]
+
+
+class _Call(NamedTuple):
+    """An aggregate call; positions index the significant tokens."""
+
+    name: str
+    start: int  # the function name
+    close: int  # its closing paren
+    end: int  # the last token, including a FILTER (...) clause
+    window: bool
+
+
+class _Analysis(NamedTuple):
+    tokens: Tuple[Tuple[str, str], ...]
+    sig: Tuple[int, ...]  # token indices of everything but whitespace/comments
+    table: str
+    table_end: int  # significant position of the table name's last part
+    select_end: int  # significant position of the SELECT list's last token
+    calls: Tuple[_Call, ...]
+    items: Tuple[Tuple[str, _Call], ...]  # (alias, call) of whole-column aggregates
+
+
+def _not_eligible(reason: str) -> ValueError:
+    return ValueError(f"Query is not eligible for approximate mode: {reason}")
+
+
+@lru_cache(maxsize=256)
+def _analyze(query: str) -> _Analysis:
+    """Check that a query can run over a sample and locate what to rewrite."""
+    tokens = tuple(tuple(token) for token in tokenize_sql(query.strip().rstrip(";")))
+    sig = tuple(i for i, (kind, _) in enumerate(tokens) if kind not in _SKIPPED)
+    words = [
+        tokens[i][1].upper() if tokens[i][0] == "word" else tokens[i][1] for i in sig
+    ]
+    if not words or words[0] != "SELECT":
+        raise _not_eligible("only plain SELECT statements can be sampled")
+
+    depth = 0
+    close = {}  # position in sig of "(" -> position of its ")"
+    opened = []
+    from_at = None
+    for pos, word in enumerate(words):
+        if word == "(":
+            opened.append(pos)
+            depth += 1
+        elif word == ")":
+            if opened:
+                close[opened.pop()] = pos
+            depth -= 1
+        elif word == "SELECT" and pos:
+            raise _not_eligible("subqueries are not supported")
+        elif depth == 0 and word in _SET_OPERATIONS:
+            raise _not_eligible(f"{word} is not supported")
+        elif depth == 0 and word == "FROM":
+            if from_at is not None:
+                raise _not_eligible("only one FROM clause is supported")
+            from_at = pos
+    if from_at is None:
+        raise _not_eligible("there is no table to sample")
+
+    # The single sampled relation: a (qualified) table name
+    pos = from_at + 1
+    parts = []
+    while pos < len(words) and tokens[sig[pos]][0] in ("word", "quoted_ident"):
+        parts.append(tokens[sig[pos]][1])
+        if pos + 1 < len(words) and words[pos + 1] == ".":
+            pos += 2
+            continue
+        break
+    if not parts:
+        raise _not_eligible("FROM must name a table")
+    table_end = pos
+    rest = words[pos + 1 : pos + 3]
+    if rest[:1] in (["("], [","]) or any(word in _MULTI_RELATION for word in rest):
+        raise _not_eligible("only a single table can be sampled (no joins)")
+
+    calls = []
+    for pos in range(len(words) - 1):
+        name = words[pos]
+        if tokens[sig[pos]][0] != "word" or words[pos + 1] != "(":
+            continue
+        if name in UNSUPPORTED_AGGREGATES:
+            raise _not_eligible(f"{name} can't be estimated from a sample")
+        if name not in SCALED_AGGREGATES and name not in UNSCALED_AGGREGATES:
+            continue
+        end = call_close = close[pos + 1]
+        if name in SCALED_AGGREGATES and words[pos + 2 : pos + 3] == ["DISTINCT"]:
+            raise _not_eligible(f"{name}(DISTINCT ...) can't be scaled")
+        if words[end + 1 : end + 3] == ["FILTER", "("]:
+            end = close[end + 2]
+        window = words[end + 1 : end + 2] == ["OVER"]
+        calls.append(_Call(name, pos, call_close, end, window))
+    if not any(not call.window for call in calls):
+        raise _not_eligible("it has no aggregate to estimate")
+
+    # Whole-column aggregates in the SELECT list get confidence intervals
+    items = []
+    start = 1
+    if words[1] in ("DISTINCT", "ALL"):
+        start = 2
+    depth = 0
+    item_start = start
+    for pos in range(start, from_at + 1):
+        word = words[pos]
+        if word == "(":
+            depth += 1
+        elif word == ")":
+            depth -= 1
+        elif depth == 0 and word in (",", "FROM"):
+            item = _interval_item(tokens, sig, words, item_start, pos, calls)
+            if item is not None:
+                items.append(item)
+            item_start = pos + 1
+
+    return _Analysis(
+        tokens=tokens,
+        sig=sig,
+        table=".".join(parts),
+        table_end=table_end,
+        select_end=from_at - 1,
+        calls=tuple(calls),
+        items=tuple(items),
+    )
+
+
+def _interval_item(
+    tokens: Tuple[Tuple[str, str], ...],
+    sig: Tuple[int, ...],
+    words: List[str],
+    start: int,
+    stop: int,
+    calls: List[_Call],
+) -> Optional[Tuple[str, _Call]]:
+    """(alias, call) if words[start:stop] is an aliased single aggregate."""
+    if stop - start < 2:
+        return None
+    alias_kind, alias = tokens[sig[stop - 1]]
+    if alias_kind not in ("word", "quoted_ident"):
+        return None
+    expression_end = stop - 2 if words[stop - 2] == "AS" else stop - 1
+    if alias_kind == "quoted_ident":
+        alias = alias[1:-1].replace("``", "`")
+    for call in calls:
+        if (
+            call.start == start
+            and call.end == expression_end - 1
+            and not call.window
+            and call.name in _INTERVAL_AGGREGATES
+        ):
+            return alias, call
+    return None
+
+
+def sample_percent_literal(percent: float) -> str:
+    """
+    Write a sample percentage for ``TABLESAMPLE (<percent> PERCENT)``.
+
+    Spark's grammar has no exponent form (``1e-05``), so the value is
+    written in fixed point with at most six decimals, and raised to
+    MIN_SAMPLE_PERCENT if it would round to zero.
+    """
+    return f"{max(percent, MIN_SAMPLE_PERCENT):.6f}".rstrip("0").rstrip(".")
+
+
+def sampled_table(query: str) -> str:
+    """
+    Return the table an eligible query would sample.
+
+    Raises:
+        ValueError: If the query is not eligible for approximate mode
+    """
+    return _analyze(query).table
+
+
+def plan_approximate(query: str, percent: float, seed: int = 42) -> ApproximatePlan:
+    """
+    Rewrite an aggregate query to run over a sample of its table.
+
+    Eligible queries are a single SELECT over one table (no joins,
+    subqueries or set operations) with at least one aggregate, and no
+    aggregate a sample cannot estimate (MIN, MAX, COUNT(DISTINCT ...) and
+    the like). The rewrite
+
+    - adds ``TABLESAMPLE (<percent> PERCENT) REPEATABLE (<seed>)`` after the
+      table name
+    - multiplies every COUNT, COUNT_IF and SUM by ``100 / percent``, so
+      ratios between them (percentages, averages) are unaffected; window
+      aggregates over them (``SUM(COUNT(*)) OVER ()``) are left alone
+    - adds helper columns for confidence intervals of aliased COUNT,
+      COUNT_IF, SUM and AVG columns
+
+    With ``percent >= 100`` the original query is returned unchanged.
+    Smaller percentages are rounded as written into the SQL (see
+    sample_percent_literal()), and the scaling uses the rounded value.
+
+    Raises:
+        ValueError: If the query is not eligible or percent is not positive
+    """
+    if percent <= 0:
+        raise ValueError("percent must be positive")
+    analysis = _analyze(query)
+    if percent < 100:
+        percent = float(sample_percent_literal(percent))
+
+    estimates = []
+    helpers: List[str] = []
+    for number, (alias, call) in enumerate(analysis.items):
+        names: Tuple[str, ...] = ()
+        if percent < 100 and call.name in ("SUM", "AVG", "MEAN"):
+            argument, filter_clause = _call_parts(analysis, call)
+            prefix = f"{_HELPER_PREFIX}{number}"
+            if call.name == "SUM":
+                names = (f"{prefix}_sumsq",)
+                helpers.append(
+                    f"SUM(POWER(CAST({argument} AS DOUBLE), 2)){filter_clause}"
+                    f" AS {names[0]}"
+                )
+            else:
+                names = (f"{prefix}_sd", f"{prefix}_n")
+                helpers.append(f"STDDEV_SAMP({argument}){filter_clause} AS {names[0]}")
+                helpers.append(f"COUNT({argument}){filter_clause} AS {names[1]}")
+        estimates.append(Estimate(alias, call.name, names))
+
+    if percent >= 100:
+        sql = query
+    else:
+        sql = _render(analysis, percent, seed, helpers)
+    return ApproximatePlan(sql, analysis.table, float(percent), seed, tuple(estimates))
+
+
+def _call_parts(analysis: _Analysis, call: _Call) -> Tuple[str, str]:
+    """Argument text and FILTER clause text (with leading space) of a call."""
+
+    def text(first: int, last: int) -> str:
+        return "".join(text for _, text in analysis.tokens[first : last + 1])
+
+    sig = analysis.sig
+    argument = text(sig[call.start + 1] + 1, sig[call.close] - 1)
+    filter_clause = text(sig[call.close] + 1, sig[call.end])
+    return argument, filter_clause
+
+
+def _render(analysis: _Analysis, percent: float, seed: int, helpers: List[str]) -> str:
+    factor = f"{100 / percent!r}D"
+    # Text inserted before / after tokens, by token index
+    before: Dict[int, str] = {}
+    after: Dict[int, str] = {}
+    sig = analysis.sig
+    for call in analysis.calls:
+        if call.name in SCALED_AGGREGATES and not call.window:
+            before[sig[call.start]] = before.get(sig[call.start], "") + "("
+            after[sig[call.end]] = f" * {factor})" + after.get(sig[call.end], "")
+    table_end = sig[analysis.table_end]
+    after[table_end] = (
+        after.get(table_end, "")
+        + f" TABLESAMPLE ({sample_percent_literal(percent)} PERCENT)"
+        + f" REPEATABLE ({int(seed)})"
+    )
+    if helpers:
+        select_end = sig[analysis.select_end]
+        after[select_end] = after.get(select_end, "") + "".join(
+            f", {helper}" for helper in helpers
+        )
+
+    parts = []
+    for index, (_, text) in enumerate(analysis.tokens):
+        parts.append(before.get(index, ""))
+        parts.append(text)
+        parts.append(after.get(index, ""))
+    return "".join(parts)
+
+
+def add_confidence_intervals(
+    df: pd.DataFrame, plan: ApproximatePlan, confidence: float = 0.95
+) -> pd.DataFrame:
+    """
+    Add ``<column>_ci_low`` / ``<column>_ci_high`` next to each estimate.
+
+    Intervals use the normal approximation for Bernoulli row sampling at
+    rate ``q = percent / 100``: ``n (1 - q) / q^2`` is the variance of a
+    scaled count of ``n`` sampled rows, ``(1 - q) sum(x^2) / q^2`` that of a
+    scaled sum, and ``(1 - q) s^2 / n`` that of an average. For an exact run
+    (100 percent) the interval collapses to the value. Helper columns are
+    dropped and the result is marked in ``df.attrs`` (``approximate``,
+    ``sample_percent``, ``seed``, ``confidence``, ``sampled_table``).
+    """
+    from statistics import NormalDist
+
+    import pandas as pd
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    rate = min(plan.percent / 100, 1.0)
+    for estimate in plan.estimates:
+        if estimate.column not in df.columns:
+            continue
+        value = pd.to_numeric(df[estimate.column], errors="coerce").astype("float64")
+        if rate >= 1:
+            error = value * 0.0
+        elif estimate.aggregate in ("COUNT", "COUNT_IF"):
+            error = (value * rate * (1 - rate)) ** 0.5 / rate
+        elif estimate.aggregate == "SUM":
+            sumsq = df[estimate.helpers[0]].astype("float64")
+            error = ((1 - rate) * sumsq) ** 0.5 / rate
+        else:
+            sd = df[estimate.helpers[0]].astype("float64")
+            n = df[estimate.helpers[1]].astype("float64")
+            error = sd * ((1 - rate) / n) ** 0.5
+
+        position = df.columns.get_loc(estimate.column) + 1
+        df.insert(position, f"{estimate.column}_ci_low", value - z * error)
+        df.insert(position + 1, f"{estimate.column}_ci_high", value + z * error)
+
+    helpers = [column for column in df.columns if column.startswith(_HELPER_PREFIX)]
+    df = df.drop(columns=helpers)
+    df.attrs.update(
+        approximate=rate < 1,
+        sample_percent=min(plan.percent, 100.0),
+        seed=plan.seed,
+        confidence=confidence,
+        sampled_table=plan.table,
+    )
+    return df
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# ABOUTME: Command-line entry point for the execute_query benchmarks in tests/test_benchmarks.py
+# ABOUTME: Runs them under pytest-benchmark and compares against, or records, the stored baseline
+
+"""
+Run the execute_query() benchmarks against MockStatementServer.
+
+The benchmarks live in tests/test_benchmarks.py and their baseline in
+tests/benchmark_baseline.json; this script only runs them with pytest. It
+exits with status 1 if a case is slower or needs more memory than the
+baseline allows. Any other arguments are passed on to pytest.
+
+Usage:
+    python utils/benchmark_query_client.py
+    python utils/benchmark_query_client.py --save
+    python utils/benchmark_query_client.py --tolerance 0.3 --benchmark-json out.json
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / "tests" / "test_benchmarks.py"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--save", action="store_true", help="Record the results as the new baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed relative regression before failing (default 0.5)",
+    )
+    args, pytest_args = parser.parse_known_args(argv)
+
+    import pytest
+
+    options = [
+        str(BENCHMARKS),
+        "-m",
+        "benchmark",
+        "--baseline-tolerance",
+        str(args.tolerance),
+    ]
+    if args.save:
+        options.append("--update-baseline")
+    return int(pytest.main(options + pytest_args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,328 @@
 # ABOUTME: REST-based Databricks SQL query utility with safety checks
 # ABOUTME: Reusable library for secure SQL execution returning pandas DataFrames
 
+from __future__ import annotations
+
+import atexit
 import os
-import re
-import requests
-import pandas as pd
-from pathlib import Path
-from dotenv import load_dotenv
-from typing import Optional, Union
+import threading
+import time
 import warnings
-import json
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from datetime import timedelta
+
+    import pandas as pd
+    import requests
+
+try:
+    from .approximate import add_confidence_intervals, plan_approximate, sampled_table
+    from .incremental import (
+        IncrementalStore,
+        incremental_query,
+        merge_incremental,
+        shift,
+        sql_literal,
+    )
+    from .local_replica import LocalReplica, ReplicaInfo
+    from .metadata_cache import ColumnInfo, MetadataCache
+    from .query_cache import QueryResultCache
+    from .query_metrics import QueryMetrics
+    from .query_parameters import bind_parameters, parameters_key
+    from .result_files import DEFAULT_ROW_GROUP_SIZE, ResultFile, write_result
+    from .result_memory import MemoryPlan
+    from .retry_policy import CircuitBreaker, RetryPolicy
+    from .sql_fingerprint import fingerprint_sql
+    from .sql_safety import check_sql_safety
+    from .table_profile import DEFAULT_QUANTILES, profile_table
+except ImportError:  # utils/ itself is on sys.path (the temp_code scripts)
+    from approximate import add_confidence_intervals, plan_approximate, sampled_table
+    from incremental import (
+        IncrementalStore,
+        incremental_query,
+        merge_incremental,
+        shift,
+        sql_literal,
+    )
+    from local_replica import LocalReplica, ReplicaInfo
+    from metadata_cache import ColumnInfo, MetadataCache
+    from query_cache import QueryResultCache
+    from query_metrics import QueryMetrics
+    from query_parameters import bind_parameters, parameters_key
+    from result_files import DEFAULT_ROW_GROUP_SIZE, ResultFile, write_result
+    from result_memory import MemoryPlan
+    from retry_policy import CircuitBreaker, RetryPolicy
+    from sql_fingerprint import fingerprint_sql
+    from sql_safety import check_sql_safety
+    from table_profile import DEFAULT_QUANTILES, profile_table
+
+
+# pandas and requests dominate import time, so they are loaded on first use:
+# requests when a client is created, pandas when a DataFrame is built.
+def _import_pandas():
+    """Import pandas on demand."""
+    import pandas
+
+    return pandas
+
+
+def _import_requests():
+    """Import requests on demand."""
+    import requests
+    import requests.adapters  # noqa: F401
+
+    return requests
+
+
+def _import_pyarrow():
+    """Import pyarrow on demand; it is only needed for Arrow results."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for EXTERNAL_LINKS results. "
+            "Install it with: pip install pyarrow"
+        ) from e
+    return pyarrow
+
 
+# Databricks SQL type names grouped by the pandas dtype they decode to
+_INTEGER_TYPES = {
+    "TINYINT",
+    "BYTE",
+    "SMALLINT",
+    "SHORT",
+    "INT",
+    "INTEGER",
+    "BIGINT",
+    "LONG",
+}
+_FLOAT_TYPES = {"FLOAT", "REAL", "DOUBLE"}
+_TIMESTAMP_TYPES = {"TIMESTAMP", "TIMESTAMP_NTZ"}
 
-class DatabricksQueryClient:
+# Largest DECIMAL precision that still fits losslessly in an int64
+_MAX_INT64_DECIMAL_PRECISION = 18
+
+
+def _convert_column(values, column: dict) -> pd.Series:
     """
-    A secure REST-based client for executing SQL queries on Databricks.
+    Convert one column of JSON_ARRAY strings to the dtype its SQL type implies.
 
-    Features:
-    - SQL injection protection with dangerous pattern detection
-    - Automatic environment variable loading
-    - Built-in timeout and error handling
-    - Returns pandas DataFrames for easy analysis
-    - Detailed logging and debug options
+    Every conversion works on the whole column at once; NULLs become the
+    missing value of the target dtype (pd.NA, NaN or NaT).
+
+    - Integer types and DECIMAL(p, 0) with p <= 18 -> nullable Int64
+    - Other DECIMALs -> exact decimal128(p, s) (see _convert_decimal)
+    - FLOAT and DOUBLE -> float64
+    - BOOLEAN -> nullable boolean
+    - DATE -> datetime64; TIMESTAMP -> UTC datetime64; TIMESTAMP_NTZ -> naive
+    - Everything else (strings, binary, intervals, complex types) is kept as-is
+    """
+    pd = _import_pandas()
+    series = pd.Series(values, dtype=object)
+    type_name = (column.get("type_name") or "").upper()
+
+    if type_name == "DECIMAL":
+        precision = int(column.get("type_precision") or 38)
+        scale = int(column.get("type_scale") or 0)
+        if scale != 0 or precision > _MAX_INT64_DECIMAL_PRECISION:
+            return _convert_decimal(series, precision, scale)
+        type_name = "BIGINT"
+
+    if type_name in _INTEGER_TYPES:
+        return pd.to_numeric(
+            series, errors="coerce", dtype_backend="numpy_nullable"
+        ).astype("Int64")
+    if type_name in _FLOAT_TYPES:
+        return pd.to_numeric(series, errors="coerce").astype("float64")
+    if type_name == "BOOLEAN":
+        return series.map({"true": True, "false": False}).astype("boolean")
+    if type_name == "DATE":
+        return pd.to_datetime(series, format="%Y-%m-%d", errors="coerce")
+    if type_name in _TIMESTAMP_TYPES:
+        return pd.to_datetime(
+            series, format="ISO8601", utc=type_name == "TIMESTAMP", errors="coerce"
+        )
+    return pd.Series(values)
+
+
+def _convert_decimal(series: pd.Series, precision: int, scale: int) -> pd.Series:
     """
+    Convert DECIMAL strings without going through float.
+
+    With pyarrow the column is Arrow-backed ``decimal128(precision, scale)``,
+    as EXTERNAL_LINKS results already are; without it, the values become
+    ``decimal.Decimal`` objects.
+    """
+    pd = _import_pandas()
+    try:
+        pa = _import_pyarrow()
+    except ImportError:
+        from decimal import Decimal
+
+        return series.map(Decimal, na_action="ignore")
+    array = pa.array(series, pa.string()).cast(pa.decimal128(precision, scale))
+    return pd.Series(array, dtype=pd.ArrowDtype(array.type))
+
+
+# Per-warehouse semaphores shared by every client in the process
+_WAREHOUSE_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+_WAREHOUSE_SLOTS_LOCK = threading.Lock()
+
+
+def _warehouse_slots(warehouse_id: str, limit: int) -> threading.BoundedSemaphore:
+    """Return the semaphore capping concurrent statements on a warehouse."""
+    with _WAREHOUSE_SLOTS_LOCK:
+        if warehouse_id not in _WAREHOUSE_SLOTS:
+            _WAREHOUSE_SLOTS[warehouse_id] = threading.BoundedSemaphore(limit)
+        return _WAREHOUSE_SLOTS[warehouse_id]
+
+
+# Per-workspace circuit breakers shared by every client in the process
+_CIRCUIT_BREAKERS: Dict[str, CircuitBreaker] = {}
+_CIRCUIT_BREAKERS_LOCK = threading.Lock()
+
+
+def _circuit_breaker(hostname: str) -> CircuitBreaker:
+    """Return the default circuit breaker for a workspace."""
+    with _CIRCUIT_BREAKERS_LOCK:
+        if hostname not in _CIRCUIT_BREAKERS:
+            _CIRCUIT_BREAKERS[hostname] = CircuitBreaker()
+        return _CIRCUIT_BREAKERS[hostname]
+
+
+def _request_not_sent(error: Exception) -> bool:
+    """True if a request failed before any byte could reach the server."""
+    requests = _import_requests()
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        from urllib3.exceptions import NewConnectionError
+
+        # requests wraps urllib3's MaxRetryError, whose reason is the cause
+        reason = getattr(error.args[0], "reason", None)
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+# .env resolution shared by every client in the process:
+# (env_path, working directory) -> (file, mtime_ns, parsed values)
+_ENV_CACHE: Dict[Tuple[Optional[str], str], Tuple[Path, int, Dict[str, str]]] = {}
+_ENV_CACHE_LOCK = threading.Lock()
+
+
+def _find_env_file(env_path: Optional[Union[str, Path]], debug: bool) -> Path:
+    """Return the first .env file found in the expected locations."""
+    if env_path:
+        env_paths = [Path(env_path)]
+    else:
+        # Try multiple common locations (add repo root first)
+        env_paths = [
+            Path.cwd() / ".env",  # Repository root when running scripts from project
+            Path.cwd().parent / ".env",  # One level up (e.g., when inside utils/)
+            Path.cwd().parent.parent
+            / ".env",  # Two levels up (e.g., from notebooks/temp_code)
+            Path.cwd().parent.parent.parent
+            / ".env",  # Original notebook context attempt
+            Path("..") / ".." / ".." / ".env",  # Relative path fallback
+            Path(
+                "/Users/kchauhan/repos/ngm_dataset_eda_v2/.env"
+            ),  # Absolute fallback (legacy)
+        ]
+
+    for path in env_paths:
+        if debug:
+            print(f"🔍 Trying env_path: {path.resolve()}")
+
+        if path.exists():
+            if debug:
+                print(f"✅ Loaded environment from: {path.resolve()}")
+            return path
+
+    raise EnvironmentError("Could not find .env file in any expected location")
+
+
+def _load_environment(env_path: Optional[Union[str, Path]], debug: bool):
+    """
+    Load the .env file into os.environ, overriding existing variables.
+
+    Which file applies for a given env_path and working directory, and its
+    parsed contents, are cached for the process; the file is re-read only
+    when its modification time changes. Call invalidate_config_cache() to
+    force a fresh search, e.g. after creating a .env in another location.
+    """
+    key = (str(env_path) if env_path else None, os.getcwd())
+    with _ENV_CACHE_LOCK:
+        cached = _ENV_CACHE.get(key)
+
+    if cached is not None:
+        path, mtime_ns, values = cached
+        try:
+            unchanged = path.stat().st_mtime_ns == mtime_ns
+        except OSError:
+            unchanged = False
+        if unchanged:
+            if debug:
+                print(f"✅ Loaded environment from: {path.resolve()} (cached)")
+            os.environ.update(values)
+            return
+
+    path = _find_env_file(env_path, debug)
+    mtime_ns = path.stat().st_mtime_ns
+    from dotenv import dotenv_values
+
+    values = {k: v for k, v in dotenv_values(path).items() if v is not None}
+    os.environ.update(values)
+    with _ENV_CACHE_LOCK:
+        _ENV_CACHE[key] = (path, mtime_ns, values)
+
+
+def invalidate_config_cache():
+    """Forget every cached .env resolution so the next client searches again."""
+    with _ENV_CACHE_LOCK:
+        _ENV_CACHE.clear()
+
+
+class _DatabricksClientBase:
+    """
+    Configuration, safety checks and result decoding shared by the blocking
+    and asyncio clients. Subclasses provide the HTTP transport.
+    """
+
+    # Statement states that mean "keep polling"
+    PENDING_STATES = ("PENDING", "RUNNING")
+
+    # Result format requested for each supported disposition
+    RESULT_FORMATS = {"INLINE": "JSON_ARRAY", "EXTERNAL_LINKS": "ARROW_STREAM"}
+
+    # Longest server-side wait on submit. Quick statements come back with
+    # their result in one request; longer ones return their statement_id
+    # after this and are polled, where every wait can be cancelled.
+    SUBMIT_WAIT = 10
 
     def __init__(
         self, env_path: Optional[Union[str, Path]] = None, debug: bool = False
     ):
-        """
-        Initialize the Databricks query client.
-
-        Args:
-            env_path: Path to .env file. If None, tries multiple common locations.
-            debug: Enable debug logging for troubleshooting.
-        """
         self.debug = debug
         self._load_environment(env_path)
         self._validate_credentials()
@@ -44,38 +333,7 @@ class DatabricksQueryClient:
 
     def _load_environment(self, env_path: Optional[Union[str, Path]] = None):
         """Load environment variables from .env file with multiple fallback paths."""
-        if env_path:
-            env_paths = [Path(env_path)]
-        else:
-            # Try multiple common locations (add repo root first)
-            env_paths = [
-                Path.cwd()
-                / ".env",  # Repository root when running scripts from project
-                Path.cwd().parent / ".env",  # One level up (e.g., when inside utils/)
-                Path.cwd().parent.parent
-                / ".env",  # Two levels up (e.g., from notebooks/temp_code)
-                Path.cwd().parent.parent.parent
-                / ".env",  # Original notebook context attempt
-                Path("..") / ".." / ".." / ".env",  # Relative path fallback
-                Path(
-                    "/Users/kchauhan/repos/ngm_dataset_eda_v2/.env"
-                ),  # Absolute fallback (legacy)
-            ]
-
-        loaded = False
-        for path in env_paths:
-            if self.debug:
-                print(f"🔍 Trying env_path: {path.resolve()}")
-
-            if path.exists():
-                load_dotenv(path, override=True)
-                loaded = True
-                if self.debug:
-                    print(f"✅ Loaded environment from: {path.resolve()}")
-                break
-
-        if not loaded:
-            raise EnvironmentError("Could not find .env file in any expected location")
+        _load_environment(env_path, self.debug)
 
     def _validate_credentials(self):
         """Validate that all required Databricks credentials are available."""
@@ -115,6 +373,13 @@ class DatabricksQueryClient:
         if self.debug:
             print(f"🔍 warehouse_id: {self.warehouse_id}")
 
+    def _workspace_url(self) -> str:
+        """Base URL of the workspace API; a hostname with a scheme is used as-is."""
+        if self.hostname.startswith(("http://", "https://")):
+            # e.g. a local MockStatementServer
+            return self.hostname.rstrip("/")
+        return f"https://{self.hostname}"
+
     def _check_sql_safety(self, query: str) -> None:
         """
         Check SQL query for dangerous patterns that could modify data.
@@ -125,69 +390,501 @@ class DatabricksQueryClient:
         Raises:
             ValueError: If dangerous patterns are detected
         """
-        query_upper = query.upper().strip()
+        check_sql_safety(query)
 
-        # Only allow SELECT, safe SHOW, DESCRIBE, and WITH (CTE) statements
-        if not (
-            query_upper.startswith("SELECT")
-            or query_upper.startswith("SHOW")
-            or query_upper.startswith("DESCRIBE")
-            or query_upper.startswith("DESC")
-            or query_upper.startswith("WITH")
-        ):
+    @staticmethod
+    def _statement_state(result: dict) -> str:
+        return result.get("status", {}).get("state", "unknown")
+
+    def _raise_for_state(self, result: dict, query_name: str):
+        """Raise if the statement ended in a failed, canceled or closed state."""
+        status = result.get("status", {})
+        state = status.get("state", "unknown")
+
+        if state == "FAILED":
+            error_info = status.get("error", {})
+            error_msg = error_info.get("message", "Unknown error")
+            error_code = error_info.get("error_code", "UNKNOWN")
+            raise RuntimeError(f"Query failed: {error_msg} (Code: {error_code})")
+        if state in ("CANCELED", "CLOSED"):
+            raise RuntimeError(f"{query_name} was {state.lower()} on the warehouse")
+
+    @staticmethod
+    def _manifest(result: dict) -> dict:
+        """Return the result manifest from either of its possible locations."""
+        manifest = result.get("result", {}).get("manifest")
+        if manifest and "schema" in manifest:
+            return manifest
+        return result.get("manifest", {})
+
+    def _schema_columns(self, result: dict) -> List[dict]:
+        """Return the manifest's column descriptions (name, type_name, ...)."""
+        return self._manifest(result).get("schema", {}).get("columns", [])
+
+    def _column_names(self, result: dict) -> List[str]:
+        return [col["name"] for col in self._schema_columns(result)]
+
+    def _result_format(self, result: dict) -> str:
+        return self._manifest(result).get("format", "JSON_ARRAY")
+
+    @staticmethod
+    def _next_chunk_index(chunk: dict) -> Optional[int]:
+        if "next_chunk_index" in chunk:
+            return chunk["next_chunk_index"]
+        links = chunk.get("external_links") or []
+        return links[-1].get("next_chunk_index") if links else None
+
+    @staticmethod
+    def _chunk_to_dataframe(chunk: dict, columns: List[dict]) -> pd.DataFrame:
+        """
+        Decode the rows of one JSON_ARRAY chunk into typed columns.
+
+        Rows are transposed once and each column is converted as a whole
+        using the SQL type from the manifest (see _convert_column).
+        """
+        pd = _import_pandas()
+        data = chunk.get("data_array") or []
+        if not columns:
+            # Fallback: return data without column names
+            return pd.DataFrame(data)
+
+        column_values = list(zip(*data)) if data else [()] * len(columns)
+        # Keyed by position so duplicate column names survive
+        df = pd.DataFrame(
+            {
+                i: _convert_column(values, col)
+                for i, (col, values) in enumerate(zip(columns, column_values))
+            }
+        )
+        df.columns = [col["name"] for col in columns]
+        return df
+
+    @staticmethod
+    def _arrow_to_dataframe(tables: list, columns: List[str]) -> pd.DataFrame:
+        """
+        Convert Arrow chunks to one DataFrame backed by Arrow memory.
+
+        The chunks are stitched together without copying and converted with
+        ``pd.ArrowDtype`` columns, so the data is not re-materialised as
+        Python objects.
+        """
+        pd = _import_pandas()
+        tables = [table for table in tables if table is not None]
+        if not tables:
+            return pd.DataFrame(columns=columns)
+
+        pa = _import_pyarrow()
+        table = tables[0] if len(tables) == 1 else pa.concat_tables(tables)
+        # Dictionary columns (memory_mode) become pandas categoricals
+        return table.to_pandas(
+            types_mapper=lambda t: (
+                None if pa.types.is_dictionary(t) else pd.ArrowDtype(t)
+            )
+        )
+
+    def _submit_wait(self, timeout: Optional[float], async_mode: bool = False) -> int:
+        """
+        Server-side wait in seconds for a submit with the given deadline.
+
+        The API accepts 0 or 5-50 seconds; deadlines under 5 seconds and
+        ``async_mode`` submit without waiting.
+        """
+        if async_mode or (timeout is not None and timeout < 5):
+            return 0
+        if timeout is None:
+            return self.SUBMIT_WAIT
+        return min(int(timeout), self.SUBMIT_WAIT)
+
+    def _statement_payload(
+        self,
+        query: str,
+        wait_timeout: int,
+        disposition: str = "INLINE",
+        parameters: Optional[List[dict]] = None,
+    ) -> dict:
+        """Build the request body for POST /api/2.0/sql/statements."""
+        if disposition not in self.RESULT_FORMATS:
             raise ValueError(
-                "Only SELECT, SHOW, DESCRIBE, and WITH queries are allowed"
+                f"disposition must be one of {', '.join(self.RESULT_FORMATS)}"
             )
 
-        # If it's a SHOW statement, ensure it's a safe read-only SHOW command
-        if query_upper.startswith("SHOW"):
-            safe_show_patterns = [
-                r"^SHOW\s+TABLES",
-                r"^SHOW\s+DATABASES",
-                r"^SHOW\s+SCHEMAS",
-                r"^SHOW\s+COLUMNS",
-                r"^SHOW\s+CREATE\s+TABLE",
-                r"^SHOW\s+PARTITIONS",
-                r"^SHOW\s+VIEWS",
-            ]
-
-            is_safe_show = any(
-                re.match(pattern, query_upper) for pattern in safe_show_patterns
+        payload = {
+            "statement": query,
+            "warehouse_id": self.warehouse_id,
+            "wait_timeout": f"{wait_timeout}s",
+            "on_wait_timeout": "CONTINUE",
+            "disposition": disposition,
+            "format": self.RESULT_FORMATS[disposition],
+        }
+        if parameters:
+            payload["parameters"] = parameters
+        return payload
+
+    @staticmethod
+    def _api_error_message(status_code: int, body: str) -> str:
+        """Describe a non-200 API response, including the server's message."""
+        error_msg = f"API call failed with status {status_code}"
+        if body:
+            import json
+
+            try:
+                error_detail = json.loads(body)
+                if "message" in error_detail:
+                    error_msg += f": {error_detail['message']}"
+            except ValueError:
+                error_msg += f": {body}"
+        return error_msg
+
+
+class DatabricksQueryClient(_DatabricksClientBase):
+    """
+    A secure REST-based client for executing SQL queries on Databricks.
+
+    Features:
+    - SQL injection protection with dangerous pattern detection
+    - Automatic environment variable loading
+    - Built-in timeout and error handling
+    - Returns pandas DataFrames for easy analysis
+    - Detailed logging and debug options
+    - Pooled keep-alive HTTP connections shared across threads
+    - Concurrent batch execution with a per-warehouse concurrency cap
+    - Retries with backoff and a circuit breaker for transient API failures
+    - Server-side cancellation of statements abandoned by a timeout, Ctrl-C,
+      ``cancel_all()``, ``close()`` or interpreter exit
+    - Approximate aggregates over a table sample, with confidence intervals
+    - Local Parquet replicas of table slices, queried in-process with DuckDB
+    - Cached, searchable table and column metadata
+    - Incremental refresh of results over a growing watermark column
+    - Named, typed query parameters and identifier binding
+    - Memory-optimized results with categorical and downcast columns
+    - Streaming results to Parquet, Feather or CSV files
+
+    The client can be used as a context manager; leaving the ``with`` block
+    cancels statements still running and closes the connection pool.
+
+    A single client is safe to share between threads: each thread gets its
+    own ``requests.Session`` on top of one shared, thread-safe connection
+    pool, and per-query state lives on the call stack rather than on the
+    client. Only ``close()`` must not race with queries still running.
+    """
+
+    # Accepted values for execute_query(cache=...)
+    CACHE_MODES = (None, "use", "refresh", "only", "bypass")
+
+    def __init__(
+        self,
+        env_path: Optional[Union[str, Path]] = None,
+        debug: bool = False,
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        preconnect: bool = True,
+        poll_interval: float = 0.25,
+        max_poll_interval: float = 5.0,
+        chunk_workers: int = 4,
+        max_concurrent_queries: int = 10,
+        cache: Union[QueryResultCache, str, Path, bool, None] = None,
+        metrics_hooks: Optional[Sequence[Callable[[QueryMetrics], None]]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        replica: Union[LocalReplica, str, Path, None] = None,
+        metadata_cache: Union[MetadataCache, str, Path, None] = None,
+        incremental_store: Union[IncrementalStore, str, Path, None] = None,
+    ):
+        """
+        Initialize the Databricks query client.
+
+        Args:
+            env_path: Path to .env file. If None, tries multiple common locations.
+            debug: Enable debug logging for troubleshooting.
+            pool_size: Maximum number of pooled connections to the workspace.
+            keep_alive: Reuse connections between requests. When False, every
+                request asks the server to close its connection afterwards.
+            preconnect: Open a warm connection to the workspace at construction
+                time so the first query skips the DNS/TCP/TLS setup.
+            poll_interval: Initial delay between status polls for long-running
+                statements, in seconds.
+            max_poll_interval: Upper bound for the growing poll delay.
+            chunk_workers: Number of result chunks downloaded in parallel for
+                large results.
+            max_concurrent_queries: Cap on statements execute_many() runs at
+                once against this warehouse, shared by all clients in the
+                process. The first client to use a warehouse sets the cap.
+            cache: Optional on-disk result cache: a QueryResultCache, a
+                directory path, or True for the default location. Results
+                are keyed on the warehouse id and the query's fingerprint,
+                so whitespace, comment and keyword-case edits still hit.
+            metrics_hooks: Callables invoked with a QueryMetrics after every
+                execute_query() call, successful or not (e.g.
+                ``MetricsRegistry.observe``).
+            retry_policy: When to repeat requests that failed with a
+                transient error (429, 5xx, network). Defaults to
+                ``RetryPolicy()``; pass ``RetryPolicy(max_attempts=1)`` to
+                disable retries. Statement submissions are only repeated
+                when the warehouse provably did not accept them.
+            circuit_breaker: Fails requests fast once the workspace keeps
+                failing. Defaults to a breaker shared by every client of the
+                same workspace in the process.
+            replica: Store for local table slices used by
+                ``execute_query(local=True)``: a LocalReplica or a directory
+                path. Defaults to ~/.cache/databricks-eda/replicas, created
+                on first use.
+            metadata_cache: Store for table and column metadata used by
+                get_columns(), list_tables() and find_columns(): a
+                MetadataCache or a directory path. Defaults to
+                ~/.cache/databricks-eda/metadata, created on first use.
+            incremental_store: Where execute_incremental() keeps results
+                between runs: an IncrementalStore or a directory path.
+                Defaults to ~/.cache/databricks-eda/incremental, created on
+                first use.
+        """
+        super().__init__(env_path, debug)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.chunk_workers = chunk_workers
+        self.max_concurrent_queries = max_concurrent_queries
+
+        if cache is True:
+            cache = QueryResultCache()
+        elif isinstance(cache, (str, Path)):
+            cache = QueryResultCache(cache)
+        self.cache: Optional[QueryResultCache] = cache or None
+        self.metrics_hooks = list(metrics_hooks or ())
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or _circuit_breaker(self.hostname)
+        if isinstance(replica, (str, Path)):
+            replica = LocalReplica(replica)
+        self._replica: Optional[LocalReplica] = replica
+        if isinstance(metadata_cache, (str, Path)):
+            metadata_cache = MetadataCache(metadata_cache)
+        self._metadata_cache: Optional[MetadataCache] = metadata_cache
+        if isinstance(incremental_store, (str, Path)):
+            incremental_store = IncrementalStore(incremental_store)
+        self._incremental_store: Optional[IncrementalStore] = incremental_store
+
+        # Submitted statements that have not finished: statement_id -> name.
+        # cancel_all() bumps the generation so submissions racing it are
+        # cancelled as soon as their statement_id is known.
+        self._in_flight: Dict[str, str] = {}
+        self._cancel_generation = 0
+        self._in_flight_lock = threading.Lock()
+        _LIVE_CLIENTS.add(self)
+
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self._setup_connection_pool()
+
+        if preconnect:
+            self._preconnect()
+
+    def __enter__(self) -> "DatabricksQueryClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _setup_connection_pool(self):
+        """Create the shared connection pool used by every request."""
+        self._base_url = self._workspace_url()
+        self._headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json",
+        }
+        if not self.keep_alive:
+            self._headers["Connection"] = "close"
+
+        requests = _import_requests()
+
+        # One adapter (and therefore one set of urllib3 pools) is shared by
+        # all threads; pool_block makes extra threads wait for a free
+        # connection instead of opening throwaway ones. A few host pools are
+        # kept so cloud storage downloads don't evict the workspace pool.
+        self._adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4, pool_maxsize=self.pool_size, pool_block=True
+        )
+        self._thread_local = threading.local()
+        # Weak so sessions of finished threads can be garbage collected
+        self._sessions: "weakref.WeakSet[requests.Session]" = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
+        self._chunk_pool: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+
+    def _session(self) -> requests.Session:
+        """Return this thread's session, creating it on first use."""
+        session = getattr(self._thread_local, "session", None)
+        if session is None:
+            session = _import_requests().Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            session.verify = False
+            with self._sessions_lock:
+                self._sessions.add(session)
+            self._thread_local.session = session
+        return session
+
+    def _api_request(
+        self, method: str, path: str, timeout: float, **kwargs
+    ) -> requests.Response:
+        """Send an authenticated request to the workspace over the pool."""
+        if self._closed:
+            raise RuntimeError("DatabricksQueryClient has been closed")
+
+        return self._session().request(
+            method,
+            f"{self._base_url}{path}",
+            headers=self._headers,
+            timeout=timeout,
+            **kwargs,
+        )
+
+    def _preconnect(self):
+        """Warm up one pooled connection; failures are left to the first query."""
+        requests = _import_requests()
+        try:
+            self._session().head(self._base_url, timeout=5)
+            if self.debug:
+                print(f"🔌 Pre-connected to {self.hostname}")
+        except requests.exceptions.RequestException as e:
+            if self.debug:
+                print(f"⚠️ Pre-connect failed: {e}")
+
+    def cancel_statement(self, statement_id: str):
+        """
+        Ask the warehouse to stop a running statement.
+
+        Raises:
+            RuntimeError: If the API call fails
+        """
+        with self._in_flight_lock:
+            self._in_flight.pop(statement_id, None)
+        self._api_json(
+            "POST", f"/api/2.0/sql/statements/{statement_id}/cancel", timeout=10
+        )
+
+    def cancel_all(self) -> List[str]:
+        """
+        Cancel every statement this client has submitted that is still running.
+
+        Covers queries waiting in execute_query() or execute_many() on other
+        threads (they raise RuntimeError), statements from submit_query()
+        that were never waited on, and submissions still in progress (they
+        are cancelled once the warehouse returns their statement_id).
+        Failures are ignored: the statement may have finished meanwhile.
+
+        Returns:
+            list: The statement_ids a cancel was sent for
+        """
+        with self._in_flight_lock:
+            statements = list(self._in_flight.items())
+            self._in_flight.clear()
+            self._cancel_generation += 1
+        for statement_id, query_name in statements:
+            self._cancel_quietly(statement_id, query_name)
+        return [statement_id for statement_id, _ in statements]
+
+    def _cancel_quietly(self, statement_id: str, query_name: str):
+        """
+        Best-effort cancel for a statement that is being abandoned.
+
+        Sent once, without retries or the circuit breaker, so an interrupt
+        or shutdown is not held up by a struggling workspace. It uses its own
+        connection: the pool may be busy with other threads' requests, and
+        at interpreter exit urllib3 has already drained it.
+        """
+        with self._in_flight_lock:
+            self._in_flight.pop(statement_id, None)
+        if self.debug:
+            print(f"🛑 Cancelling {query_name} ({statement_id})")
+        requests = _import_requests()
+        try:
+            requests.post(
+                f"{self._base_url}/api/2.0/sql/statements/{statement_id}/cancel",
+                headers=self._headers,
+                timeout=5,
+                verify=False,
             )
-            if not is_safe_show:
-                raise ValueError(
-                    "Only safe read-only SHOW commands are allowed (TABLES, DATABASES, SCHEMAS, COLUMNS, etc.)"
-                )
+        except Exception as e:
+            if self.debug:
+                print(f"⚠️ Cancelling {statement_id} failed: {e}")
 
-        # DESCRIBE/DESC statements are read-only metadata queries - always safe
-        # WITH clauses (CTEs) are followed by SELECT - validate the entire query doesn't contain dangerous patterns
-
-        # Block dangerous statement patterns
-        dangerous_patterns = [
-            r"\bINSERT\s+INTO\b",
-            r"\bUPDATE\s+\w+\s+SET\b",
-            r"\bDELETE\s+FROM\b",
-            r"\bDROP\s+(TABLE|VIEW|DATABASE|SCHEMA)\b",
-            r"\bCREATE\s+(TABLE|VIEW|DATABASE|SCHEMA)\b",
-            r"\bALTER\s+(TABLE|VIEW|DATABASE|SCHEMA)\b",
-            r"\bTRUNCATE\s+TABLE\b",
-        ]
+    def close(self):
+        """
+        Cancel running statements and close all pooled connections.
 
-        for pattern in dangerous_patterns:
-            if re.search(pattern, query_upper):
-                match = re.search(pattern, query_upper).group()
-                raise ValueError(f"Dangerous SQL pattern detected: {match}")
+        The client cannot be used afterwards.
+        """
+        if self._closed:
+            return
+        self.cancel_all()
+        self._closed = True
+        with self._sessions_lock:
+            sessions, self._sessions = list(self._sessions), weakref.WeakSet()
+            chunk_pool, self._chunk_pool = self._chunk_pool, None
+        if chunk_pool is not None:
+            chunk_pool.shutdown(wait=False, cancel_futures=True)
+        for session in sessions:
+            session.close()
+        self._adapter.close()
 
     def execute_query(
-        self, query: str, query_name: str = "Query", timeout: int = 30
+        self,
+        query: str,
+        query_name: str = "Query",
+        timeout: Optional[float] = 30,
+        async_mode: bool = False,
+        disposition: str = "INLINE",
+        cache: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        local: bool = False,
+        parameters: Optional[Mapping[str, Any]] = None,
+        memory_mode: Optional[str] = None,
+        column_dtypes: Optional[Mapping[str, Optional[str]]] = None,
     ) -> pd.DataFrame:
         """
         Execute a read-only SQL query on Databricks and return results as pandas DataFrame.
 
+        The server holds the submit request open for up to ``SUBMIT_WAIT``
+        seconds, so quick statements finish in one round trip. Statements that
+        are still running after that are polled until they finish or the
+        overall ``timeout`` passes. A statement abandoned by a timeout, Ctrl-C
+        or failed status request is cancelled on the warehouse.
+
+        When the client has a result cache, results are read from and written
+        to it by default. ``cache`` overrides that for one call:
+
+        - "use": return a cached result if fresh, otherwise run and store it
+        - "refresh": always run the query and overwrite the cached result
+        - "only": return the cached result or raise LookupError; never runs
+        - "bypass": run without reading or writing the cache
+
         Args:
             query: SQL SELECT query to execute
             query_name: Descriptive name for logging purposes
-            timeout: Query timeout in seconds (5-50 seconds API limit)
+            timeout: Overall deadline in seconds, or None to wait indefinitely
+            async_mode: Submit without a server-side wait and go straight to
+                polling
+            disposition: "INLINE" returns JSON rows in the API response;
+                "EXTERNAL_LINKS" downloads Arrow IPC streams from cloud storage
+                into Arrow-backed columns (requires pyarrow). Prefer
+                EXTERNAL_LINKS for large or wide results.
+            cache: Cache mode for this call (see above); defaults to "use"
+            cache_ttl: Seconds the stored result stays fresh; defaults to the
+                cache's ``default_ttl``
+            local: Run the query in-process against the local slices made
+                by replicate_table() instead of on the warehouse (requires
+                duckdb). The result cache is not used.
+            parameters: Values for the query's ``:name`` markers, sent as
+                typed parameters instead of being pasted into the SQL (see
+                query_parameters). Wrap table names in Identifier. Queries
+                differing only in parameter values share their statement
+                text; the result cache keys on both.
+            memory_mode: Shrink the result in memory (see result_memory).
+                "categories" encodes low-cardinality string columns as
+                ``category`` while chunks are decoded; "compact" also
+                downcasts numeric columns to the smallest lossless dtype.
+                ``df.attrs["memory"]`` reports the bytes before and after.
+            column_dtypes: Per-column dtypes overriding memory_mode, e.g.
+                ``{"Year": "int16", "Dest": "category", "TailNum": None}``
+                (None keeps the decoded dtype)
 
         Returns:
             pandas.DataFrame: Query results
@@ -195,131 +892,1276 @@ class DatabricksQueryClient:
         Raises:
             ValueError: If query fails safety checks
             RuntimeError: If API call fails
+            TimeoutError: If the statement does not finish before the deadline
+            LookupError: If cache="only" and no fresh result is cached, or
+                local=True and the query names no replicated table
+        """
+        memory = (
+            MemoryPlan(memory_mode, column_dtypes)
+            if memory_mode or column_dtypes
+            else None
+        )
+        with self._track_query(query_name) as metrics:
+            with metrics.phase("safety_check"):
+                query, api_parameters = bind_parameters(query, parameters)
+                metrics.fingerprint = fingerprint_sql(query, lift_literals=True)
+                self._check_sql_safety(query)
+
+            if local:
+                if api_parameters:
+                    raise ValueError("parameters are not supported with local=True")
+                with metrics.phase("local_query"):
+                    df = self.replica.query(query)
+                    if memory is not None:
+                        df = memory.apply(df)
+                if self.debug:
+                    print(f"🦆 {query_name}: {len(df)} rows from the local replica")
+                metrics.rows = len(df)
+                return df
+
+            cache_key = self._cache_key(
+                query, disposition, cache, api_parameters, memory
+            )
+            if cache_key is not None and cache in (None, "use", "only"):
+                with metrics.phase("cache_lookup"):
+                    cached = self.cache.get(cache_key)
+                if cached is not None:
+                    if self.debug:
+                        print(f"💾 Cache hit: {query_name} ({len(cached)} rows)")
+                    metrics.cache_hit = True
+                    metrics.rows = len(cached)
+                    return cached
+                if cache == "only":
+                    raise LookupError(f"{query_name} has no fresh cached result")
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            result = self._submit_statement(
+                query,
+                query_name,
+                self._submit_wait(timeout, async_mode),
+                disposition,
+                metrics,
+                api_parameters,
+            )
+            result = self._wait_for_statement(
+                result, query_name, timeout, deadline, metrics
+            )
+            df = self._result_to_dataframe(result, query_name, metrics, memory)
+            metrics.rows = len(df)
+
+            if cache_key is not None:
+                with metrics.phase("cache_store"):
+                    stored = self.cache.put(cache_key, df, ttl=cache_ttl)
+                if self.debug and not stored:
+                    print(f"⚠️ {query_name} could not be cached")
+            return df
+
+    @contextmanager
+    def _track_query(self, query_name: str) -> Iterator[QueryMetrics]:
+        """Time one query and pass its metrics to the hooks when it ends."""
+        metrics = QueryMetrics(query_name)
+        start = time.perf_counter()
+        try:
+            yield metrics
+        except BaseException as e:
+            metrics.error = e
+            raise
+        finally:
+            metrics.total = time.perf_counter() - start
+            if self.debug:
+                print(f"⏱️ {metrics.summary()}")
+            for hook in self.metrics_hooks:
+                try:
+                    hook(metrics)
+                except Exception as e:
+                    # Point at the caller of execute_query(), past contextlib
+                    warnings.warn(
+                        f"Metrics hook {hook!r} failed: {e}",
+                        RuntimeWarning,
+                        stacklevel=4,
+                    )
+
+    def _cache_key(
+        self,
+        query: str,
+        disposition: str,
+        mode: Optional[str],
+        parameters: Optional[List[dict]] = None,
+        memory: Optional[MemoryPlan] = None,
+    ) -> Optional[str]:
+        """Return the result cache key for a call, or None if it skips the cache."""
+        if mode not in self.CACHE_MODES:
+            modes = ", ".join(repr(mode) for mode in self.CACHE_MODES)
+            raise ValueError(f"cache must be one of {modes}")
+        if self.cache is None:
+            if mode in ("refresh", "only"):
+                raise ValueError(f"cache={mode!r} needs a client created with a cache")
+            return None
+        if mode == "bypass":
+            return None
+        parts = [self.warehouse_id, disposition, fingerprint_sql(query)]
+        if parameters:
+            parts.append(parameters_key(parameters))
+        if memory is not None:
+            parts.append(memory.key())
+        return self.cache.make_key(*parts)
+
+    def submit_query(
+        self,
+        query: str,
+        query_name: str = "Query",
+        disposition: str = "INLINE",
+        parameters: Optional[Mapping[str, Any]] = None,
+    ) -> str:
         """
-        # Safety checks
+        Submit a read-only SQL query without waiting for it to finish.
+
+        Args:
+            query: SQL SELECT query to execute
+            query_name: Descriptive name for logging purposes
+            disposition: "INLINE" or "EXTERNAL_LINKS", as for execute_query()
+            parameters: Values for ``:name`` markers, as for execute_query()
+
+        The statement counts as in flight until wait_for_query() sees it
+        finish, so cancel_all() and close() stop it if it is never collected.
+
+        Returns:
+            str: The statement_id to pass to wait_for_query()
+
+        Raises:
+            ValueError: If query fails safety checks
+            RuntimeError: If API call fails
+        """
+        query, api_parameters = bind_parameters(query, parameters)
         self._check_sql_safety(query)
+        result = self._submit_statement(
+            query, query_name, 0, disposition, parameters=api_parameters
+        )
+        self._raise_for_state(result, query_name)
+        return result["statement_id"]
 
-        # Ensure timeout is within API limits (5-50 seconds)
-        api_timeout = min(max(timeout, 5), 50)
+    def wait_for_query(
+        self,
+        statement_id: str,
+        query_name: str = "Query",
+        timeout: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Poll a submitted statement until it finishes and return its results.
 
-        # Prepare API request
-        url = f"https://{self.hostname}/api/2.0/sql/statements"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-        }
+        If the deadline passes or waiting is interrupted, the statement is
+        cancelled on the warehouse.
 
-        payload = {
-            "statement": query,
-            "warehouse_id": self.warehouse_id,
-            "wait_timeout": f"{api_timeout}s",
+        Args:
+            statement_id: Identifier returned by submit_query()
+            query_name: Descriptive name for logging purposes
+            timeout: Overall deadline in seconds, or None to wait indefinitely
+
+        Returns:
+            pandas.DataFrame: Query results
+
+        Raises:
+            RuntimeError: If the statement failed or the API call fails
+            TimeoutError: If the statement does not finish before the deadline
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        result = self._get_statement(statement_id)
+        result = self._wait_for_statement(result, query_name, timeout, deadline)
+        return self._result_to_dataframe(result, query_name)
+
+    def execute_query_iter(
+        self,
+        query: str,
+        query_name: str = "Query",
+        timeout: Optional[float] = 30,
+        disposition: str = "INLINE",
+        max_in_flight: Optional[int] = None,
+        as_arrow: bool = False,
+        parameters: Optional[Mapping[str, Any]] = None,
+    ) -> Iterator:
+        """
+        Execute a read-only SQL query and yield its results chunk by chunk.
+
+        Only a bounded number of chunks is held in memory at any time, so
+        results larger than RAM can be aggregated or written out
+        incrementally. The query is submitted when iteration starts; stopping
+        early cancels chunk downloads that have not started yet.
+
+        Args:
+            query: SQL SELECT query to execute
+            query_name: Descriptive name for logging purposes
+            timeout: Deadline in seconds for the statement to finish on the
+                warehouse, or None to wait indefinitely
+            disposition: "INLINE" or "EXTERNAL_LINKS", as for execute_query()
+            max_in_flight: Maximum chunks downloading or buffered ahead of the
+                consumer (default ``chunk_workers * 2``)
+            as_arrow: Yield ``pyarrow.RecordBatch`` objects instead of
+                DataFrames (requires pyarrow)
+            parameters: Values for ``:name`` markers, as for execute_query()
+
+        Yields:
+            pandas.DataFrame or pyarrow.RecordBatch: One piece of the result
+
+        Raises:
+            ValueError: If query fails safety checks
+            RuntimeError: If API call fails
+            TimeoutError: If the statement does not finish before the deadline
+        """
+        query, api_parameters = bind_parameters(query, parameters)
+        self._check_sql_safety(query)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        result = self._submit_statement(
+            query,
+            query_name,
+            self._submit_wait(timeout),
+            disposition,
+            parameters=api_parameters,
+        )
+        result = self._wait_for_statement(result, query_name, timeout, deadline)
+
+        is_arrow = self._result_format(result) == "ARROW_STREAM"
+        columns = self._column_names(result)
+        chunks = self._iter_result_chunks(
+            result, query_name, max_in_flight, stacklevel=3
+        )
+        for piece in chunks:
+            if piece is None:
+                continue
+            if as_arrow:
+                if is_arrow:
+                    yield from piece.to_batches()
+                else:
+                    pa = _import_pyarrow()
+                    yield pa.RecordBatch.from_pandas(piece, preserve_index=False)
+            elif is_arrow:
+                yield self._arrow_to_dataframe([piece], columns)
+            else:
+                yield piece
+
+    def execute_to_file(
+        self,
+        query: str,
+        path: Union[str, Path],
+        format: str = "parquet",
+        query_name: str = "Query",
+        partition_by: Optional[Sequence[str]] = None,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: Optional[str] = None,
+        overwrite: bool = False,
+        timeout: Optional[float] = 600,
+        disposition: str = "EXTERNAL_LINKS",
+        parameters: Optional[Mapping[str, Any]] = None,
+    ) -> ResultFile:
+        """
+        Execute a read-only SQL query and stream its result into a file.
+
+        Unlike ``execute_query(...).to_parquet(...)``, no DataFrame is built:
+        chunks are written as they download, so peak memory is a few chunks
+        and one row group whatever the result size. The returned handle
+        reopens the data memory-mapped (``open()``) or scans it lazily with
+        column and predicate pushdown (``scan()``). See
+        result_files.write_result() for the arguments.
+
+        Returns:
+            ResultFile: A handle on the written file or directory
+
+        Raises:
+            ValueError: If an argument is invalid or the query fails safety
+                checks
+            FileExistsError: If ``path`` exists and ``overwrite`` is False
+            RuntimeError: If API call fails
+            TimeoutError: If the statement does not finish before the deadline
+        """
+        handle = write_result(
+            self,
+            query,
+            path,
+            format=format,
+            query_name=query_name,
+            partition_by=partition_by,
+            row_group_size=row_group_size,
+            compression=compression,
+            overwrite=overwrite,
+            timeout=timeout,
+            disposition=disposition,
+            parameters=parameters,
+        )
+        if self.debug:
+            print(
+                f"💾 {query_name}: {handle.rows:,} rows, "
+                f"{handle.bytes / 1024**2:.1f} MiB written to {handle.path}"
+            )
+        return handle
+
+    def execute_many(
+        self,
+        queries: Mapping[str, Union[str, dict]],
+        max_workers: int = 4,
+        timeout: Optional[float] = 30,
+        **query_options,
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Exception]]:
+        """
+        Execute independent queries concurrently.
+
+        Queries run on a thread pool of ``max_workers`` threads. Across all
+        clients in this process, at most ``max_concurrent_queries`` statements
+        run on the same warehouse at once; further queries wait for a slot.
+        A failing query does not affect the others. Queries that are the same
+        apart from formatting (see sql_fingerprint) are executed only once.
+
+        Args:
+            queries: Mapping of query name to SQL text, or to a dict of
+                execute_query() keyword arguments (must include ``query``)
+            max_workers: Number of queries executed in parallel by this call
+            timeout: Overall deadline in seconds for each query
+            **query_options: Extra execute_query() arguments applied to every
+                query (e.g. ``disposition``)
+
+        Returns:
+            tuple: ``(results, errors)`` dicts keyed by query name, in the order
+            the queries were given. Each name appears in exactly one of them.
+        """
+        if not queries:
+            return {}, {}
+
+        slots = _warehouse_slots(self.warehouse_id, self.max_concurrent_queries)
+
+        # Queries that only differ cosmetically (whitespace, comments, keyword
+        # case) with the same options run once and share the result.
+        groups: Dict[tuple, List[str]] = {}
+        calls: Dict[str, dict] = {}
+        for name, spec in queries.items():
+            options = dict(query_options, timeout=timeout, query_name=name)
+            if isinstance(spec, str):
+                options["query"] = spec
+            else:
+                options.update(spec)
+            calls[name] = options
+            dedup_key = (fingerprint_sql(options["query"]),) + tuple(
+                sorted(
+                    (key, repr(value))
+                    for key, value in options.items()
+                    if key not in ("query", "query_name")
+                )
+            )
+            groups.setdefault(dedup_key, []).append(name)
+
+        interrupted = threading.Event()
+
+        def run(name: str) -> pd.DataFrame:
+            with slots:
+                if interrupted.is_set():
+                    raise RuntimeError(f"{name} was cancelled by an interrupt")
+                return self.execute_query(**calls[name])
+
+        results: Dict[str, pd.DataFrame] = {}
+        errors: Dict[str, Exception] = {}
+        workers = max(1, min(max_workers, len(groups)))
+
+        pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="databricks-batch"
+        )
+        try:
+            futures = {pool.submit(run, names[0]): names for names in groups.values()}
+            for future in as_completed(futures):
+                names = futures[future]
+                try:
+                    df = future.result()
+                    results[names[0]] = df
+                    for duplicate in names[1:]:
+                        results[duplicate] = df.copy()
+                    if self.debug:
+                        print(f"✅ {', '.join(names)}: {len(df)} rows")
+                except Exception as e:
+                    for name in names:
+                        errors[name] = e
+                    if self.debug:
+                        print(f"❌ {', '.join(names)}: {e}")
+        except BaseException:
+            # Ctrl-C: return right away and stop the batch on the warehouse;
+            # workers still polling see their statement cancelled and exit
+            interrupted.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.cancel_all()
+            raise
+        pool.shutdown()
+
+        return (
+            {name: results[name] for name in queries if name in results},
+            {name: errors[name] for name in queries if name in errors},
+        )
+
+    def profile_table(
+        self,
+        table: str,
+        columns: Optional[Sequence[str]] = None,
+        top_k: int = 5,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+        max_columns_per_query: int = 50,
+        timeout: Optional[float] = 300,
+        **query_options,
+    ) -> pd.DataFrame:
+        """
+        Profile every column of a table in one scan.
+
+        Reads the schema from the metadata cache and computes row and NULL
+        counts, approximate distinct counts, min/max, mean/stddev,
+        approximate quantiles and top values in a single aggregation query
+        (one per ``max_columns_per_query`` columns on wide tables). See
+        table_profile.profile_table() for the arguments and result columns.
+
+        Returns:
+            pandas.DataFrame: One row per column
+        """
+        return profile_table(
+            self,
+            table,
+            columns=columns,
+            top_k=top_k,
+            quantiles=quantiles,
+            max_columns_per_query=max_columns_per_query,
+            timeout=timeout,
+            **query_options,
+        )
+
+    @property
+    def replica(self) -> LocalReplica:
+        """The local replica store, created on first use."""
+        if self._replica is None:
+            self._replica = LocalReplica()
+        return self._replica
+
+    def replicate_table(
+        self,
+        table: str,
+        columns: Optional[Sequence[str]] = None,
+        where: Optional[str] = None,
+        sample_percent: Optional[float] = None,
+        seed: int = 42,
+        limit: Optional[int] = None,
+        timeout: Optional[float] = 600,
+    ) -> ReplicaInfo:
+        """
+        Copy a filtered or sampled slice of a table to local Parquet files.
+
+        Afterwards ``execute_query(query, local=True)`` runs queries naming
+        the table against the slice in-process, in milliseconds and without
+        touching the warehouse. Replicating a table again replaces its
+        slice. See LocalReplica.materialize() for the arguments.
+
+        Returns:
+            ReplicaInfo: The table key, source query, path, rows and size
+        """
+        info = self.replica.materialize(
+            self,
+            table,
+            columns=columns,
+            where=where,
+            sample_percent=sample_percent,
+            seed=seed,
+            limit=limit,
+            timeout=timeout,
+        )
+        if self.debug:
+            print(
+                f"🦆 Replicated {info.table}: {info.rows:,} rows, "
+                f"{info.bytes / 1024**2:.1f} MiB in {info.path}"
+            )
+        return info
+
+    @property
+    def incremental_store(self) -> IncrementalStore:
+        """Stored results of execute_incremental(), created on first use."""
+        if self._incremental_store is None:
+            self._incremental_store = IncrementalStore()
+        return self._incremental_store
+
+    def execute_incremental(
+        self,
+        query: str,
+        watermark_column: str,
+        query_name: str = "Query",
+        lookback: Union[timedelta, int, float, None] = None,
+        retention: Union[timedelta, int, float, None] = None,
+        full_refresh: bool = False,
+        timeout: Optional[float] = 30,
+        **query_options,
+    ) -> pd.DataFrame:
+        """
+        Refresh a query's stored result with only the rows past its watermark.
+
+        The first run executes the query in full and stores the result. Later
+        runs execute it wrapped in ``WHERE <watermark_column> >= <mark>``,
+        where the mark is the largest stored value minus ``lookback``, and
+        replace the stored rows from the mark on with the fresh ones. A daily
+        report over 30 days (e.g. cost.sql grouped by ``usage_date``) then
+        scans about a day of data per run::
+
+            daily = client.execute_incremental(
+                cost_sql, "usage_date", "App cost", lookback=timedelta(days=2)
+            )
+
+        The watermark column must be part of the result and must only grow
+        as data arrives; rows sharing a value must all be recomputed
+        together (group by it, don't aggregate over it). Results are stored
+        per warehouse, query fingerprint, parameters and watermark column,
+        so editing the query starts over with a full run.
+
+        Args:
+            query: SQL SELECT query whose result includes ``watermark_column``
+            watermark_column: Monotonically increasing result column
+            query_name: Descriptive name for logging purposes
+            lookback: How far before the stored high-water mark to re-read,
+                for late-arriving data: a timedelta, or a number (days for
+                date/timestamp columns)
+            retention: Drop stored rows older than this before the new
+                high-water mark (same units as ``lookback``); keeps a
+                rolling window such as "last 30 days" from growing
+            full_refresh: Ignore the stored result and run the whole query
+            timeout: Overall deadline in seconds for the query
+            **query_options: Extra execute_query() arguments
+
+        Returns:
+            pandas.DataFrame: The merged result. ``attrs["incremental_from"]``
+            holds the SQL literal of the re-read range's start (None for a
+            full run) and ``attrs["watermark"]`` the new high-water mark.
+
+        Raises:
+            ValueError: If the result has no ``watermark_column``
+        """
+        store = self.incremental_store
+        _, api_parameters = bind_parameters(query, query_options.get("parameters"))
+        parts = [self.warehouse_id, fingerprint_sql(query), watermark_column]
+        if api_parameters:
+            parts.append(parameters_key(api_parameters))
+        key = QueryResultCache.make_key(*parts)
+        stored = None if full_refresh else store.load(key)
+        low = None
+        if stored is not None:
+            previous, _ = stored
+            if (
+                watermark_column in previous.columns
+                and previous[watermark_column].notna().any()
+            ):
+                low = shift(previous[watermark_column].max(), lookback)
+
+        if low is None:
+            df = self.execute_query(query, query_name, timeout, **query_options)
+        else:
+            fresh = self.execute_query(
+                incremental_query(query, watermark_column, low),
+                query_name,
+                timeout,
+                **query_options,
+            )
+            df = merge_incremental(previous, fresh, watermark_column, low)
+            if self.debug:
+                print(
+                    f"📈 {query_name}: {len(fresh)} new/updated rows since "
+                    f"{sql_literal(low)}, {len(df)} total"
+                )
+        if watermark_column not in df.columns:
+            raise ValueError(f"{query_name} has no column {watermark_column!r}")
+
+        high = (
+            df[watermark_column].max() if df[watermark_column].notna().any() else None
+        )
+        if retention is not None and high is not None:
+            df = df[~(df[watermark_column] < shift(high, retention))].reset_index(
+                drop=True
+            )
+        meta = {
+            "watermark_column": watermark_column,
+            "watermark": None if high is None else sql_literal(high),
         }
+        if not store.save(key, df, meta) and self.debug:
+            print(f"⚠️ {query_name} could not be stored for incremental refresh")
+
+        df.attrs.update(
+            incremental_from=None if low is None else sql_literal(low),
+            watermark=meta["watermark"],
+        )
+        return df
+
+    @property
+    def metadata_cache(self) -> MetadataCache:
+        """The table and column metadata cache, created on first use."""
+        if self._metadata_cache is None:
+            self._metadata_cache = MetadataCache()
+        return self._metadata_cache
+
+    def get_columns(self, table: str, refresh: bool = False) -> pd.DataFrame:
+        """
+        A table's columns, from the metadata cache when possible.
+
+        Fully qualified tables (``catalog.schema.table``) are served from a
+        snapshot of the catalog's information_schema, read once; other
+        names are described once with DESCRIBE TABLE.
+
+        Args:
+            table: Table name
+            refresh: Read the metadata from the warehouse again
+
+        Returns:
+            pandas.DataFrame: One row per column with the ColumnInfo fields
+            (``catalog``, ``schema``, ``table``, ``column``, ``position``,
+            ``data_type``, ``nullable``, ``comment``)
+
+        Raises:
+            LookupError: If the catalog has no such table
+        """
+        columns = self.metadata_cache.get_columns(self, table, refresh=refresh)
+        return _import_pandas().DataFrame(columns, columns=ColumnInfo._fields)
+
+    def list_schemas(self, catalog: str) -> List[str]:
+        """Schemas of a catalog, from the metadata cache."""
+        return self.metadata_cache.list_schemas(self, catalog)
+
+    def list_tables(self, catalog: str, schema: Optional[str] = None) -> List[str]:
+        """Fully qualified table names of a catalog, from the metadata cache."""
+        return self.metadata_cache.list_tables(self, catalog, schema)
+
+    def find_columns(
+        self,
+        pattern: str = "*",
+        data_type: Union[str, Sequence[str], None] = None,
+        catalogs: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Find columns by name and type across cached tables.
+
+        Searched in memory, without a warehouse round trip once the
+        catalogs are cached::
+
+            client.find_columns("*delay*", catalogs=["samples"])
+            client.find_columns(data_type=("timestamp", "date"))
+
+        Args:
+            pattern: Column name or case-insensitive glob
+            data_type: Only these base types, e.g. ``"decimal"``
+            catalogs: Catalogs to search, loaded if not cached yet; defaults
+                to every cached catalog of this workspace
+
+        Returns:
+            pandas.DataFrame: Matching columns with the ColumnInfo fields
+        """
+        columns = self.metadata_cache.find_columns(self, pattern, data_type, catalogs)
+        return _import_pandas().DataFrame(columns, columns=ColumnInfo._fields)
+
+    def invalidate_metadata(
+        self, catalog: Optional[str] = None, table: Optional[str] = None
+    ):
+        """
+        Drop cached metadata, e.g. after a table's schema changed.
+
+        See MetadataCache.invalidate(); with no arguments everything is
+        dropped.
+        """
+        self.metadata_cache.invalidate(catalog=catalog, table=table)
+
+    def execute_approximate(
+        self,
+        query: str,
+        query_name: str = "Query",
+        sample_percent: float = 1.0,
+        sample_rows: Optional[int] = None,
+        seed: int = 42,
+        confidence: float = 0.95,
+        timeout: Optional[float] = 30,
+        **query_options,
+    ) -> pd.DataFrame:
+        """
+        Run an aggregate query over a random sample of its table.
+
+        The query is rewritten with approximate.plan_approximate(): the table
+        is read with ``TABLESAMPLE (<percent> PERCENT) REPEATABLE (<seed>)``,
+        counts and sums are scaled up to the full table, and aliased COUNT,
+        SUM and AVG columns get ``<column>_ci_low`` / ``<column>_ci_high``
+        confidence bounds. The result's ``attrs`` mark it as approximate.
+
+        Args:
+            query: SQL SELECT query with aggregates over a single table
+            query_name: Descriptive name for logging purposes
+            sample_percent: Share of the table's rows to read, in percent
+            sample_rows: Read about this many rows instead; converted to a
+                percentage using the table's row count
+            seed: Sampling seed; the same seed reads the same sample
+            confidence: Confidence level of the intervals
+            timeout: Overall deadline in seconds for the query
+            **query_options: Extra execute_query() arguments (e.g. ``cache``)
+
+        Returns:
+            pandas.DataFrame: Estimated results with confidence bounds
+
+        Raises:
+            ValueError: If the query is not eligible for sampling or fails
+                safety checks
+            RuntimeError: If API call fails
+        """
+        if sample_rows is not None:
+            sample_percent = self._rows_to_percent(query, sample_rows, timeout)
+        plan = plan_approximate(query, sample_percent, seed)
+        if self.debug and plan.percent < 100:
+            print(f"🎲 {query_name}: sampling {plan.percent:g}% of {plan.table}")
+        df = self.execute_query(plan.sql, query_name, timeout, **query_options)
+        return add_confidence_intervals(df, plan, confidence)
+
+    def execute_progressive(
+        self,
+        query: str,
+        query_name: str = "Query",
+        percents: Sequence[float] = (1, 10, 100),
+        seed: int = 42,
+        confidence: float = 0.95,
+        timeout: Optional[float] = 30,
+        **query_options,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Refine an aggregate query's result over growing samples.
+
+        Yields one execute_approximate() result per entry of ``percents``;
+        100 runs the original query exactly. Stop iterating once the
+        estimate is good enough and the larger scans are never started::
+
+            for df in client.execute_progressive(query, "Delays"):
+                print(df.attrs["sample_percent"], df)
+
+        Raises:
+            ValueError: Before the first run, if the query is not eligible
+                for sampling
+        """
+        for percent in percents:
+            plan_approximate(query, percent, seed)
+        return (
+            self.execute_approximate(
+                query,
+                f"{query_name} ({percent:g}%)",
+                sample_percent=percent,
+                seed=seed,
+                confidence=confidence,
+                timeout=timeout,
+                **query_options,
+            )
+            for percent in percents
+        )
+
+    def _rows_to_percent(
+        self, query: str, sample_rows: int, timeout: Optional[float]
+    ) -> float:
+        """
+        Sample percentage that reads about ``sample_rows`` rows.
+
+        Spark's ``TABLESAMPLE (n ROWS)`` is a LIMIT rather than a random
+        sample, so the row count (served from Delta metadata) is used to
+        turn a row target into a percentage instead.
+        """
+        if sample_rows < 1:
+            raise ValueError("sample_rows must be at least 1")
+        table = sampled_table(query)
+        counted = self.execute_query(
+            f"SELECT COUNT(*) AS row_count FROM {table}", f"Count {table}", timeout
+        )
+        total = int(counted["row_count"].iloc[0])
+        return 100.0 if total <= sample_rows else sample_rows * 100.0 / total
+
+    def _submit_statement(
+        self,
+        query: str,
+        query_name: str,
+        wait_timeout: int,
+        disposition: str = "INLINE",
+        metrics: Optional[QueryMetrics] = None,
+        parameters: Optional[List[dict]] = None,
+    ) -> dict:
+        """
+        POST the statement and return the API response.
+
+        A statement that is still running is tracked as in flight until
+        _wait_for_statement() sees it finish. The POST runs on a helper
+        thread: if the caller is interrupted while the server is still
+        holding it (Ctrl-C during ``wait_timeout``), the statement is
+        cancelled as soon as its statement_id arrives.
+        """
+        payload = self._statement_payload(query, wait_timeout, disposition, parameters)
 
         if self.debug:
             print(f"🔄 Executing: {query_name}")
-            print(f"🔍 Timeout: {api_timeout}s")
+            print(f"🔍 Timeout: {wait_timeout}s")
+
+        with self._in_flight_lock:
+            generation = self._cancel_generation
+
+        outcome: Dict[str, Any] = {}
+        outcome_lock = threading.Lock()
 
+        def post():
+            try:
+                response = self._api_json(
+                    "POST",
+                    "/api/2.0/sql/statements",
+                    timeout=wait_timeout + 10,
+                    metrics=metrics,
+                    phase="submit",
+                    idempotent=False,
+                    json=payload,
+                )
+            except BaseException as e:
+                outcome["error"] = e
+                return
+            with outcome_lock:
+                outcome["result"] = response
+                abandoned = outcome.get("abandoned", False)
+            if abandoned:
+                self._cancel_submitted(response, query_name)
+
+        poster = threading.Thread(target=post, name="databricks-submit", daemon=True)
+        poster.start()
         try:
-            response = requests.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=api_timeout + 10,
-                verify=False,
-            )
+            poster.join()
+        except BaseException:
+            with outcome_lock:
+                outcome["abandoned"] = True
+                result = outcome.get("result")
+            if result is not None:
+                self._cancel_submitted(result, query_name)
+            raise
+        if "error" in outcome:
+            raise outcome["error"]
 
-            if response.status_code == 200:
-                result = response.json()
+        result = outcome["result"]
+        statement_id = result.get("statement_id")
+        if metrics is not None:
+            metrics.statement_id = statement_id
 
-                if self.debug:
-                    print(f"🔍 API response keys: {list(result.keys())}")
-
-                if "result" in result:
-                    # Extract column information - try multiple locations
-                    columns = []
-
-                    # Try result.manifest.schema.columns first
-                    if (
-                        "manifest" in result["result"]
-                        and "schema" in result["result"]["manifest"]
-                    ):
-                        columns = [
-                            col["name"]
-                            for col in result["result"]["manifest"]["schema"]["columns"]
-                        ]
-
-                    # Try top-level manifest.schema.columns as backup
-                    elif "manifest" in result and "schema" in result["manifest"]:
-                        columns = [
-                            col["name"]
-                            for col in result["manifest"]["schema"]["columns"]
-                        ]
-
-                    if self.debug and not columns:
-                        print(f"🔍 Could not find columns in response structure")
-                        if "manifest" in result:
-                            print(
-                                f"🔍 Top-level manifest keys: {list(result['manifest'].keys())}"
-                            )
-                        if "result" in result and "manifest" in result["result"]:
-                            print(
-                                f"🔍 Result manifest keys: {list(result['result']['manifest'].keys())}"
-                            )
-
-                    if self.debug and columns:
-                        print(f"🔍 Found {len(columns)} columns: {columns}")
-
-                    # Extract data
-                    data = result["result"].get("data_array", [])
-
-                    if data and columns:
-                        df = pd.DataFrame(data, columns=columns)
-                        if self.debug:
-                            print(f"✅ Success: {len(df)} rows returned")
-                        return df
-                    elif data and not columns:
-                        # Fallback: return data without column names
-                        df = pd.DataFrame(data)
-                        if self.debug:
-                            print(f"⚠️ Got {len(data)} rows but no column info")
-                        return df
+        if statement_id and self._statement_state(result) in self.PENDING_STATES:
+            with self._in_flight_lock:
+                cancelled = generation != self._cancel_generation
+                if not cancelled:
+                    self._in_flight[statement_id] = query_name
+            if cancelled:
+                self._cancel_quietly(statement_id, query_name)
+                raise RuntimeError(f"{query_name} was cancelled by cancel_all()")
+        return result
+
+    def _cancel_submitted(self, result: dict, query_name: str):
+        """Cancel a statement whose submit was abandoned, if it is still running."""
+        statement_id = result.get("statement_id")
+        if statement_id and self._statement_state(result) in self.PENDING_STATES:
+            self._cancel_quietly(statement_id, query_name)
+
+    def _get_statement(
+        self, statement_id: str, metrics: Optional[QueryMetrics] = None
+    ) -> dict:
+        """Fetch the current status (and result, once finished) of a statement."""
+        return self._api_json(
+            "GET",
+            f"/api/2.0/sql/statements/{statement_id}",
+            timeout=30,
+            metrics=metrics,
+        )
+
+    def _api_json(
+        self,
+        method: str,
+        path: str,
+        timeout: float,
+        metrics: Optional[QueryMetrics] = None,
+        phase: Optional[str] = None,
+        idempotent: bool = True,
+        **kwargs,
+    ) -> dict:
+        """
+        Send an API request and return the decoded JSON body.
+
+        Transient failures are retried according to ``retry_policy``; pass
+        ``idempotent=False`` for requests that must not run twice.
+
+        With ``metrics``, the response size and decode time are recorded, and
+        the request time is added to ``phase``. For ``phase="submit"`` it is
+        split into server_wait (until the response headers arrived) and
+        request_send (the rest).
+        """
+        start = time.perf_counter()
+        response = self._send_with_retries(
+            lambda: self._api_request(method, path, timeout=timeout, **kwargs),
+            f"{method} {path}",
+            idempotent=idempotent,
+            metrics=metrics,
+            breaker=self.circuit_breaker,
+        )
+
+        self._raise_for_response(response)
+        if metrics is None:
+            return response.json()
+
+        elapsed = time.perf_counter() - start
+        if phase == "submit":
+            server_wait = min(response.elapsed.total_seconds(), elapsed)
+            metrics.add_time("server_wait", server_wait)
+            metrics.add_time("request_send", elapsed - server_wait)
+        elif phase is not None:
+            metrics.add_time(phase, elapsed)
+        metrics.increment(bytes=len(response.content))
+        with metrics.phase("json_decode"):
+            return response.json()
+
+    def _send_with_retries(
+        self,
+        send: Callable[[], requests.Response],
+        description: str,
+        idempotent: bool = True,
+        metrics: Optional[QueryMetrics] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> requests.Response:
+        """
+        Call ``send`` until it succeeds, fails permanently or runs out of tries.
+
+        Retryable statuses (see RetryPolicy) are repeated after a backoff or
+        the server's Retry-After delay; the last response is returned either
+        way. Network errors are repeated for idempotent requests, and for
+        others only if the connection was never established. ``breaker``
+        sees 5xx responses and network errors as failures.
+
+        Raises:
+            RuntimeError: On a network error that is not retried
+            CircuitOpenError: If ``breaker`` is open
+        """
+        requests = _import_requests()
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_request(self.hostname)
+            try:
+                response = send()
+            except requests.exceptions.RequestException as e:
+                if breaker is not None:
+                    breaker.record_failure()
+                retryable = idempotent or _request_not_sent(e)
+                if not retryable or attempt + 1 >= policy.max_attempts:
+                    raise RuntimeError(f"Network error: {e}") from e
+                delay = policy.delay(attempt)
+                reason = type(e).__name__
+            else:
+                if breaker is not None:
+                    if response.status_code >= 500:
+                        breaker.record_failure()
                     else:
-                        if self.debug:
-                            print(
-                                f"⚠️ No data returned (data: {len(data) if data else 0}, columns: {len(columns) if columns else 0})"
-                            )
-                        return pd.DataFrame()
-                else:
-                    # Handle query execution states
-                    status = result.get("status", {})
-                    state = status.get("state", "unknown")
-
-                    if state == "FAILED" and "error" in status:
-                        error_info = status["error"]
-                        error_msg = error_info.get("message", "Unknown error")
-                        error_code = error_info.get("error_code", "UNKNOWN")
-                        raise RuntimeError(
-                            f"Query failed: {error_msg} (Code: {error_code})"
+                        breaker.record_success()
+                if (
+                    not policy.should_retry_status(response.status_code, idempotent)
+                    or attempt + 1 >= policy.max_attempts
+                ):
+                    return response
+                delay = policy.delay(attempt, response.headers.get("Retry-After"))
+                reason = f"HTTP {response.status_code}"
+                response.close()
+
+            attempt += 1
+            if metrics is not None:
+                metrics.increment(retries=1)
+            if self.debug:
+                print(
+                    f"🔁 {description} failed ({reason}), retry "
+                    f"{attempt}/{policy.max_attempts - 1} in {delay:.2f}s"
+                )
+            time.sleep(delay)
+
+    def _wait_for_statement(
+        self,
+        result: dict,
+        query_name: str,
+        timeout: Optional[float],
+        deadline: Optional[float],
+        metrics: Optional[QueryMetrics] = None,
+    ) -> dict:
+        """
+        Poll until the statement reaches a terminal state.
+
+        The first poll is immediate and the interval then starts short, so
+        quick statements return promptly, and grows geometrically up to
+        ``max_poll_interval`` for long ones.
+
+        If waiting ends early (deadline, Ctrl-C, a failed status request) the
+        statement is cancelled on the warehouse instead of left running.
+        """
+        start = time.perf_counter()
+        # The submit already waited on the server (or deliberately did not),
+        # so the first status check is immediate; later ones back off
+        delay = 0.0
+        interval = self.poll_interval
+        statement_id = result.get("statement_id")
+        try:
+            while self._statement_state(result) in self.PENDING_STATES:
+                state = self._statement_state(result)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"{query_name} did not finish within {timeout}s "
+                            f"(statement {statement_id} was {state}, now cancelled)"
                         )
-                    else:
-                        if self.debug:
-                            print(f"⚠️ Query status: {state}")
-                        return pd.DataFrame()
+                    delay = min(delay, remaining)
+
+                if self.debug:
+                    print(f"⏳ {query_name} is {state}, polling again in {delay:.2f}s")
+
+                time.sleep(delay)
+                delay = interval
+                interval = min(interval * 1.5, self.max_poll_interval)
+                result = self._get_statement(statement_id, metrics)
+                if metrics is not None:
+                    metrics.increment(polls=1)
+        except BaseException:
+            if statement_id:
+                self._cancel_quietly(statement_id, query_name)
+            raise
+
+        with self._in_flight_lock:
+            self._in_flight.pop(statement_id, None)
+        if metrics is not None:
+            metrics.add_time("polling", time.perf_counter() - start)
+        self._raise_for_state(result, query_name)
+        return result
+
+    def _raise_for_response(self, response: requests.Response):
+        """Turn a non-200 API response into a RuntimeError."""
+        if response.status_code != 200:
+            raise RuntimeError(
+                self._api_error_message(response.status_code, response.text)
+            )
+
+    def _result_to_dataframe(
+        self,
+        result: dict,
+        query_name: str,
+        metrics: Optional[QueryMetrics] = None,
+        memory: Optional[MemoryPlan] = None,
+    ) -> pd.DataFrame:
+        """Build a DataFrame from a finished statement, fetching every chunk."""
+        result_format = self._result_format(result)
+        columns = self._column_names(result)
+        pieces = list(
+            self._iter_result_chunks(result, query_name, metrics=metrics, memory=memory)
+        )
 
+        start = time.perf_counter()
+        if result_format == "ARROW_STREAM":
+            df = self._arrow_to_dataframe(pieces, columns)
+        elif memory is not None:
+            df = memory.combine(pieces)
+        elif len(pieces) == 1:
+            df = pieces[0]
+        else:
+            df = _import_pandas().concat(pieces, ignore_index=True)
+        if memory is not None:
+            df = memory.finish(df)
+        if metrics is not None:
+            metrics.add_time("dataframe_build", time.perf_counter() - start)
+
+        if self.debug:
+            print(f"✅ Success: {len(df)} rows returned ({len(pieces)} chunk(s))")
+            if memory is not None:
+                report = df.attrs["memory"]
+                print(
+                    f"🧮 Memory: {report['before'] / 1e6:.1f} MB -> "
+                    f"{report['after'] / 1e6:.1f} MB "
+                    f"({len(report['converted'])} column(s) converted)"
+                )
+        return df
+
+    def _iter_result_chunks(
+        self,
+        result: dict,
+        query_name: str,
+        max_in_flight: Optional[int] = None,
+        metrics: Optional[QueryMetrics] = None,
+        memory: Optional[MemoryPlan] = None,
+        stacklevel: int = 4,
+    ) -> Iterator:
+        """
+        Yield each result chunk decoded, in chunk order.
+
+        JSON_ARRAY chunks are decoded to DataFrames and ARROW_STREAM chunks to
+        ``pyarrow.Table`` objects. Chunks after the first are downloaded and
+        decoded on the client's chunk pool. At most ``max_in_flight`` chunks
+        (default ``chunk_workers * 2``) are downloading or waiting to be
+        consumed at once, so memory stays bounded while later chunks are still
+        arriving. The first chunk's rows are removed from ``result`` once
+        decoded so the response does not pin them in memory. A ``memory``
+        plan encodes each chunk as it is decoded. ``stacklevel`` points the
+        truncation warning at the public method's caller.
+        """
+        if self.debug:
+            print(f"🔍 API response keys: {list(result.keys())}")
+
+        manifest = self._manifest(result)
+        columns = self._schema_columns(result)
+        result_format = manifest.get("format", "JSON_ARRAY")
+
+        if self.debug:
+            if columns:
+                print(
+                    f"🔍 Found {len(columns)} columns: {[c['name'] for c in columns]}"
+                )
             else:
-                error_msg = f"API call failed with status {response.status_code}"
-                if response.text:
-                    try:
-                        error_detail = response.json()
-                        if "message" in error_detail:
-                            error_msg += f": {error_detail['message']}"
-                    except:
-                        error_msg += f": {response.text}"
+                print("🔍 Could not find columns in response structure")
 
-                raise RuntimeError(error_msg)
+        if manifest.get("truncated"):
+            warnings.warn(
+                f"{query_name}: result was truncated by the server row limit",
+                RuntimeWarning,
+                stacklevel=stacklevel,
+            )
 
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Network error: {e}")
+        statement_id = result.get("statement_id")
+        total_chunks = manifest.get("total_chunk_count")
+
+        first_chunk = result.pop("result", None) or {}
+        next_index = self._next_chunk_index(first_chunk)
+        decoded = self._decode_chunk(
+            first_chunk, columns, result_format, metrics, memory
+        )
+        del first_chunk
+        yield decoded
+        del decoded
+
+        if total_chunks is None:
+            # Older responses only link chunks one to the next
+            while next_index is not None:
+                chunk = self._fetch_chunk(statement_id, next_index, metrics)
+                yield self._decode_chunk(chunk, columns, result_format, metrics, memory)
+                next_index = self._next_chunk_index(chunk)
+            return
+
+        if total_chunks <= 1:
+            return
+
+        if self.debug:
+            print(f"📦 Fetching {total_chunks - 1} more chunk(s) for {query_name}")
+
+        pool = self._get_chunk_pool()
+        max_in_flight = max_in_flight or self.chunk_workers * 2
+        pending: Deque[Future] = deque()
+        next_index = 1
+        try:
+            while next_index < total_chunks or pending:
+                while next_index < total_chunks and len(pending) < max_in_flight:
+                    pending.append(
+                        pool.submit(
+                            self._fetch_and_decode_chunk,
+                            statement_id,
+                            next_index,
+                            columns,
+                            result_format,
+                            metrics,
+                            memory,
+                        )
+                    )
+                    next_index += 1
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _get_chunk_pool(self) -> ThreadPoolExecutor:
+        """Return the client's chunk download pool, creating it on first use."""
+        with self._sessions_lock:
+            if self._chunk_pool is None:
+                self._chunk_pool = ThreadPoolExecutor(
+                    max_workers=self.chunk_workers,
+                    thread_name_prefix="databricks-chunk",
+                )
+            return self._chunk_pool
+
+    def _fetch_chunk(
+        self,
+        statement_id: str,
+        chunk_index: int,
+        metrics: Optional[QueryMetrics] = None,
+    ) -> dict:
+        """Download one result chunk of a finished statement."""
+        return self._api_json(
+            "GET",
+            f"/api/2.0/sql/statements/{statement_id}/result/chunks/{chunk_index}",
+            timeout=60,
+            metrics=metrics,
+            phase="download",
+        )
+
+    def _fetch_and_decode_chunk(
+        self,
+        statement_id: str,
+        chunk_index: int,
+        columns: List[dict],
+        result_format: str,
+        metrics: Optional[QueryMetrics] = None,
+        memory: Optional[MemoryPlan] = None,
+    ):
+        """Download and decode one chunk; runs on the chunk pool."""
+        chunk = self._fetch_chunk(statement_id, chunk_index, metrics)
+        return self._decode_chunk(chunk, columns, result_format, metrics, memory)
+
+    def _decode_chunk(
+        self,
+        chunk: dict,
+        columns: List[dict],
+        result_format: str,
+        metrics: Optional[QueryMetrics] = None,
+        memory: Optional[MemoryPlan] = None,
+    ):
+        if result_format == "ARROW_STREAM":
+            table = self._download_arrow_chunk(chunk, metrics)
+            return table if memory is None else memory.encode_arrow(table)
+        if metrics is None:
+            df = self._chunk_to_dataframe(chunk, columns)
+            return df if memory is None else memory.encode_chunk(df)
+        metrics.increment(chunks=1)
+        with metrics.phase("dataframe_build"):
+            df = self._chunk_to_dataframe(chunk, columns)
+            return df if memory is None else memory.encode_chunk(df)
+
+    def _download_arrow_chunk(
+        self, chunk: dict, metrics: Optional[QueryMetrics] = None
+    ):
+        """Download the Arrow IPC stream(s) behind a chunk's external links."""
+        pa = _import_pyarrow()
+
+        tables = []
+        for link in chunk.get("external_links") or []:
+            # Pre-signed cloud storage URLs: never send the workspace token.
+            # Storage failures say nothing about the workspace: no breaker.
+            start = time.perf_counter()
+            response = self._send_with_retries(
+                lambda link=link: self._session().get(
+                    link["external_link"],
+                    headers=link.get("http_headers") or {},
+                    timeout=120,
+                ),
+                f"Downloading result chunk {link.get('chunk_index')}",
+                metrics=metrics,
+            )
+
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f"Downloading result chunk {link.get('chunk_index')} failed "
+                    f"with status {response.status_code}"
+                )
+
+            if metrics is not None:
+                metrics.add_time("download", time.perf_counter() - start)
+                metrics.increment(bytes=len(response.content), chunks=1)
+
+            start = time.perf_counter()
+            reader = pa.ipc.open_stream(pa.py_buffer(response.content))
+            tables.append(reader.read_all())
+            if metrics is not None:
+                metrics.add_time("dataframe_build", time.perf_counter() - start)
+
+        if not tables:
+            return None
+        return tables[0] if len(tables) == 1 else pa.concat_tables(tables)
 
     def test_connection(self) -> bool:
         """
@@ -341,24 +2183,99 @@ class DatabricksQueryClient:
             return False
 
 
+# Every open client, so statements still running at exit can be cancelled
+_LIVE_CLIENTS: "weakref.WeakSet[DatabricksQueryClient]" = weakref.WeakSet()
+
+
+@atexit.register
+def _cancel_at_exit():
+    """Cancel statements left running by clients alive at interpreter exit."""
+    for client in list(_LIVE_CLIENTS):
+        if not client._closed:
+            client.cancel_all()
+
+
 # Convenience functions for quick usage
+
+# Shared clients handed out by get_client(), keyed by resolved configuration
+_CLIENTS: Dict[tuple, "DatabricksQueryClient"] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(
+    env_path: Optional[Union[str, Path]] = None, debug: bool = False, **client_options
+) -> DatabricksQueryClient:
+    """
+    Return the process-wide client for a configuration, creating it once.
+
+    Clients are keyed by the resolved workspace, warehouse and token plus the
+    constructor options, so every caller with the same settings shares one
+    warm connection pool, chunk pool and result cache. Shared clients are
+    closed at interpreter exit or by close_clients(); one that was closed
+    directly is replaced on the next call.
+
+    Args:
+        env_path: Path to .env file. If None, tries multiple common locations.
+        debug: Enable debug logging.
+        **client_options: Other DatabricksQueryClient arguments; values must
+            be hashable.
+
+    Returns:
+        DatabricksQueryClient: The shared client
+    """
+    _load_environment(env_path, debug)
+    key = (
+        os.getenv("DATABRICKS_SERVER_HOSTNAME"),
+        os.getenv("DATABRICKS_HTTP_PATH"),
+        os.getenv("DATABRICKS_ACCESS_TOKEN"),
+        debug,
+        tuple(sorted(client_options.items())),
+    )
+
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None or client._closed:
+            client = DatabricksQueryClient(env_path, debug, **client_options)
+            _CLIENTS[key] = client
+        return client
+
+
+@atexit.register
+def close_clients():
+    """Close and forget every client created by get_client()."""
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+
 def query_databricks(
-    query: str, query_name: str = "Query", timeout: int = 30, debug: bool = False
+    query: str,
+    query_name: str = "Query",
+    timeout: int = 30,
+    debug: bool = False,
+    parameters: Optional[Mapping[str, Any]] = None,
 ) -> pd.DataFrame:
     """
     Convenience function to execute a single query without managing client instance.
 
+    Uses the shared client from get_client(), so repeated calls reuse its
+    connections instead of loading configuration and connecting again.
+
     Args:
         query: SQL SELECT query to execute
         query_name: Descriptive name for logging
         timeout: Query timeout in seconds
         debug: Enable debug logging
+        parameters: Values for the query's ``:name`` markers
 
     Returns:
         pandas.DataFrame: Query results
     """
-    client = DatabricksQueryClient(debug=debug)
-    return client.execute_query(query, query_name, timeout)
+    return get_client(debug=debug).execute_query(
+        query, query_name, timeout, parameters=parameters
+    )
 
 
 def test_databricks_connection(debug: bool = False) -> bool:
@@ -371,5 +2288,4 @@ def test_databricks_connection(debug: bool = False) -> bool:
     Returns:
         bool: True if connection successful
     """
-    client = DatabricksQueryClient(debug=debug)
-    return client.test_connection()
+    return get_client(debug=debug).test_connection()
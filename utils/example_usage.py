@@ -2,12 +2,14 @@
 # ABOUTME: Demonstrates various ways to use the utility library
 
 import sys
+from datetime import date
 from pathlib import Path
 
 # Add utils to path for importing
 sys.path.append(str(Path(__file__).parent))
 
 from databricks_query import DatabricksQueryClient, query_databricks
+from query_parameters import Identifier
 
 def main():
     """Demonstrate various usage patterns of the Databricks utility."""
@@ -44,16 +46,24 @@ def main():
         )
         print(f"✅ Basic test: {len(df1)} row(s)")
         
-        # Query 2: Steve's WPS data (sample)
+        # Query 2: Steve's WPS data (sample), with the table and dates as parameters
         wps_query = '''
         select device_id, product_seen_first, device_manufacturer_name
-        from wps.profile_by_device 
-        where product_seen_first > '2025-08-16' 
-          and product_seen_first <= '2025-08-18'
+        from :table
+        where product_seen_first > :start_date
+          and product_seen_first <= :end_date
         limit 3
         '''
         
-        df2 = client.execute_query(wps_query, "WPS Sample")
+        df2 = client.execute_query(
+            wps_query,
+            "WPS Sample",
+            parameters={
+                "table": Identifier("wps.profile_by_device"),
+                "start_date": date(2025, 8, 16),
+                "end_date": date(2025, 8, 18),
+            }
+        )
         print(f"✅ WPS sample: {len(df2)} row(s)")
         print("Sample WPS data:")
         print(df2)
@@ -0,0 +1,181 @@
+# ABOUTME: Incremental refresh of queries over a monotonically increasing column (e.g. a date)
+# ABOUTME: Stores the last result and re-runs the query only for rows past its high-water mark
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Tuple, Union
+
+try:
+    from .sql_names import quote_identifier
+except ImportError:  # utils/ itself is on sys.path (the temp_code scripts)
+    from sql_names import quote_identifier
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Used when no directory is given
+DEFAULT_INCREMENTAL_DIR = Path.home() / ".cache" / "databricks-eda" / "incremental"
+
+# Alias of the wrapped query in the incremental SELECT
+_INNER_ALIAS = "_incremental"
+
+
+def sql_literal(value: Any) -> str:
+    """
+    Render a watermark value as a Databricks SQL literal.
+
+    Dates (and midnight timestamps without a time zone, which is how DATE
+    columns decode) become ``DATE'...'``, other timestamps
+    ``TIMESTAMP'...'`` or ``TIMESTAMP_NTZ'...'``, numbers stay numbers and
+    anything else is quoted as a string.
+
+    Raises:
+        ValueError: If the value is missing (None, NaN, NaT)
+    """
+    import pandas as pd
+
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        raise ValueError("Watermark value is missing")
+    if isinstance(value, datetime.datetime):
+        value = pd.Timestamp(value)
+        if value.tzinfo is None and value == value.normalize():
+            return f"DATE'{value.date().isoformat()}'"
+        kind = "TIMESTAMP_NTZ" if value.tzinfo is None else "TIMESTAMP"
+        return f"{kind}'{value.isoformat(sep=' ')}'"
+    if isinstance(value, datetime.date):
+        return f"DATE'{value.isoformat()}'"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)) or pd.api.types.is_number(value):
+        return repr(value.item() if hasattr(value, "item") else value)
+    text = str(value).replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{text}'"
+
+
+def incremental_query(query: str, column: str, low: Any) -> str:
+    """
+    Restrict a query's result to ``column >= low``.
+
+    The query is wrapped in an outer filter, which Databricks pushes down
+    through projections, GROUP BY on the column and the preserved side of
+    outer joins, so only the new range is scanned.
+    """
+    query = query.strip().rstrip(";")
+    # Newlines keep a trailing line comment from swallowing the parenthesis
+    return (
+        f"SELECT * FROM (\n{query}\n) AS {_INNER_ALIAS}\n"
+        f"WHERE {_INNER_ALIAS}.{quote_identifier(column)} >= {sql_literal(low)}"
+    )
+
+
+def shift(value: Any, delta: Union[datetime.timedelta, int, float, None]) -> Any:
+    """
+    ``value - delta`` for a watermark.
+
+    For date and timestamp watermarks a number means days.
+    """
+    import pandas as pd
+
+    if not delta:
+        return value
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        if not isinstance(delta, datetime.timedelta):
+            delta = datetime.timedelta(days=delta)
+        if not isinstance(value, datetime.datetime):
+            return value - delta
+        return pd.Timestamp(value) - pd.Timedelta(delta)
+    if isinstance(delta, datetime.timedelta):
+        raise ValueError("A timedelta look-back needs a date or timestamp column")
+    return value - delta
+
+
+def merge_incremental(
+    stored: pd.DataFrame, fresh: pd.DataFrame, column: str, low: Any
+) -> pd.DataFrame:
+    """
+    Replace the stored rows from ``low`` on with a fresh result.
+
+    Rows at or after ``low`` were recomputed, so the stored ones are dropped
+    rather than updated: late-arriving data can change or remove groups.
+    """
+    import pandas as pd
+
+    kept = stored[~(stored[column] >= low)]
+    if fresh.empty:
+        return kept.reset_index(drop=True)
+    if kept.empty:
+        return fresh.reset_index(drop=True)
+    return pd.concat([kept, fresh], ignore_index=True)
+
+
+class IncrementalStore:
+    """
+    Results of incremental queries kept on local disk between runs.
+
+    Each entry is a Feather file holding the full merged result, plus a
+    small JSON file with the watermark column, its high-water mark and when
+    the result was last refreshed. Writes are atomic, so an interrupted
+    refresh leaves the previous result intact.
+    """
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            directory: Where results live. Defaults to
+                ~/.cache/databricks-eda/incremental.
+        """
+        self.directory = Path(directory) if directory else DEFAULT_INCREMENTAL_DIR
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def load(self, key: str) -> Optional[Tuple[pd.DataFrame, dict]]:
+        """The stored result and its metadata, or None."""
+        import pandas as pd
+
+        try:
+            meta = json.loads(self._path(key, "json").read_text())
+            df = pd.read_feather(self._path(key, "feather"))
+        except (OSError, ValueError):
+            return None
+        return df, meta
+
+    def save(self, key: str, df: pd.DataFrame, meta: dict) -> bool:
+        """
+        Store a result; False if it can't be stored as Feather.
+
+        The metadata is written last, so a result is only ever loaded
+        together with the metadata that describes it.
+        """
+        data_path = self._path(key, "feather")
+        meta_path = self._path(key, "json")
+        suffix = f".{os.getpid()}.tmp"
+        tmp_data = data_path.with_name(data_path.name + suffix)
+        tmp_meta = meta_path.with_name(meta_path.name + suffix)
+        try:
+            df.reset_index(drop=True).to_feather(tmp_data, compression="zstd")
+        except Exception:
+            # pyarrow rejects duplicate column names and mixed-type object columns
+            tmp_data.unlink(missing_ok=True)
+            return False
+        meta_path.unlink(missing_ok=True)
+        os.replace(tmp_data, data_path)
+        tmp_meta.write_text(json.dumps({**meta, "stored_at": time.time()}))
+        os.replace(tmp_meta, meta_path)
+        return True
+
+    def delete(self, key: str):
+        """Forget one result, so its next run is a full one."""
+        for suffix in ("json", "feather"):
+            self._path(key, suffix).unlink(missing_ok=True)
+
+    def clear(self):
+        """Forget every stored result."""
+        for path in self.directory.glob("*.*"):
+            path.unlink(missing_ok=True)
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.directory / f"{key}.{suffix}"
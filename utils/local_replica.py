@@ -0,0 +1,379 @@
+# ABOUTME: Local analytical replica of Databricks table slices, stored as Parquet and queried with DuckDB
+# ABOUTME: Materializes a filtered or sampled slice once so follow-up queries run in-process
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    from .approximate import sample_percent_literal
+    from .sql_fingerprint import tokenize_sql
+    from .sql_names import quote_identifier
+except ImportError:  # utils/ itself is on sys.path (the temp_code scripts)
+    from approximate import sample_percent_literal
+    from sql_fingerprint import tokenize_sql
+    from sql_names import quote_identifier
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Used when no directory is given
+DEFAULT_REPLICA_DIR = Path.home() / ".cache" / "databricks-eda" / "replicas"
+
+_MANIFEST = "replica.json"
+_SKIPPED = ("line_comment", "block_comment", "whitespace")
+
+
+def _import_duckdb():
+    """Import duckdb on demand; it is only needed for local queries."""
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError(
+            "duckdb is required for local replicas. "
+            "Install it with: pip install duckdb"
+        ) from e
+    return duckdb
+
+
+class ReplicaInfo(NamedTuple):
+    """
+    A materialized table slice.
+
+    Attributes:
+        table: Canonical table name (unquoted, lower-case parts)
+        query: The Databricks query the slice was read with
+        path: Directory holding the slice's Parquet files
+        rows: Rows in the slice
+        bytes: Size of the Parquet files
+        created_at: Unix time the slice was materialized
+    """
+
+    table: str
+    query: str
+    path: Path
+    rows: int
+    bytes: int
+    created_at: float
+
+
+def _name_parts(tokens: Sequence[Tuple[str, str]]) -> Optional[List[str]]:
+    """Unquoted parts of a dotted name, or None if the tokens are not one."""
+    parts = []
+    for index, (kind, text) in enumerate(tokens):
+        if index % 2:
+            if text != ".":
+                return None
+        elif kind == "word":
+            parts.append(text)
+        elif kind == "quoted_ident" and text.startswith("`"):
+            part = text[1:-1].replace("``", "`")
+            if "." in part:
+                # `a.b` is one name; keyed as a.b it would alias the table a.b
+                return None
+            parts.append(part)
+        else:
+            return None
+    return parts if len(tokens) % 2 else None
+
+
+def table_key(table: str) -> str:
+    """
+    Canonical form of a table name, as replicas are keyed.
+
+    ``Main.Sales.`Orders``` and ``main.sales.orders`` give the same key.
+
+    Raises:
+        ValueError: If ``table`` is not a (qualified) table name
+    """
+    parts = _name_parts([tuple(token) for token in tokenize_sql(table.strip())])
+    if not parts or len(parts) > 3:
+        raise ValueError(f"Invalid table name: {table!r}")
+    return ".".join(part.lower() for part in parts)
+
+
+def _duckdb_identifier(key: str) -> str:
+    return '"' + key.replace('"', '""') + '"'
+
+
+def _duckdb_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class LocalReplica:
+    """
+    Slices of Databricks tables kept on local disk for fast iteration.
+
+    ``materialize()`` streams a filtered and/or sampled slice of a table
+    into Parquet once. ``query()`` then runs SQL against the slices
+    in-process with DuckDB: references to a replicated table name are
+    pointed at its local copy, so the same query text works locally and on
+    the warehouse. Slices survive restarts; materializing a table again
+    replaces its slice.
+
+    DuckDB's SQL dialect is close to Databricks SQL for typical EDA queries
+    (aggregates, CASE, TRY_CAST, window functions), but not identical.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        compression: str = "zstd",
+    ):
+        """
+        Initialize the replica store.
+
+        Args:
+            directory: Where slices live. Defaults to
+                ~/.cache/databricks-eda/replicas.
+            compression: Parquet compression codec.
+        """
+        self.directory = Path(directory) if directory else DEFAULT_REPLICA_DIR
+        self.compression = compression
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def materialize(
+        self,
+        client,
+        table: str,
+        columns: Optional[Sequence[str]] = None,
+        where: Optional[str] = None,
+        sample_percent: Optional[float] = None,
+        seed: int = 42,
+        limit: Optional[int] = None,
+        timeout: Optional[float] = 600,
+    ) -> ReplicaInfo:
+        """
+        Copy a slice of a table into local Parquet files.
+
+        The slice is read with one query and streamed to disk chunk by
+        chunk as Arrow, so it never has to fit in memory.
+
+        Args:
+            client: A DatabricksQueryClient
+            table: Table to copy, optionally qualified
+            columns: Only copy these columns (default: all)
+            where: SQL condition rows must satisfy, e.g. ``"Year = 2008"``
+            sample_percent: Copy a random sample of this share of the rows
+                (``TABLESAMPLE ... REPEATABLE (seed)``)
+            seed: Sampling seed
+            limit: Copy at most this many rows
+            timeout: Deadline in seconds for the query
+
+        Returns:
+            ReplicaInfo: The new slice
+
+        Raises:
+            ValueError: If an argument is invalid or the query fails safety
+                checks
+            RuntimeError: If the query fails
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        key = table_key(table)
+        if sample_percent is not None and not 0 < sample_percent <= 100:
+            raise ValueError("sample_percent must be in (0, 100]")
+
+        select_list = (
+            ", ".join(quote_identifier(c) for c in columns) if columns else "*"
+        )
+        query = f"SELECT {select_list} FROM {table}"
+        if sample_percent is not None and sample_percent < 100:
+            query += (
+                f" TABLESAMPLE ({sample_percent_literal(sample_percent)} PERCENT)"
+                f" REPEATABLE ({int(seed)})"
+            )
+        if where:
+            query += f" WHERE {where}"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+
+        # Write next to the old slice and swap, so readers never see half
+        target = self._path(key)
+        staging = self.directory / f".{target.name}-{os.urandom(8).hex()}"
+        staging.mkdir()
+        try:
+            rows = 0
+            writer = None
+            try:
+                for batch in client.execute_query_iter(
+                    query,
+                    f"Replicate {key}",
+                    timeout,
+                    disposition="EXTERNAL_LINKS",
+                    as_arrow=True,
+                ):
+                    if writer is None:
+                        writer = pq.ParquetWriter(
+                            staging / "part-0.parquet",
+                            batch.schema,
+                            compression=self.compression,
+                        )
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+            finally:
+                if writer is not None:
+                    writer.close()
+            if writer is None:
+                # No rows: keep the columns so queries still resolve them
+                empty = client.execute_query(
+                    f"SELECT {select_list} FROM {table} LIMIT 0",
+                    f"Replicate {key} (schema)",
+                    timeout,
+                )
+                pq.write_table(
+                    pa.Table.from_pandas(empty, preserve_index=False),
+                    staging / "part-0.parquet",
+                    compression=self.compression,
+                )
+
+            info = {
+                "table": key,
+                "query": query,
+                "rows": rows,
+                "created_at": time.time(),
+            }
+            (staging / _MANIFEST).write_text(json.dumps(info))
+            with self._lock:
+                if target.exists():
+                    shutil.rmtree(target)
+                staging.rename(target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return self._read_info(target)
+
+    def get(self, table: str) -> Optional[ReplicaInfo]:
+        """The slice of a table, or None if it has not been materialized."""
+        return self._read_info(self._path(table_key(table)))
+
+    def tables(self) -> List[ReplicaInfo]:
+        """Every materialized slice."""
+        # Dot-prefixed directories are slices still being written
+        paths = sorted(self.directory.glob("[!.]*"))
+        infos = (self._read_info(path) for path in paths)
+        return [info for info in infos if info is not None]
+
+    def drop(self, table: str):
+        """Delete a table's slice, if there is one."""
+        with self._lock:
+            shutil.rmtree(self._path(table_key(table)), ignore_errors=True)
+
+    def rewrite(self, query: str) -> Tuple[str, List[str]]:
+        """
+        Point a query's replicated table names at their local copies.
+
+        Returns:
+            tuple: ``(duckdb_sql, replicated_tables)``; the list is empty if
+            the query names no replicated table.
+        """
+        tokens = [tuple(token) for token in tokenize_sql(query.strip().rstrip(";"))]
+        sig = [i for i, (kind, _) in enumerate(tokens) if kind not in _SKIPPED]
+        replicated = {path.name for path in self.directory.iterdir()}
+        replace = {}  # first token index -> (last token index, key)
+        used: List[str] = []
+        pos = 0
+        while pos < len(sig):
+            # The longest dotted name starting here (at most three parts)
+            end = pos
+            while (
+                end + 2 < len(sig)
+                and end - pos < 4
+                and tokens[sig[end + 1]][1] == "."
+                and tokens[sig[end + 2]][0] in ("word", "quoted_ident")
+            ):
+                end += 2
+            after_dot = pos > 0 and tokens[sig[pos - 1]][1] == "."
+            is_call = end + 1 < len(sig) and tokens[sig[end + 1]][1] == "("
+            parts = _name_parts([tokens[i] for i in sig[pos : end + 1]])
+            key = ".".join(p.lower() for p in parts) if parts else None
+            if (
+                key
+                and not after_dot
+                and not is_call
+                and self._path(key).name in replicated
+            ):
+                replace[sig[pos]] = (sig[end], key)
+                if key not in used:
+                    used.append(key)
+            pos = end + 1
+
+        parts_out = []
+        index = 0
+        while index < len(tokens):
+            if index in replace:
+                last, key = replace[index]
+                parts_out.append(_duckdb_identifier(key))
+                index = last + 1
+            else:
+                parts_out.append(tokens[index][1])
+                index += 1
+        return "".join(parts_out), used
+
+    def query(self, query: str) -> pd.DataFrame:
+        """
+        Run a query against the local slices.
+
+        Raises:
+            LookupError: If the query names no replicated table
+            RuntimeError: If DuckDB fails to run the query
+        """
+        duckdb = _import_duckdb()
+        sql, used = self.rewrite(query)
+        if not used:
+            raise LookupError(
+                "Query names no replicated table; materialize one first "
+                f"(replicated: {', '.join(i.table for i in self.tables()) or 'none'})"
+            )
+
+        with self._lock:
+            if self._connection is None:
+                self._connection = duckdb.connect()
+            for key in used:
+                files = _duckdb_string(str(self._path(key) / "*.parquet"))
+                self._connection.execute(
+                    f"CREATE OR REPLACE VIEW {_duckdb_identifier(key)} AS "
+                    f"SELECT * FROM read_parquet({files})"
+                )
+            # Cursors are independent connections to the same database
+            cursor = self._connection.cursor()
+        try:
+            return cursor.execute(sql).df()
+        except duckdb.Error as e:
+            raise RuntimeError(f"Local query failed: {e}") from e
+        finally:
+            cursor.close()
+
+    def close(self):
+        """Close the DuckDB connection; slices stay on disk."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _path(self, key: str) -> Path:
+        safe = re.sub(r"[^a-z0-9_.-]", "_", key)
+        digest = hashlib.sha256(key.encode()).hexdigest()[:8]
+        return self.directory / f"{safe}-{digest}"
+
+    def _read_info(self, path: Path) -> Optional[ReplicaInfo]:
+        try:
+            info = json.loads((path / _MANIFEST).read_text())
+        except (OSError, ValueError):
+            return None
+        size = sum(f.stat().st_size for f in path.glob("*.parquet"))
+        return ReplicaInfo(
+            info["table"], info["query"], path, info["rows"], size, info["created_at"]
+        )
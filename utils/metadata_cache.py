@@ -0,0 +1,411 @@
+# ABOUTME: Local cache of catalog, schema, table and column metadata with an in-memory search index
+# ABOUTME: Loads information_schema once per catalog so schema discovery skips the warehouse
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    from .local_replica import table_key
+    from .sql_names import base_type
+except ImportError:  # utils/ itself is on sys.path (the temp_code scripts)
+    from local_replica import table_key
+    from sql_names import base_type
+
+# Used when no directory is given
+DEFAULT_METADATA_DIR = Path.home() / ".cache" / "databricks-eda" / "metadata"
+
+_IDENTIFIER = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class ColumnInfo(NamedTuple):
+    """
+    One column of a table.
+
+    Attributes:
+        catalog: Catalog name, or "" when the table was looked up with a
+            name that has no catalog part
+        schema: Schema name, or "" when unknown
+        table: Table name
+        column: Column name
+        position: Position in the table, from 0
+        data_type: Full type, e.g. ``decimal(10,2)`` or ``array<string>``
+        nullable: Whether the column accepts NULL
+        comment: Column comment, if any
+    """
+
+    catalog: str
+    schema: str
+    table: str
+    column: str
+    position: int
+    data_type: str
+    nullable: bool
+    comment: Optional[str]
+
+
+def _text(value) -> Optional[str]:
+    """A string cell, or None for NULL (None or NaN) and empty strings."""
+    return value if isinstance(value, str) and value else None
+
+
+def _safe_name(name: str) -> str:
+    """A file name for ``name`` that can't collide with another one."""
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", name)[:60]
+    return f"{safe}-{hashlib.sha256(name.encode()).hexdigest()[:8]}"
+
+
+class MetadataCache:
+    """
+    Table and column metadata kept locally so lookups skip the warehouse.
+
+    A catalog's columns are read from ``<catalog>.information_schema.columns``
+    in one query and stored as a JSON snapshot per workspace and catalog.
+    Tables named without a catalog are looked up with DESCRIBE TABLE and
+    cached individually. Snapshots expire after ``ttl`` seconds and can be
+    dropped with invalidate().
+
+    Everything loaded is indexed in memory by table and by column name, so
+    get_columns() and find_columns() answer without I/O. Safe to share
+    between threads and clients.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        ttl: Optional[float] = 24 * 3600,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Where snapshots live. Defaults to
+                ~/.cache/databricks-eda/metadata.
+            ttl: Seconds a snapshot stays fresh, or None for no expiry.
+        """
+        self.directory = Path(directory) if directory else DEFAULT_METADATA_DIR
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # (workspace, catalog) -> columns; catalog "" holds DESCRIBE lookups
+        self._catalogs: Dict[Tuple[str, str], List[ColumnInfo]] = {}
+        # Indexes over _catalogs, rebuilt whenever it changes
+        self._tables: Dict[Tuple[str, str], List[ColumnInfo]] = {}
+        self._by_name: Dict[Tuple[str, str], List[ColumnInfo]] = {}
+
+    # Lookups
+
+    def catalog_columns(
+        self, client, catalog: str, refresh: bool = False
+    ) -> List[ColumnInfo]:
+        """
+        Every column of every table in a catalog, loading it if needed.
+
+        Args:
+            client: A DatabricksQueryClient
+            catalog: Catalog name
+            refresh: Re-read information_schema even if a fresh snapshot
+                exists
+
+        Raises:
+            ValueError: If the catalog name is invalid
+            RuntimeError: If the query fails
+        """
+        catalog = catalog.lower()
+        if not _IDENTIFIER.match(catalog):
+            raise ValueError(f"Invalid catalog name: {catalog!r}")
+        workspace = client.hostname
+        if not refresh:
+            columns = self._loaded(workspace, catalog)
+            if columns is not None:
+                return columns
+
+        described = client.execute_query(
+            f"""
+            SELECT table_schema, table_name, column_name, ordinal_position,
+                   full_data_type, is_nullable, comment
+            FROM `{catalog}`.information_schema.columns
+            WHERE table_schema <> 'information_schema'
+            ORDER BY table_schema, table_name, ordinal_position
+            """,
+            f"Metadata {catalog}",
+            timeout=120,
+            cache="bypass",
+        )
+        columns = [
+            ColumnInfo(
+                catalog,
+                schema.lower(),
+                table.lower(),
+                column,
+                int(position),
+                data_type.lower(),
+                nullable == "YES",
+                _text(comment),
+            )
+            for schema, table, column, position, data_type, nullable, comment in zip(
+                described["table_schema"],
+                described["table_name"],
+                described["column_name"],
+                described["ordinal_position"],
+                described["full_data_type"],
+                described["is_nullable"],
+                described["comment"],
+            )
+        ]
+        self._store(workspace, catalog, columns)
+        return columns
+
+    def get_columns(
+        self, client, table: str, refresh: bool = False
+    ) -> List[ColumnInfo]:
+        """
+        A table's columns in order.
+
+        Fully qualified names are served from their catalog's snapshot;
+        other names are looked up once with DESCRIBE TABLE.
+
+        Raises:
+            ValueError: If the table name is invalid
+            LookupError: If the catalog has no such table
+            RuntimeError: If a query fails
+        """
+        key = table_key(table)
+        parts = key.split(".")
+        workspace = client.hostname
+        if len(parts) == 3:
+            self.catalog_columns(client, parts[0], refresh=refresh)
+            with self._lock:
+                columns = self._tables.get((workspace, key))
+            if columns is None:
+                raise LookupError(f"Table not found in {parts[0]}: {table}")
+            return list(columns)
+
+        if not refresh:
+            with self._lock:
+                self._loaded(workspace, "", lock=False)
+                columns = self._tables.get((workspace, key))
+            if columns is not None:
+                return list(columns)
+
+        described = client.execute_query(
+            f"DESCRIBE TABLE {table}", f"Describe {table}", cache="bypass"
+        )
+        schema = parts[0] if len(parts) == 2 else ""
+        columns = []
+        for position, (name, data_type, comment) in enumerate(
+            zip(described["col_name"], described["data_type"], described["comment"])
+        ):
+            # Partition and metadata sections follow the columns
+            if not name or name.startswith("#"):
+                break
+            columns.append(
+                ColumnInfo(
+                    "",
+                    schema,
+                    parts[-1],
+                    name,
+                    position,
+                    data_type.lower(),
+                    True,
+                    _text(comment),
+                )
+            )
+
+        with self._lock:
+            others = [
+                info
+                for info in self._loaded(workspace, "", lock=False) or ()
+                if (info.schema, info.table) != (schema, parts[-1])
+            ]
+        self._store(workspace, "", others + columns)
+        return columns
+
+    def list_schemas(self, client, catalog: str) -> List[str]:
+        """Schemas of a catalog that have tables."""
+        columns = self.catalog_columns(client, catalog)
+        return sorted({info.schema for info in columns})
+
+    def list_tables(
+        self, client, catalog: str, schema: Optional[str] = None
+    ) -> List[str]:
+        """Fully qualified names of a catalog's tables, optionally of one schema."""
+        columns = self.catalog_columns(client, catalog)
+        names = {
+            f"{info.catalog}.{info.schema}.{info.table}"
+            for info in columns
+            if schema is None or info.schema == schema.lower()
+        }
+        return sorted(names)
+
+    def find_columns(
+        self,
+        client,
+        pattern: str = "*",
+        data_type: Union[str, Sequence[str], None] = None,
+        catalogs: Optional[Sequence[str]] = None,
+    ) -> List[ColumnInfo]:
+        """
+        Search column metadata by name and type.
+
+        Args:
+            client: A DatabricksQueryClient (for its workspace and to load
+                catalogs that are not cached yet)
+            pattern: Column name or case-insensitive glob, e.g. ``"*delay*"``
+            data_type: Only columns of these base types, e.g. ``"timestamp"``
+                or ``("int", "bigint")``
+            catalogs: Catalogs to search, loading them if needed. Defaults
+                to every catalog already cached for the workspace.
+
+        Returns:
+            list: Matching ColumnInfo, ordered by table and position
+        """
+        workspace = client.hostname
+        if catalogs is None:
+            self._load_snapshots(workspace)
+        else:
+            for catalog in catalogs:
+                self.catalog_columns(client, catalog)
+        wanted = None
+        if data_type is not None:
+            types = [data_type] if isinstance(data_type, str) else data_type
+            wanted = {base_type(name) for name in types}
+        searched = None if catalogs is None else {c.lower() for c in catalogs}
+
+        pattern = pattern.lower()
+        with self._lock:
+            if any(char in pattern for char in "*?["):
+                names = fnmatch.filter(
+                    (name for ws, name in self._by_name if ws == workspace), pattern
+                )
+            else:
+                names = [pattern]
+            matches = [
+                info
+                for name in names
+                for info in self._by_name.get((workspace, name), ())
+                if (wanted is None or base_type(info.data_type) in wanted)
+                and (searched is None or info.catalog in searched)
+            ]
+        return sorted(matches, key=lambda i: (i.catalog, i.schema, i.table, i.position))
+
+    # Invalidation
+
+    def invalidate(self, catalog: Optional[str] = None, table: Optional[str] = None):
+        """
+        Drop cached metadata so the next lookup reads it again.
+
+        With no arguments everything is dropped. A fully qualified ``table``
+        drops its catalog's snapshot; other table names drop every
+        DESCRIBE lookup.
+        """
+        if table is not None:
+            parts = table_key(table).split(".")
+            catalog = parts[0] if len(parts) == 3 else ""
+
+        with self._lock:
+            if catalog is None:
+                paths = list(self.directory.glob("*/*.json"))
+                self._catalogs.clear()
+            else:
+                catalog = catalog.lower()
+                paths = list(self.directory.glob(f"*/{_safe_name(catalog)}.json"))
+                for key in [key for key in self._catalogs if key[1] == catalog]:
+                    del self._catalogs[key]
+            for path in paths:
+                path.unlink(missing_ok=True)
+            self._reindex()
+
+    # Storage
+
+    def _path(self, workspace: str, catalog: str) -> Path:
+        return self.directory / _safe_name(workspace) / f"{_safe_name(catalog)}.json"
+
+    def _loaded(
+        self, workspace: str, catalog: str, lock: bool = True
+    ) -> Optional[List[ColumnInfo]]:
+        """A fresh snapshot from memory or disk, or None."""
+        if lock:
+            with self._lock:
+                return self._loaded(workspace, catalog, lock=False)
+
+        key = (workspace, catalog)
+        path = self._path(workspace, catalog)
+        if not self._is_fresh(path):
+            # Expired, or invalidated by another process
+            if self._catalogs.pop(key, None) is not None:
+                self._reindex()
+            return None
+        if key not in self._catalogs:
+            snapshot = self._read(path)
+            if snapshot is None:
+                return None
+            self._catalogs[key] = snapshot
+            self._reindex()
+        return self._catalogs[key]
+
+    def _load_snapshots(self, workspace: str):
+        """Bring every fresh snapshot of a workspace into memory."""
+        with self._lock:
+            in_memory = {self._path(*key) for key in self._catalogs}
+            for path in (self.directory / _safe_name(workspace)).glob("*.json"):
+                if path in in_memory or not self._is_fresh(path):
+                    continue
+                snapshot = self._read(path)
+                if snapshot:
+                    self._catalogs[(workspace, snapshot[0].catalog)] = snapshot
+            self._reindex()
+
+    def _is_fresh(self, path: Path) -> bool:
+        """Whether a snapshot exists and is younger than the TTL."""
+        try:
+            age = time.time() - path.stat().st_mtime
+        except OSError:
+            return False
+        if self.ttl is not None and age > self.ttl:
+            path.unlink(missing_ok=True)
+            return False
+        return True
+
+    @staticmethod
+    def _read(path: Path) -> Optional[List[ColumnInfo]]:
+        try:
+            rows = json.loads(path.read_text())["columns"]
+        except (OSError, ValueError, KeyError):
+            return None
+        return [ColumnInfo(*row) for row in rows]
+
+    def _store(self, workspace: str, catalog: str, columns: List[ColumnInfo]):
+        with self._lock:
+            self._write(workspace, catalog, columns)
+            self._catalogs[(workspace, catalog)] = columns
+            self._reindex()
+
+    def _write(self, workspace: str, catalog: str, columns: List[ColumnInfo]):
+        path = self._path(workspace, catalog)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        snapshot = {"workspace": workspace, "catalog": catalog, "columns": columns}
+        tmp_path.write_text(json.dumps(snapshot))
+        os.replace(tmp_path, path)
+
+    def _reindex(self):
+        """Rebuild the table and column-name indexes (lock held)."""
+        tables: Dict[Tuple[str, str], List[ColumnInfo]] = {}
+        by_name: Dict[Tuple[str, str], List[ColumnInfo]] = {}
+        for (workspace, _), columns in self._catalogs.items():
+            for info in columns:
+                parts = (info.catalog, info.schema, info.table)
+                key = ".".join(part for part in parts if part)
+                tables.setdefault((workspace, key), []).append(info)
+                by_name.setdefault((workspace, info.column.lower()), []).append(info)
+        self._tables = tables
+        self._by_name = by_name
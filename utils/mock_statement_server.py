@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# ABOUTME: Local stand-in for the Databricks SQL Statement Execution API
+# ABOUTME: Simulates latency, PENDING/RUNNING states, chunked results, 429/503 responses and failures
+
+"""
+A local mock of ``/api/2.0/sql/statements`` for benchmarking and debugging
+the query clients without a warehouse.
+
+Point a client at it by setting ``DATABRICKS_SERVER_HOSTNAME`` to the
+server's URL (``http://127.0.0.1:<port>``); any token and HTTP path work.
+
+Every statement returns generated rows. The row count is taken from a
+``LIMIT n`` in the query, falling back to ``rows``. Rows are produced on the
+fly for each chunk, so large results don't have to fit in the server's
+memory.
+
+Usage:
+    python utils/mock_statement_server.py --port 8765 --latency 0.02 --pending-polls 2
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# Columns of the generated result: one per commonly decoded SQL type
+DEFAULT_COLUMNS = [
+    {"name": "id", "type_name": "BIGINT"},
+    {"name": "name", "type_name": "STRING"},
+    {"name": "value", "type_name": "DOUBLE"},
+    {"name": "flag", "type_name": "BOOLEAN"},
+    {"name": "created", "type_name": "TIMESTAMP"},
+]
+
+_LIMIT_PATTERN = re.compile(r"\bLIMIT\s+(\d+)\s*;?\s*$", re.IGNORECASE)
+_STATEMENT_PATH = re.compile(
+    r"^/api/2\.0/sql/statements/([^/]+)" r"(?:/(cancel)|/result/chunks/(\d+))?$"
+)
+_STORAGE_PATH = re.compile(r"^/mock-storage/([^/]+)/(\d+)$")
+
+
+def _generate_value(type_name: str, row: int) -> Optional[str]:
+    """JSON_ARRAY string for one generated cell; every 97th row is NULL."""
+    if row % 97 == 96:
+        return None
+    if type_name == "BIGINT":
+        return str(row)
+    if type_name == "DOUBLE":
+        return repr(row * 0.5)
+    if type_name == "BOOLEAN":
+        return "true" if row % 2 else "false"
+    if type_name == "TIMESTAMP":
+        return f"2024-01-{row % 28 + 1:02d}T{row % 24:02d}:00:00.000Z"
+    if type_name == "DECIMAL":
+        # Beyond float64 precision, so any lossy conversion shows
+        return f"{10**30 + row}.{row % 100:02d}"
+    return f"name_{row % 1000}"
+
+
+class _Statement:
+    """Server-side state of one submitted statement."""
+
+    def __init__(self, statement_id: str, row_count: int, disposition: str):
+        self.statement_id = statement_id
+        self.row_count = row_count
+        self.disposition = disposition
+        self.polls_left = 0
+        self.state = "PENDING"
+        self.failed = False
+
+
+class MockStatementServer:
+    """
+    A threaded HTTP server speaking the subset of the Statement Execution API
+    the clients use: submit, get, result chunks (JSON_ARRAY inline or
+    ARROW_STREAM external links) and cancel.
+
+    Use it as a context manager; ``url`` is the value for
+    ``DATABRICKS_SERVER_HOSTNAME``. ``stats`` counts requests per endpoint,
+    ``running`` is the number of statements PENDING or RUNNING right now and
+    ``peak_running`` the most there have been at once.
+    """
+
+    def __init__(
+        self,
+        rows: int = 100,
+        chunk_size: int = 10_000,
+        columns: Optional[List[dict]] = None,
+        pending_polls: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after: Optional[float] = 1,
+        failure_rate: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Configure the server; it starts listening in start() or ``with``.
+
+        Args:
+            rows: Rows returned by queries without a ``LIMIT``.
+            chunk_size: Rows per result chunk.
+            columns: Result schema as manifest columns (name, type_name,
+                and type_precision/type_scale for DECIMAL, whose generated
+                values have two decimal places); defaults to DEFAULT_COLUMNS.
+            pending_polls: Status reads a statement stays PENDING/RUNNING
+                for before it SUCCEEDS (a submit with a wait timeout
+                counts as one).
+            latency: Seconds added to every response.
+            error_rate: Fraction of requests answered with ``error_status``.
+            error_status: HTTP status for injected errors (e.g. 429 or 503).
+            retry_after: Retry-After header for injected errors, or None.
+            failure_rate: Fraction of statements that end FAILED.
+            host: Interface to bind.
+            port: Port to bind; 0 picks a free one.
+            seed: Seed for error and failure injection.
+        """
+        self.rows = rows
+        self.chunk_size = chunk_size
+        self.columns = columns or DEFAULT_COLUMNS
+        self.pending_polls = pending_polls
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+        self.stats: Counter = Counter()
+        self.running = 0
+        self.peak_running = 0
+        # Statement text of every submit, in order
+        self.statements: List[str] = []
+
+        self._random = random.Random(seed)
+        self._statements: Dict[str, _Statement] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockStatementServer":
+        """Serve requests on a background thread."""
+        # A short shutdown poll keeps stop() from blocking for half a second
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockStatementServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    # Statement lifecycle
+
+    def _submit(self, payload: dict) -> dict:
+        query = payload.get("statement", "")
+        match = _LIMIT_PATTERN.search(query)
+        row_count = int(match.group(1)) if match else self.rows
+
+        statement = _Statement(
+            uuid.uuid4().hex, row_count, payload.get("disposition", "INLINE")
+        )
+        statement.polls_left = self.pending_polls
+        with self._lock:
+            statement.failed = self._random.random() < self.failure_rate
+            self._statements[statement.statement_id] = statement
+            self.statements.append(query)
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+
+        if payload.get("wait_timeout", "10s") != "0s":
+            # The server-side wait absorbs one poll
+            self._advance(statement)
+        return self._describe(statement)
+
+    def _advance(self, statement: _Statement):
+        """Move a statement one poll closer to finishing."""
+        with self._lock:
+            if statement.state not in ("PENDING", "RUNNING"):
+                return
+            if statement.polls_left > 0:
+                statement.polls_left -= 1
+                # First half of the wait is queueing, the rest is execution
+                if statement.polls_left < self.pending_polls / 2:
+                    statement.state = "RUNNING"
+                return
+            statement.state = "FAILED" if statement.failed else "SUCCEEDED"
+            self.running -= 1
+
+    def _describe(self, statement: _Statement) -> dict:
+        body = {
+            "statement_id": statement.statement_id,
+            "status": {"state": statement.state},
+        }
+        if statement.state == "FAILED":
+            body["status"]["error"] = {
+                "error_code": "MOCK_FAILURE",
+                "message": "Injected failure from MockStatementServer",
+            }
+        if statement.state != "SUCCEEDED":
+            return body
+
+        total_chunks = max(1, -(-statement.row_count // self.chunk_size))
+        arrow = statement.disposition == "EXTERNAL_LINKS"
+        body["manifest"] = {
+            "format": "ARROW_STREAM" if arrow else "JSON_ARRAY",
+            "schema": {
+                "column_count": len(self.columns),
+                "columns": [
+                    dict(column, position=i) for i, column in enumerate(self.columns)
+                ],
+            },
+            "total_chunk_count": total_chunks,
+            "total_row_count": statement.row_count,
+            "truncated": False,
+        }
+        body["result"] = self._chunk(statement, 0)
+        return body
+
+    def _chunk_bounds(self, statement: _Statement, index: int) -> Tuple[int, int]:
+        start = index * self.chunk_size
+        return start, min(start + self.chunk_size, statement.row_count)
+
+    def _chunk(self, statement: _Statement, index: int) -> dict:
+        start, end = self._chunk_bounds(statement, index)
+        chunk = {"chunk_index": index, "row_offset": start, "row_count": end - start}
+        has_next = end < statement.row_count
+        next_fields = {}
+        if has_next:
+            next_fields = {
+                "next_chunk_index": index + 1,
+                "next_chunk_internal_link": (
+                    f"/api/2.0/sql/statements/{statement.statement_id}"
+                    f"/result/chunks/{index + 1}"
+                ),
+            }
+
+        if statement.disposition == "EXTERNAL_LINKS":
+            link = dict(
+                chunk,
+                external_link=f"{self.url}/mock-storage/{statement.statement_id}/{index}",
+                expiration="2099-01-01T00:00:00Z",
+                **next_fields,
+            )
+            return {"external_links": [link]}
+
+        chunk["data_array"] = [
+            [_generate_value(col["type_name"], row) for col in self.columns]
+            for row in range(start, end)
+        ]
+        chunk.update(next_fields)
+        return chunk
+
+    def _arrow_chunk(self, statement: _Statement, index: int) -> bytes:
+        """Serialize one chunk as an Arrow IPC stream."""
+        import pyarrow as pa
+
+        arrow_types = {
+            "BIGINT": pa.int64(),
+            "DOUBLE": pa.float64(),
+            "BOOLEAN": pa.bool_(),
+            "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+        }
+        start, end = self._chunk_bounds(statement, index)
+        arrays = []
+        for col in self.columns:
+            type_name = col["type_name"]
+            values = [_generate_value(type_name, row) for row in range(start, end)]
+            array = pa.array(values, pa.string())
+            if type_name == "DECIMAL":
+                arrow_type = pa.decimal128(
+                    col.get("type_precision", 38), col.get("type_scale", 2)
+                )
+            else:
+                arrow_type = arrow_types.get(type_name, pa.string())
+            arrays.append(array.cast(arrow_type))
+        table = pa.table(arrays, names=[col["name"] for col in self.columns])
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without TCP_NODELAY
+            # delayed ACKs add ~40ms to every small response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str, headers=()):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, body: dict, status: int = 200, headers=()):
+                payload = json.dumps(body).encode("utf-8")
+                self._send(status, payload, "application/json", headers)
+
+            def _inject(self, endpoint: str) -> bool:
+                """Apply latency and maybe answer with an injected error."""
+                server.stats[endpoint] += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                with server._lock:
+                    inject = server._random.random() < server.error_rate
+                if not inject:
+                    return False
+
+                server.stats[f"error_{server.error_status}"] += 1
+                headers = []
+                if server.retry_after is not None:
+                    headers.append(("Retry-After", f"{server.retry_after:g}"))
+                self._send_json(
+                    {
+                        "error_code": "TEMPORARILY_UNAVAILABLE",
+                        "message": "Injected error from MockStatementServer",
+                    },
+                    server.error_status,
+                    headers,
+                )
+                return True
+
+            def _statement(self, statement_id: str) -> Optional[_Statement]:
+                statement = server._statements.get(statement_id)
+                if statement is None:
+                    self._send_json(
+                        {"error_code": "NOT_FOUND", "message": "No such statement"},
+                        404,
+                    )
+                return statement
+
+            def do_HEAD(self):
+                self._send(200, b"", "text/plain")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path == "/api/2.0/sql/statements":
+                    if not self._inject("submit"):
+                        self._send_json(server._submit(payload))
+                    return
+
+                match = _STATEMENT_PATH.match(self.path)
+                if not match or not match.group(2):
+                    return self._send_json({"message": "Not found"}, 404)
+                if self._inject("cancel"):
+                    return
+                statement = self._statement(match.group(1))
+                if statement is not None:
+                    with server._lock:
+                        if statement.state in ("PENDING", "RUNNING"):
+                            statement.state = "CANCELED"
+                            server.running -= 1
+                    self._send_json({})
+
+            def do_GET(self):
+                match = _STORAGE_PATH.match(self.path)
+                if match:
+                    # Pre-signed storage downloads never see injected errors
+                    server.stats["download"] += 1
+                    statement = self._statement(match.group(1))
+                    if statement is not None:
+                        body = server._arrow_chunk(statement, int(match.group(2)))
+                        self._send(200, body, "application/vnd.apache.arrow.stream")
+                    return
+
+                match = _STATEMENT_PATH.match(self.path)
+                if not match or match.group(2):
+                    return self._send_json({"message": "Not found"}, 404)
+
+                chunk_index = match.group(3)
+                if self._inject("status" if chunk_index is None else "chunk"):
+                    return
+                statement = self._statement(match.group(1))
+                if statement is None:
+                    return
+                if chunk_index is None:
+                    server._advance(statement)
+                    self._send_json(server._describe(statement))
+                else:
+                    self._send_json(server._chunk(statement, int(chunk_index)))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock Statement Execution API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--pending-polls", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockStatementServer(
+        rows=args.rows,
+        chunk_size=args.chunk_size,
+        pending_polls=args.pending_polls,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        failure_rate=args.failure_rate,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"🧪 Mock Statement Execution API on {server.url}")
+    print(f"   Set DATABRICKS_SERVER_HOSTNAME={server.url}")
+    try:
+        server.start()._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
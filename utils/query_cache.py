@@ -0,0 +1,190 @@
+# ABOUTME: Persistent on-disk cache of query results for DatabricksQueryClient
+# ABOUTME: Stores DataFrames as compressed Feather files with TTL and LRU size-bounded eviction
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Used when the client is created with cache=True
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "databricks-eda" / "query_results"
+
+
+class QueryResultCache:
+    """
+    A size-bounded, TTL-aware cache of query results on local disk.
+
+    Each result is stored as a zstd-compressed Feather (Arrow IPC) file, which
+    keeps column dtypes and reloads quickly. A small SQLite index tracks size,
+    expiry and last access per entry; when the total size exceeds
+    ``max_bytes`` the least recently used entries are evicted. The cache is
+    safe to share between threads and between processes.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        max_bytes: int = 1024**3,
+        default_ttl: Optional[float] = 24 * 3600,
+        compression: str = "zstd",
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Where cached results live. Defaults to
+                ~/.cache/databricks-eda/query_results.
+            max_bytes: Total size cap for cached files (default 1 GiB).
+            default_ttl: Seconds an entry stays fresh, or None for no expiry.
+            compression: Feather compression codec ("zstd", "lz4" or
+                "uncompressed").
+        """
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.compression = compression
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.directory / "index.sqlite"
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    expires REAL,
+                    last_access REAL NOT NULL
+                )
+                """)
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a cache key from e.g. the warehouse id and the SQL text."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Return the cached DataFrame for ``key``, or None if missing/expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] is not None and row[0] <= now:
+                self._delete(conn, key)
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+
+        import pandas as pd
+
+        try:
+            return pd.read_feather(self._path(key))
+        except (OSError, ValueError):
+            # File vanished or is corrupt; drop the stale index entry
+            self.invalidate(key)
+            return None
+
+    def put(self, key: str, df: pd.DataFrame, ttl: Optional[float] = None) -> bool:
+        """
+        Store a DataFrame under ``key``.
+
+        Args:
+            key: Cache key from make_key()
+            df: Result to cache
+            ttl: Seconds until expiry; defaults to ``default_ttl``
+
+        Returns:
+            bool: False if the DataFrame cannot be stored as Feather (e.g.
+            duplicate column names) and was therefore not cached.
+        """
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            df.reset_index(drop=True).to_feather(tmp_path, compression=self.compression)
+        except Exception:
+            # pyarrow rejects duplicate column names and mixed-type object columns
+            tmp_path.unlink(missing_ok=True)
+            return False
+        os.replace(tmp_path, path)
+
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, path.stat().st_size, now, expires, now),
+            )
+            self._evict(conn, now)
+        return True
+
+    def invalidate(self, key: str):
+        """Remove one entry."""
+        with self._lock, self._connect() as conn:
+            self._delete(conn, key)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock, self._connect() as conn:
+            keys = [row[0] for row in conn.execute("SELECT key FROM entries")]
+            for key in keys:
+                self._delete(conn, key)
+
+    def size_bytes(self) -> int:
+        """Total size of all cached files."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then least recently used ones until under the cap."""
+        expired = conn.execute(
+            "SELECT key FROM entries WHERE expires IS NOT NULL AND expires <= ?", (now,)
+        ).fetchall()
+        for (key,) in expired:
+            self._delete(conn, key)
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            self._delete(conn, key)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _delete(self, conn: sqlite3.Connection, key: str):
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._path(key).unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.feather"
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open an autocommit connection to the index and close it afterwards."""
+        conn = sqlite3.connect(self._index_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
@@ -0,0 +1,280 @@
+# ABOUTME: Per-query timing breakdown and Prometheus-style metrics for the query client
+# ABOUTME: QueryMetrics records phases and counters; MetricsRegistry aggregates them into counters/histograms
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+# Phases of one execute_query() call, in the order they happen
+PHASES = (
+    "safety_check",
+    "cache_lookup",
+    "request_send",
+    "server_wait",
+    "polling",
+    "download",
+    "json_decode",
+    "dataframe_build",
+    "cache_store",
+    "local_query",
+)
+
+# Histogram buckets in seconds, from a cached hit to a long warehouse query
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+
+
+class QueryMetrics:
+    """
+    Timing breakdown and counters for one query.
+
+    Phases (seconds):
+
+    - safety_check: validating the SQL locally
+    - cache_lookup / cache_store: reading and writing the result cache
+    - request_send: client side of the submit request (connecting, sending,
+      reading the response body)
+    - server_wait: time the submit request waited on the warehouse, i.e.
+      until its response headers arrived
+    - polling: waiting for a statement still running after the submit
+    - download: fetching result chunks after the first
+    - json_decode: parsing API response bodies
+    - dataframe_build: converting chunks to typed columns and combining them
+    - local_query: running the query against a local replica instead
+
+    Chunks are downloaded and decoded on several threads, so download,
+    json_decode and dataframe_build add up the time of every thread and can
+    exceed ``total``.
+
+    Attributes:
+        query_name: Name passed to execute_query()
+        fingerprint: Shape of the query, ``fingerprint_sql(query,
+            lift_literals=True)``: the same for runs that differ only in
+            formatting, comments or constants, for grouping them
+        statement_id: Warehouse statement id, once submitted
+        phases: Seconds spent per phase
+        total: Wall-clock seconds for the whole call
+        rows: Rows returned
+        bytes: Response bytes received from the API and cloud storage
+        chunks: Result chunks decoded
+        polls: Status requests made while the statement was running
+        retries: Requests repeated after a transient failure
+        cache_hit: True if the result came from the result cache
+        error: The exception raised, if the query failed
+    """
+
+    def __init__(self, query_name: str):
+        self.query_name = query_name
+        self.fingerprint: Optional[str] = None
+        self.statement_id: Optional[str] = None
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.total = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.chunks = 0
+        self.polls = 0
+        self.retries = 0
+        self.cache_hit = False
+        self.error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in the ``with`` block to a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] += seconds
+
+    def increment(self, **counts: int):
+        """Add to counters, e.g. ``increment(bytes=1024, chunks=1)``."""
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def status(self) -> str:
+        """Outcome label: "error", "cache_hit" or "ok"."""
+        if self.error is not None:
+            return "error"
+        return "cache_hit" if self.cache_hit else "ok"
+
+    def as_dict(self) -> dict:
+        """Plain-dict view, e.g. for logging as JSON."""
+        return {
+            "query_name": self.query_name,
+            "fingerprint": self.fingerprint,
+            "statement_id": self.statement_id,
+            "status": self.status,
+            "total": self.total,
+            "phases": dict(self.phases),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "chunks": self.chunks,
+            "polls": self.polls,
+            "retries": self.retries,
+            "error": repr(self.error) if self.error is not None else None,
+        }
+
+    def summary(self) -> str:
+        """One line with the total and every non-zero phase."""
+        phases = ", ".join(
+            f"{name} {seconds:.3f}s"
+            for name, seconds in self.phases.items()
+            if seconds >= 0.0005
+        )
+        return (
+            f"{self.query_name}: {self.total:.3f}s {self.status}, {self.rows} rows, "
+            f"{self.bytes / 1024:.1f} KiB ({phases or 'no phases'})"
+        )
+
+
+class _Histogram:
+    """Cumulative-bucket histogram per label value."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        counts, totals = self.series.setdefault(
+            labels, [[0] * (len(self.buckets) + 1), [0.0, 0]]
+        )
+        counts[bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+
+class MetricsRegistry:
+    """
+    Aggregates QueryMetrics into Prometheus-style counters and histograms.
+
+    Register ``registry.observe`` as a client metrics hook and expose
+    ``registry.render()`` (Prometheus text exposition format) wherever your
+    scraper or logs can read it:
+
+        registry = MetricsRegistry()
+        client = DatabricksQueryClient(metrics_hooks=[registry.observe])
+        ...
+        print(registry.render())
+    """
+
+    def __init__(
+        self,
+        namespace: str = "databricks_query",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        label_query_name: bool = False,
+    ):
+        """
+        Args:
+            namespace: Prefix for every metric name.
+            buckets: Histogram bucket upper bounds in seconds.
+            label_query_name: Add a ``query_name`` label to every series.
+                Only use with a small, fixed set of query names.
+        """
+        self.namespace = namespace
+        self.label_query_name = label_query_name
+        self._counters: Dict[str, Dict[Tuple[str, ...], float]] = {}
+        self._duration = _Histogram(buckets)
+        self._phases = _Histogram(buckets)
+        self._lock = threading.Lock()
+
+    def observe(self, metrics: QueryMetrics):
+        """Record one finished query; usable directly as a metrics hook."""
+        base = (metrics.query_name,) if self.label_query_name else ()
+        with self._lock:
+            self._inc("queries_total", base + (metrics.status,), 1)
+            self._inc("rows_total", base, metrics.rows)
+            self._inc("bytes_total", base, metrics.bytes)
+            self._inc("chunks_total", base, metrics.chunks)
+            self._inc("polls_total", base, metrics.polls)
+            self._inc("retries_total", base, metrics.retries)
+            self._duration.observe(base + (metrics.status,), metrics.total)
+            for name, seconds in metrics.phases.items():
+                if seconds:
+                    self._phases.observe(base + (name,), seconds)
+
+    def counter(self, name: str, *labels: str) -> float:
+        """Current value of a counter, e.g. ``counter("queries_total", "ok")``."""
+        with self._lock:
+            return self._counters.get(name, {}).get(labels, 0)
+
+    def render(self) -> str:
+        """Render every series in the Prometheus text exposition format."""
+        base = ("query_name",) if self.label_query_name else ()
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                label_names = base + (("status",) if name == "queries_total" else ())
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {full_name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(
+                        f"{full_name}{_labels(label_names, labels)} {_number(value)}"
+                    )
+            lines += self._render_histogram(
+                "duration_seconds", self._duration, base + ("status",)
+            )
+            lines += self._render_histogram(
+                "phase_seconds", self._phases, base + ("phase",)
+            )
+        return "\n".join(lines) + "\n"
+
+    def _inc(self, name: str, labels: Tuple[str, ...], value: float):
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def _render_histogram(
+        self, name: str, histogram: _Histogram, label_names: Tuple[str, ...]
+    ) -> list:
+        full_name = f"{self.namespace}_{name}"
+        lines = [f"# TYPE {full_name} histogram"]
+        bounds = [f"{bound:g}" for bound in histogram.buckets] + ["+Inf"]
+        for labels, (counts, (total, count)) in sorted(histogram.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                bucket_labels = _labels(label_names + ("le",), labels + (bound,))
+                lines.append(f"{full_name}_bucket{bucket_labels} {cumulative}")
+            lines.append(
+                f"{full_name}_sum{_labels(label_names, labels)} {_number(total)}"
+            )
+            lines.append(f"{full_name}_count{_labels(label_names, labels)} {count}")
+        return lines
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
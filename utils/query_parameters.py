@@ -0,0 +1,199 @@
+# ABOUTME: Named, typed query parameters for the Statement Execution API
+# ABOUTME: Binds :name markers to typed values and table names to IDENTIFIER(:name)
+
+import datetime
+import decimal
+import json
+import re
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+try:
+    from .sql_fingerprint import tokenize_sql
+    from .sql_names import QUALIFIED_NAME
+except ImportError:  # utils/ itself is on sys.path (the temp_code scripts)
+    from sql_fingerprint import tokenize_sql
+    from sql_names import QUALIFIED_NAME
+
+_PARAMETER_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Range of the INT type; larger integers are sent as BIGINT. LIMIT and
+# similar clauses only accept INT.
+_INT_MIN, _INT_MAX = -(2**31), 2**31 - 1
+
+# Tokens that, directly followed by ":name", make it a JSON path (raw:field)
+_PATH_OWNERS = ("word", "quoted_ident")
+
+
+class Identifier:
+    """
+    A table, view or column name passed as a query parameter.
+
+    The name is sent as a STRING parameter and its ``:name`` markers are
+    rewritten to ``IDENTIFIER(:name)``, so Databricks resolves it as an
+    identifier without it ever being pasted into the SQL text::
+
+        client.execute_query(
+            "SELECT COUNT(*) FROM :table WHERE Year = :year",
+            parameters={"table": Identifier("samples.airlines.flights"), "year": 2008},
+        )
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        """
+        Raises:
+            ValueError: If ``name`` is not a (qualified) identifier
+        """
+        if not isinstance(name, str) or not QUALIFIED_NAME.match(name):
+            raise ValueError(f"Invalid identifier: {name!r}")
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"Identifier({self.name!r})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Identifier) and other.name == self.name
+
+    def __hash__(self) -> int:
+        return hash(("Identifier", self.name))
+
+
+class TypedValue(NamedTuple):
+    """
+    A parameter value with an explicit SQL type, e.g.
+    ``TypedValue("12.50", "DECIMAL(10,2)")``. None is sent as NULL.
+    """
+
+    value: Any
+    sql_type: str
+
+
+def _decimal_type(value: decimal.Decimal) -> str:
+    if not value.is_finite():
+        raise ValueError(f"Decimal parameters must be finite, got {value}")
+    _, digits, exponent = value.as_tuple()
+    scale = max(-exponent, 0)
+    precision = max(len(digits) + max(exponent, 0), scale, 1)
+    return f"DECIMAL({min(precision, 38)},{min(scale, 38)})"
+
+
+def api_parameter(name: str, value: Any) -> dict:
+    """
+    One entry of the API's ``parameters`` list for a Python value.
+
+    Types are inferred: bool -> BOOLEAN, int -> INT or BIGINT, float ->
+    DOUBLE, Decimal -> DECIMAL(p,s), datetime -> TIMESTAMP (time zone aware)
+    or TIMESTAMP_NTZ, date -> DATE, str and Identifier -> STRING, None ->
+    NULL. Use TypedValue for anything else.
+
+    Raises:
+        ValueError: If the value's type can't be inferred
+    """
+    if isinstance(value, TypedValue):
+        entry = {"name": name, "type": value.sql_type}
+        if value.value is not None:
+            entry["value"] = str(value.value)
+        return entry
+    if value is None:
+        return {"name": name}
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalars
+
+    if isinstance(value, Identifier):
+        sql_type, text = "STRING", value.name
+    elif isinstance(value, bool):
+        sql_type, text = "BOOLEAN", "true" if value else "false"
+    elif isinstance(value, int):
+        sql_type = "INT" if _INT_MIN <= value <= _INT_MAX else "BIGINT"
+        text = str(value)
+    elif isinstance(value, float):
+        sql_type, text = "DOUBLE", repr(value)
+    elif isinstance(value, decimal.Decimal):
+        sql_type, text = _decimal_type(value), str(value)
+    elif isinstance(value, datetime.datetime):
+        sql_type = "TIMESTAMP" if value.tzinfo is not None else "TIMESTAMP_NTZ"
+        text = value.isoformat(sep=" ")
+    elif isinstance(value, datetime.date):
+        sql_type, text = "DATE", value.isoformat()
+    elif isinstance(value, str):
+        sql_type, text = "STRING", value
+    else:
+        raise ValueError(
+            f"Parameter {name!r} has unsupported type {type(value).__name__}; "
+            "wrap it in TypedValue(value, sql_type)"
+        )
+    return {"name": name, "value": text, "type": sql_type}
+
+
+def bind_parameters(
+    query: str, parameters: Optional[Mapping[str, Any]]
+) -> Tuple[str, Optional[List[dict]]]:
+    """
+    Prepare a query and its named parameters for the Statement Execution API.
+
+    ``:name`` markers of Identifier parameters become ``IDENTIFIER(:name)``
+    unless they already are. Markers directly after a name (``raw:field``)
+    are JSON paths, not parameters.
+
+    Returns:
+        tuple: ``(query, api_parameters)``; api_parameters is None when the
+        query has no parameters.
+
+    Raises:
+        ValueError: If a parameter name is invalid, a marker has no value or
+            a value's type is unsupported
+    """
+    if not parameters:
+        return query, None
+    for name in parameters:
+        if not isinstance(name, str) or not _PARAMETER_NAME.match(name):
+            raise ValueError(f"Invalid parameter name: {name!r}")
+
+    tokens = list(tokenize_sql(query))
+    missing = []
+    for index, (kind, text) in enumerate(tokens):
+        if kind != "param":
+            continue
+        before = tokens[index - 1] if index else None
+        if before is not None and (
+            before.kind in _PATH_OWNERS or before.text in (")", "]")
+        ):
+            continue  # raw:field or col[0]:field
+        name = text[1:]
+        if name not in parameters:
+            missing.append(name)
+        elif isinstance(parameters[name], Identifier) and (
+            _previous_word(tokens, index) != "IDENTIFIER"
+        ):
+            tokens[index] = tokens[index]._replace(text=f"IDENTIFIER({text})")
+    if missing:
+        raise ValueError(
+            f"No value for parameter(s): {', '.join(sorted(set(missing)))}"
+        )
+
+    api_parameters = [api_parameter(name, value) for name, value in parameters.items()]
+    return "".join(text for _, text in tokens), api_parameters
+
+
+def _previous_word(tokens: list, index: int) -> Optional[str]:
+    """The word before the "(" that precedes tokens[index], upper-cased."""
+    seen_paren = False
+    for kind, text in reversed(tokens[:index]):
+        if kind in ("whitespace", "line_comment", "block_comment"):
+            continue
+        if not seen_paren:
+            if text != "(":
+                return None
+            seen_paren = True
+            continue
+        return text.upper() if kind == "word" else None
+    return None
+
+
+def parameters_key(api_parameters: Optional[List[dict]]) -> str:
+    """A stable string for cache and dedup keys; empty without parameters."""
+    if not api_parameters:
+        return ""
+    ordered: Dict[str, dict] = {entry["name"]: entry for entry in api_parameters}
+    return json.dumps([ordered[name] for name in sorted(ordered)], sort_keys=True)
@@ -0,0 +1,443 @@
+# ABOUTME: Streams query results straight to Parquet, Feather or CSV files without building a DataFrame
+# ABOUTME: Returns a handle that reopens the data memory-mapped or scans it lazily with pushdown
+
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FORMATS = ("parquet", "feather", "csv")
+
+# Rows per Parquet row group (and per Feather record batch). Large enough
+# for efficient column reads, small enough that one group of a wide result
+# stays well under a gigabyte while being written.
+DEFAULT_ROW_GROUP_SIZE = 500_000
+
+# Codec when none is given. Feather is left uncompressed so memory-mapped
+# reads are zero-copy.
+_DEFAULT_COMPRESSION = {"parquet": "zstd", "feather": None, "csv": None}
+
+# Alias of the wrapped query in the schema-only query of an empty result
+_SCHEMA_ALIAS = "_schema"
+
+
+def _import_dataset():
+    """Import pyarrow.dataset on demand; it is only needed for scans."""
+    import pyarrow.dataset as ds
+
+    return ds
+
+
+def _dataset_format(file_format: str):
+    if file_format == "feather":
+        return "ipc"
+    if file_format == "csv":
+        import pyarrow.csv as pacsv
+
+        # NULLs are written as empty fields, so read empty strings as NULL
+        convert = pacsv.ConvertOptions(strings_can_be_null=True)
+        return _import_dataset().CsvFileFormat(convert_options=convert)
+    return file_format
+
+
+def _compression(file_format: str, compression: Optional[str]) -> Optional[str]:
+    if compression is None:
+        return _DEFAULT_COMPRESSION[file_format]
+    if compression.lower() in ("none", "uncompressed"):
+        return None
+    if file_format == "csv":
+        raise ValueError("CSV files are written uncompressed")
+    return compression
+
+
+class ResultFile:
+    """
+    A query result written to disk by execute_to_file().
+
+    ``open()`` reads it back as a ``pyarrow.Table`` memory-mapped from the
+    file, so the operating system pages data in on demand instead of
+    copying it onto the heap. ``scan()`` reads lazily through
+    ``pyarrow.dataset``: only the requested columns are read, and filters
+    skip Parquet row groups by their statistics and partition directories
+    by their values.
+
+    Attributes:
+        path: The file, or the directory of a partitioned result
+        format: "parquet", "feather" or "csv"
+        rows: Rows written
+        partition_by: Hive partition columns, if any
+        schema: The result's ``pyarrow.Schema``, if known; it types CSV
+            columns and partition values when reading back
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        format: str = "parquet",
+        rows: Optional[int] = None,
+        partition_by: Optional[Sequence[str]] = None,
+        schema=None,
+    ):
+        """
+        Args:
+            path: An existing result file or partitioned directory
+            format: Its format (see FORMATS)
+            rows: Row count, if known
+            partition_by: Hive partition columns of a directory
+            schema: Column types; inferred from the files if omitted
+        """
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        self.path = Path(path)
+        self.format = format
+        self.rows = rows
+        self.partition_by = list(partition_by or [])
+        self.schema = schema
+
+    def __repr__(self) -> str:
+        return (
+            f"ResultFile({str(self.path)!r}, format={self.format!r}, "
+            f"rows={self.rows}, partition_by={self.partition_by})"
+        )
+
+    @property
+    def bytes(self) -> int:
+        """Size on disk."""
+        if self.path.is_dir():
+            return sum(f.stat().st_size for f in self.path.rglob("*") if f.is_file())
+        return self.path.stat().st_size
+
+    def dataset(self):
+        """The result as a lazy ``pyarrow.dataset.Dataset``."""
+        ds = _import_dataset()
+        partitioning = None
+        if self.partition_by and self.schema is not None:
+            import pyarrow as pa
+
+            fields = [self.schema.field(column) for column in self.partition_by]
+            partitioning = ds.partitioning(pa.schema(fields), flavor="hive")
+        elif self.partition_by:
+            partitioning = "hive"
+        return ds.dataset(
+            self.path,
+            schema=self.schema,
+            format=_dataset_format(self.format),
+            partitioning=partitioning,
+        )
+
+    def scan(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        filter: Any = None,
+        batch_size: int = 131_072,
+    ):
+        """
+        A lazy scan of the result with column and predicate pushdown.
+
+        Args:
+            columns: Only read these columns
+            filter: A ``pyarrow.compute`` expression such as
+                ``pc.field("Year") == 2008``, or DNF tuples as accepted by
+                ``pyarrow.parquet.read_table``, e.g.
+                ``[("Year", "=", 2008), ("ArrDelay", ">", 60)]``
+            batch_size: Maximum rows per scanned batch
+
+        Returns:
+            pyarrow.dataset.Scanner: Call ``to_table()``, ``to_batches()``
+            or ``count_rows()`` on it to read
+        """
+        if isinstance(filter, list):
+            import pyarrow.parquet as pq
+
+            filter = pq.filters_to_expression(filter)
+        return self.dataset().scanner(
+            columns=list(columns) if columns is not None else None,
+            filter=filter,
+            batch_size=batch_size,
+        )
+
+    def open(self, columns: Optional[Sequence[str]] = None):
+        """
+        Read the result as a ``pyarrow.Table`` memory-mapped from disk.
+
+        Uncompressed Feather files are mapped without copying. Parquet
+        files are mapped and decompressed column by column. CSV has to be
+        parsed, and it and partitioned results are read through ``scan()``.
+        """
+        import pyarrow as pa
+
+        if self.partition_by or self.format == "csv":
+            return self.scan(columns).to_table()
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+
+            return pq.read_table(
+                self.path,
+                columns=list(columns) if columns is not None else None,
+                memory_map=True,
+            )
+        source = pa.memory_map(str(self.path))
+        table = pa.ipc.open_file(source).read_all()
+        return table.select(list(columns)) if columns is not None else table
+
+    def to_pandas(
+        self, columns: Optional[Sequence[str]] = None, filter: Any = None
+    ) -> pd.DataFrame:
+        """Load (part of) the result as an Arrow-backed DataFrame."""
+        import pandas as pd
+
+        if filter is None:
+            table = self.open(columns)
+        else:
+            table = self.scan(columns, filter).to_table()
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _regroup(batches: Iterator, rows_per_group: int) -> Iterator:
+    """Re-chunk record batches into tables of ``rows_per_group`` rows."""
+    import pyarrow as pa
+
+    pending: List = []
+    pending_rows = 0
+    schema = None
+    for batch in batches:
+        if schema is None:
+            schema = batch.schema
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= rows_per_group:
+            table = pa.Table.from_batches(pending, schema=schema)
+            yield table.slice(0, rows_per_group)
+            rest = table.slice(rows_per_group)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+    if pending_rows:
+        yield pa.Table.from_batches(pending, schema=schema)
+
+
+def _conform(batches: Iterator) -> Iterator:
+    """Drop empty batches and cast the rest to the first one's schema."""
+    import pyarrow as pa
+
+    schema = None
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        if schema is None:
+            schema = batch.schema
+        elif not batch.schema.equals(schema):
+            # INLINE chunks are typed one DataFrame at a time
+            yield from pa.Table.from_batches([batch]).cast(schema).to_batches()
+            continue
+        yield batch
+
+
+def write_result(
+    client,
+    query: str,
+    path: Union[str, Path],
+    format: str = "parquet",
+    query_name: str = "Query",
+    partition_by: Optional[Sequence[str]] = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: Optional[str] = None,
+    overwrite: bool = False,
+    timeout: Optional[float] = 600,
+    disposition: str = "EXTERNAL_LINKS",
+    parameters: Optional[Mapping[str, Any]] = None,
+) -> ResultFile:
+    """
+    Run a query and stream its result into a file, chunk by chunk.
+
+    Chunks go from the download straight to the writer as Arrow record
+    batches, so at most a few chunks and one row group are in memory at a
+    time. The file is written under a temporary name and renamed when
+    complete, so an interrupted extract never leaves a truncated file
+    behind.
+
+    Args:
+        client: A DatabricksQueryClient
+        query: SQL SELECT query to execute
+        path: Output file, or directory when ``partition_by`` is given
+        format: "parquet", "feather" or "csv"
+        query_name: Descriptive name for logging purposes
+        partition_by: Write a Hive-partitioned directory
+            (``Year=2008/part-0.parquet``) split on these columns
+        row_group_size: Rows per Parquet row group or Feather record batch
+        compression: Codec, e.g. "zstd", "snappy", "lz4" or "none".
+            Defaults to zstd for Parquet; Feather and CSV default to
+            uncompressed.
+        overwrite: Replace an existing file or directory at ``path``
+        timeout: Deadline in seconds for the statement to finish
+        disposition: "EXTERNAL_LINKS" (Arrow, the default) or "INLINE"
+        parameters: Values for the query's ``:name`` markers
+
+    Returns:
+        ResultFile: A handle on the written data
+
+    Raises:
+        ValueError: If an argument is invalid or the query fails safety
+            checks
+        FileExistsError: If ``path`` exists and ``overwrite`` is False
+        RuntimeError: If the query fails
+    """
+    import pyarrow as pa
+
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    if row_group_size < 1:
+        raise ValueError("row_group_size must be at least 1")
+    codec = _compression(format, compression)
+    path = Path(path)
+    if path.exists() and not overwrite:
+        raise FileExistsError(f"{path} already exists; pass overwrite=True")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partition_by = list(partition_by or [])
+
+    batches = _conform(
+        client.execute_query_iter(
+            query,
+            query_name,
+            timeout,
+            disposition=disposition,
+            as_arrow=True,
+            parameters=parameters,
+        )
+    )
+    first = next(batches, None)
+    if first is None:
+        # No rows: keep the columns so the file can still be read
+        empty = client.execute_query(
+            f"SELECT * FROM (\n{query.strip().rstrip(';')}\n) AS {_SCHEMA_ALIAS}"
+            " LIMIT 0",
+            f"{query_name} (schema)",
+            timeout,
+            parameters=parameters,
+        )
+        schema = pa.Schema.from_pandas(empty, preserve_index=False)
+        stream: Iterator = iter(())
+    else:
+        schema = first.schema
+        stream = _chain(first, batches)
+    unknown = [column for column in partition_by if column not in schema.names]
+    if unknown:
+        raise ValueError(f"partition_by names unknown column(s): {unknown}")
+
+    staging = path.with_name(f".{path.name}-{os.urandom(8).hex()}")
+    rows = 0
+
+    def counted(tables):
+        nonlocal rows
+        for table in tables:
+            rows += table.num_rows
+            yield table
+
+    try:
+        if partition_by:
+            _write_partitioned(
+                staging,
+                format,
+                schema,
+                partition_by,
+                row_group_size,
+                codec,
+                counted(stream),
+            )
+        else:
+            groups = counted(_regroup(stream, row_group_size))
+            _write_file(staging, format, schema, codec, groups)
+        if path.is_dir():
+            shutil.rmtree(path)
+        elif path.exists():
+            path.unlink()
+        os.replace(staging, path)
+    except BaseException:
+        if staging.is_dir():
+            shutil.rmtree(staging, ignore_errors=True)
+        else:
+            staging.unlink(missing_ok=True)
+        raise
+    return ResultFile(path, format, rows, partition_by, schema)
+
+
+def _chain(first, rest: Iterator) -> Iterator:
+    yield first
+    yield from rest
+
+
+def _write_file(path: Path, format: str, schema, codec: Optional[str], groups):
+    """Write row groups to a single file."""
+    import pyarrow as pa
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        with pq.ParquetWriter(path, schema, compression=codec or "none") as writer:
+            for table in groups:
+                writer.write_table(table, row_group_size=table.num_rows)
+        return
+    if format == "feather":
+        options = pa.ipc.IpcWriteOptions(compression=codec)
+        with pa.ipc.new_file(str(path), schema, options=options) as writer:
+            for table in groups:
+                writer.write_table(table, max_chunksize=table.num_rows)
+        return
+    import pyarrow.csv as pacsv
+
+    with pacsv.CSVWriter(str(path), schema) as writer:
+        for table in groups:
+            writer.write_table(table)
+
+
+def _write_partitioned(
+    directory: Path,
+    format: str,
+    schema,
+    partition_by: List[str],
+    row_group_size: int,
+    codec: Optional[str],
+    batches: Iterator,
+):
+    """
+    Write a Hive-partitioned directory with pyarrow.dataset.
+
+    Rows are buffered per partition until a full row group is ready.
+    """
+    ds = _import_dataset()
+    if format == "parquet":
+        file_format = ds.ParquetFileFormat()
+        options = file_format.make_write_options(compression=codec or "none")
+    elif format == "feather":
+        file_format = ds.IpcFileFormat()
+        options = file_format.make_write_options(compression=codec)
+    else:
+        file_format = ds.CsvFileFormat()
+        options = file_format.make_write_options()
+    directory.mkdir()
+    ds.write_dataset(
+        batches,
+        directory,
+        schema=schema,
+        format=file_format,
+        file_options=options,
+        partitioning=partition_by,
+        partitioning_flavor="hive",
+        min_rows_per_group=row_group_size,
+        max_rows_per_group=row_group_size,
+        basename_template=f"part-{{i}}.{format}",
+        existing_data_behavior="overwrite_or_ignore",
+    )
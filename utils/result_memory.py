@@ -0,0 +1,317 @@
+# ABOUTME: Memory-optimized result DataFrames: categorical strings and downcast numerics
+# ABOUTME: Encodes low-cardinality strings chunk by chunk while decoding and reports the savings
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# "categories" only dictionary-encodes strings; "compact" also downcasts numerics
+MEMORY_MODES = ("categories", "compact")
+
+# Strings are encoded when a column has at most this many distinct values
+# per row. Even at one distinct value in two rows, codes plus categories are
+# far smaller than one Python string per row.
+CATEGORY_MAX_RATIO = 0.5
+
+# Override meaning "leave this column as decoded"
+KEEP = "keep"
+
+_INT_BITS = (8, 16, 32)
+
+
+def _is_text(series: pd.Series) -> bool:
+    """True for object columns of strings and for string dtypes."""
+    import pandas as pd
+
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return False
+    if isinstance(dtype, pd.ArrowDtype):
+        import pyarrow as pa
+
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(
+            dtype.pyarrow_dtype
+        )
+    if isinstance(dtype, pd.StringDtype):
+        return True
+    return pd.api.types.is_object_dtype(dtype) and pd.api.types.infer_dtype(series) in (
+        "string",
+        "empty",
+    )
+
+
+def _smallest_int(series: pd.Series):
+    """The narrowest integer dtype of the same family that holds every value."""
+    import numpy as np
+    import pandas as pd
+
+    low, high = series.min(), series.max()
+    if pd.isna(low):
+        return None
+    dtype = series.dtype
+    for bits in _INT_BITS:
+        info = np.iinfo(f"int{bits}")
+        if info.min <= low and high <= info.max:
+            break
+    else:
+        return None
+    if isinstance(dtype, pd.ArrowDtype):
+        import pyarrow as pa
+
+        target = pd.ArrowDtype(getattr(pa, f"int{bits}")())
+    elif isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        target = pd.api.types.pandas_dtype(f"Int{bits}")
+    else:
+        target = np.dtype(f"int{bits}")
+    return target if target.itemsize < dtype.itemsize else None
+
+
+def _float32(series: pd.Series):
+    """float32 of the same family if every value survives the round trip."""
+    import numpy as np
+    import pandas as pd
+
+    dtype = series.dtype
+    if dtype.itemsize <= 4:
+        return None
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    with np.errstate(over="ignore"):
+        narrow = values.astype(np.float32)
+    if not np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+        return None
+    if isinstance(dtype, pd.ArrowDtype):
+        import pyarrow as pa
+
+        return pd.ArrowDtype(pa.float32())
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return pd.api.types.pandas_dtype("Float32")
+    return np.dtype("float32")
+
+
+def downcast(series: pd.Series):
+    """
+    The smallest dtype that holds a numeric column without loss, or None.
+
+    Integers narrow to int8/16/32 by their range, keeping nullable and
+    Arrow-backed columns nullable. Floats become float32 only if every
+    value converts back exactly.
+    """
+    import pandas as pd
+
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype):
+        return None
+    if isinstance(dtype, pd.ArrowDtype):
+        import pyarrow as pa
+
+        kind = dtype.pyarrow_dtype
+        if pa.types.is_signed_integer(kind):
+            return _smallest_int(series)
+        if pa.types.is_floating(kind):
+            return _float32(series)
+        return None
+    if pd.api.types.is_signed_integer_dtype(dtype):
+        return _smallest_int(series)
+    if pd.api.types.is_float_dtype(dtype):
+        return _float32(series)
+    return None
+
+
+def _memory(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=False, deep=True).sum())
+
+
+class MemoryPlan:
+    """
+    Decides and applies the dtypes of one memory-optimized result.
+
+    The plan sees every chunk as it is decoded. The first chunk with rows
+    decides which string columns are low-cardinality; they are encoded as
+    categoricals in that chunk and every later one, so the full column is
+    never held as Python strings. ``combine()`` joins the chunks with
+    ``union_categoricals`` and ``finish()`` downcasts numerics, applies the
+    per-column overrides and records the savings in ``df.attrs["memory"]``.
+
+    Chunks may be encoded on several threads at once.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        column_dtypes: Optional[Mapping[str, Optional[str]]] = None,
+    ):
+        """
+        Args:
+            mode: None, "categories" or "compact" (see MEMORY_MODES)
+            column_dtypes: Per-column dtypes that replace the automatic
+                choice: "category", any pandas dtype name, or None/"keep"
+                to leave the column as decoded
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode is not None and mode not in MEMORY_MODES:
+            raise ValueError(f"memory_mode must be one of {', '.join(MEMORY_MODES)}")
+        self.mode = mode
+        self.column_dtypes = {
+            name: KEEP if dtype is None else dtype
+            for name, dtype in (column_dtypes or {}).items()
+        }
+        self._categories: Optional[List[int]] = None
+        self._decoded_dtypes: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._before = 0
+
+    def key(self) -> str:
+        """A stable string for cache keys."""
+        overrides = ",".join(f"{k}={v}" for k, v in sorted(self.column_dtypes.items()))
+        return f"memory:{self.mode}:{overrides}"
+
+    def _auto(self, name) -> bool:
+        return self.mode is not None and name not in self.column_dtypes
+
+    def _decide(
+        self, names: List[str], dtypes: List[str], ratios: List[Optional[float]]
+    ):
+        """Pick the categorical columns from the first chunk with rows."""
+        with self._lock:
+            if self._categories is None:
+                self._categories = [
+                    i
+                    for i, (name, ratio) in enumerate(zip(names, ratios))
+                    if self.column_dtypes.get(name) == "category"
+                    or (
+                        self._auto(name)
+                        and ratio is not None
+                        and ratio <= CATEGORY_MAX_RATIO
+                    )
+                ]
+                self._decoded_dtypes = {i: dtypes[i] for i in self._categories}
+
+    def encode_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Encode the categorical columns of one decoded JSON chunk."""
+        import pandas as pd
+
+        before = _memory(df)
+        with self._lock:
+            self._before += before
+        if self._categories is None and len(df):
+            ratios = []
+            for i in range(df.shape[1]):
+                column = df.iloc[:, i]
+                if _is_text(column):
+                    ratios.append(column.nunique() / max(column.count(), 1))
+                else:
+                    ratios.append(None)
+            dtypes = [str(dtype) for dtype in df.dtypes]
+            self._decide(list(df.columns), dtypes, ratios)
+        if not self._categories:
+            return df
+        df = df.copy(deep=False)
+        for i in self._categories:
+            df.isetitem(i, pd.Categorical(df.iloc[:, i]))
+        return df
+
+    def encode_arrow(self, table):
+        """Dictionary-encode the categorical columns of one Arrow chunk."""
+        import pandas as pd
+        import pyarrow as pa
+
+        if table is None:
+            return table
+        with self._lock:
+            self._before += table.nbytes
+        if self._categories is None and table.num_rows:
+            ratios = []
+            for column in table.columns:
+                if pa.types.is_string(column.type) or pa.types.is_large_string(
+                    column.type
+                ):
+                    distinct = len(column.unique())
+                    ratios.append(distinct / max(len(column) - column.null_count, 1))
+                else:
+                    ratios.append(None)
+            dtypes = [str(pd.ArrowDtype(field.type)) for field in table.schema]
+            self._decide(table.column_names, dtypes, ratios)
+        for i in self._categories or ():
+            column = table.column(i)
+            if not pa.types.is_dictionary(column.type):
+                table = table.set_column(
+                    i, table.field(i).name, column.dictionary_encode()
+                )
+        return table
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Optimize a whole DataFrame at once, e.g. a local or cached result."""
+        return self.finish(self.encode_chunk(df))
+
+    def combine(self, pieces: List[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenate decoded JSON chunks, merging their categories."""
+        import pandas as pd
+        from pandas.api.types import union_categoricals
+
+        if len(pieces) == 1:
+            return pieces[0]
+        encoded = [
+            i
+            for i in range(pieces[0].shape[1])
+            if all(
+                isinstance(piece.iloc[:, i].dtype, pd.CategoricalDtype)
+                for piece in pieces
+            )
+        ]
+        df = pd.concat(pieces, ignore_index=True)
+        for i in encoded:
+            merged = union_categoricals([piece.iloc[:, i] for piece in pieces])
+            df.isetitem(i, merged)
+        return df
+
+    def finish(self, df: pd.DataFrame, before: Optional[int] = None) -> pd.DataFrame:
+        """
+        Downcast numerics, apply the overrides and attach the memory report.
+
+        ``df.attrs["memory"]`` holds ``before`` and ``after`` (bytes) and
+        ``converted``, each changed column's ``"old -> new"`` dtypes.
+
+        Raises:
+            ValueError: If an override names a column the result doesn't have
+                or its dtype can't hold the column's values
+        """
+        names = list(df.columns)
+        unknown = sorted(set(self.column_dtypes) - set(names))
+        if unknown:
+            raise ValueError(f"column_dtypes names unknown column(s): {unknown}")
+        if before is None:
+            before = self._before or _memory(df)
+
+        converted: Dict[str, str] = {}
+        for i, name in enumerate(names):
+            column = df.iloc[:, i]
+            wanted = self.column_dtypes.get(name)
+            if wanted is not None:
+                target = None if wanted == KEEP else wanted
+            elif self.mode == "compact":
+                target = downcast(column)
+            else:
+                target = None
+            if target is not None and str(target) != str(column.dtype):
+                try:
+                    df.isetitem(i, column.astype(target))
+                except (TypeError, ValueError) as e:
+                    raise ValueError(
+                        f"Can't convert column {name!r} to {target}: {e}"
+                    ) from e
+            old = self._decoded_dtypes.get(i, str(column.dtype))
+            new = str(df.iloc[:, i].dtype)
+            if new != old:
+                converted[str(name)] = f"{old} -> {new}"
+        df.attrs["memory"] = {
+            "before": int(before),
+            "after": _memory(df),
+            "converted": converted,
+        }
+        return df
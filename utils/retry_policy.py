@@ -0,0 +1,176 @@
+# ABOUTME: Retry policy (exponential backoff, jitter, Retry-After) and circuit breaker for API calls
+# ABOUTME: Pure logic with no HTTP dependency; DatabricksQueryClient applies it to every workspace request
+
+import random
+import threading
+import time
+from typing import Optional, Sequence
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into seconds.
+
+    Accepts delta-seconds ("120") and HTTP dates; returns None when the
+    header is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    # email.utils costs several ms to import and HTTP dates are rare
+    from email.utils import parsedate_to_datetime
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before repeating a failed request.
+
+    Delays grow exponentially from ``backoff_base`` up to ``backoff_max``
+    with "full jitter" (a uniform random delay up to that bound), so threads
+    that failed together don't retry together. A Retry-After header from the
+    server takes precedence, capped at ``max_retry_after``.
+
+    Requests that are not idempotent (statement submission) are only
+    repeated when the server provably did not process them: a 429 or 503
+    response, or a connection that was never established. Anything else
+    could run the statement twice.
+    """
+
+    # Responses that mean the request was rejected before it was processed
+    REJECTED_STATUSES = (429, 503)
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        jitter: bool = True,
+        retry_statuses: Sequence[int] = (429, 500, 502, 503, 504),
+        max_retry_after: float = 60.0,
+    ):
+        """
+        Args:
+            max_attempts: Total tries per request, including the first; 1
+                disables retries.
+            backoff_base: Delay bound in seconds before the first retry;
+                doubles on every further retry.
+            backoff_max: Upper bound for the delay.
+            jitter: Randomize delays between 0 and the bound.
+            retry_statuses: HTTP statuses worth retrying for idempotent
+                requests.
+            max_retry_after: Longest Retry-After (seconds) that is honored.
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.max_retry_after = max_retry_after
+
+    def should_retry_status(self, status_code: int, idempotent: bool) -> bool:
+        """Whether a response with this status may be retried."""
+        if status_code not in self.retry_statuses:
+            return False
+        return idempotent or status_code in self.REJECTED_STATUSES
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Seconds to wait before retry number ``attempt`` (0 for the first).
+
+        Args:
+            attempt: Number of retries already made
+            retry_after: The response's Retry-After header, if any
+        """
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.max_retry_after)
+
+        bound = min(self.backoff_max, self.backoff_base * 2**attempt)
+        return random.uniform(0, bound) if self.jitter else bound
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated failures so callers don't pile up on a dead
+    endpoint.
+
+    After ``failure_threshold`` consecutive failures (connection errors,
+    timeouts or 5xx responses) the circuit opens and requests raise
+    CircuitOpenError without being sent. Once ``reset_timeout`` seconds have
+    passed, a single probe request is let through (half-open): success
+    closes the circuit, failure re-opens it. Safe to share between threads
+    and clients.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._probing or self._remaining() <= 0:
+                return "half_open"
+            return "open"
+
+    def before_request(self, name: str = "endpoint"):
+        """
+        Raise CircuitOpenError if requests should not be sent right now.
+
+        Args:
+            name: What the circuit protects, for the error message
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self._remaining()
+            if remaining <= 0:
+                # Half-open: this caller probes, everyone else keeps failing
+                # fast. Re-arming the timer replaces a probe that never reports.
+                self._opened_at = time.monotonic()
+                self._probing = True
+                return
+            raise CircuitOpenError(
+                f"Circuit open for {name} after {self._failures} consecutive "
+                f"failures; retrying in {max(remaining, 0):.1f}s"
+            )
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def _remaining(self) -> float:
+        return self.reset_timeout - (time.monotonic() - self._opened_at)
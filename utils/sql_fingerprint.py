@@ -0,0 +1,211 @@
+# ABOUTME: SQL normalization and fingerprinting for cache, dedup and metrics keys
+# ABOUTME: Strips comments and cosmetic whitespace/case so equivalent queries hash the same
+
+import hashlib
+import re
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# One alternation, tried left to right at every position. Comments and
+# literals come first so keywords inside them are never seen as keywords.
+_TOKEN_PATTERN = re.compile(
+    r"""
+      (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*.*?(?:\*/|\Z))
+    | (?P<string>'(?:[^'\\]|\\.|'')*(?:'|\Z)|"(?:[^"\\]|\\.|"")*(?:"|\Z))
+    | (?P<quoted_ident>`(?:[^`]|``)*(?:`|\Z))
+    | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?[a-zA-Z]*)
+    | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<param>:[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<whitespace>\s+)
+    | (?P<op><=>|<=|>=|<>|!=|==|\|\||::|->|[^\sA-Za-z0-9_])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Keywords whose case is normalized, as are function names. Identifiers
+# (table, column and alias names) keep their case because Databricks reports
+# result column names exactly as written, so a word spelled like a keyword is
+# only upper-cased where it cannot be a name (see _word_case).
+SQL_KEYWORDS = frozenset("""
+    ALL ALTER AND ANTI ANY ARRAY AS ASC BETWEEN BOTH BY CASE CAST COLUMNS CREATE
+    CROSS CUBE CURRENT_DATE CURRENT_TIMESTAMP DATABASE DATABASES DELETE DESC
+    DESCRIBE DISTINCT DIV DROP ELSE END ESCAPE EXCEPT EXISTS EXTENDED FALSE
+    FILTER FIRST FOLLOWING FOR FROM FULL GROUP GROUPING HAVING IF ILIKE IN INNER
+    INSERT INTERSECT INTERVAL INTO IS JOIN LAST LATERAL LEFT LIKE LIMIT MAP MINUS
+    NATURAL NOT NULL NULLS OF OFFSET ON OR ORDER OUTER OVER PARTITION PARTITIONS
+    PERCENT PIVOT PRECEDING QUALIFY RANGE RECURSIVE REPEATABLE RIGHT RLIKE
+    ROLLUP ROW ROWS SCHEMA SCHEMAS SELECT SEMI SET SETS SHOW STRUCT TABLE
+    TABLES TABLESAMPLE THEN TO TRUE TRUNCATE TRY_CAST UNBOUNDED UNION UNPIVOT
+    UPDATE USING VALUES VIEW VIEWS WHEN WHERE WINDOW WITH
+    """.split())
+
+# Token kinds that carry no meaning for fingerprinting
+_SKIPPED_KINDS = ("line_comment", "block_comment", "whitespace")
+
+# Kinds that can be lifted into parameters
+_LITERAL_KINDS = ("string", "number")
+
+# Keywords that end a SELECT list
+_SELECT_LIST_END = frozenset(
+    "FROM WHERE GROUP HAVING ORDER LIMIT UNION EXCEPT INTERSECT MINUS".split()
+)
+
+# Operators whose operands are values, so a keyword-spelled word next to one
+# is a name ("*" is left out: it also means "all columns")
+_VALUE_OPERATORS = frozenset("= == <=> != <> < <= > >= + - / % ||".split())
+
+# Tokens after which the last word of a SELECT list item names its column
+_ITEM_END = _SELECT_LIST_END | {",", ")", ";", None}
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+
+
+def tokenize_sql(query: str) -> Iterator[Token]:
+    """
+    Split SQL into tokens in a single left-to-right pass.
+
+    Every character belongs to exactly one token, so joining the texts gives
+    back the original query. Kinds are ``line_comment``, ``block_comment``,
+    ``string``, ``quoted_ident``, ``number``, ``word``, ``param``,
+    ``whitespace`` and ``op``.
+    """
+    for match in _TOKEN_PATTERN.finditer(query):
+        yield Token(match.lastgroup, match.group())
+
+
+# Punctuation written without surrounding spaces in the normalized form
+_NO_SPACE_BEFORE = frozenset(",).")
+_NO_SPACE_AFTER = frozenset("(.")
+
+
+def _needs_space(previous: str, current: str) -> bool:
+    """Whether the normalized form puts a space between two tokens."""
+    return previous not in _NO_SPACE_AFTER and current not in _NO_SPACE_BEFORE
+
+
+def normalize_sql(query: str, lift_literals: bool = False) -> str:
+    """
+    Return a canonical form of a query.
+
+    Comments are removed, tokens are separated by exactly one space (none
+    around ``.``, after ``(``, before ``,`` and ``)`` or between a function
+    name and its ``(``), SQL keywords and function names are upper-cased and
+    a trailing semicolon is dropped. String literals, quoted identifiers and
+    names are kept exactly as written, including names spelled like a
+    keyword (``SELECT first FROM t`` keeps ``first``).
+
+    Args:
+        query: SQL text
+        lift_literals: Replace string and numeric literals with ``?`` so
+            queries differing only in constants normalize identically
+
+    Returns:
+        str: The normalized query
+    """
+    return parameterize_sql(query)[0] if lift_literals else _normalize(query)[0]
+
+
+def parameterize_sql(query: str) -> Tuple[str, List[str]]:
+    """
+    Normalize a query and lift its literals out as parameters.
+
+    Returns:
+        tuple: ``(normalized_sql_with_placeholders, literals)`` where literals
+        are in order of appearance, as written in the query.
+    """
+    return _normalize(query, lift_literals=True)
+
+
+def fingerprint_sql(query: str, lift_literals: bool = False) -> str:
+    """
+    Return a stable SHA-256 hex digest of the normalized query.
+
+    Cosmetic edits (indentation, comments, keyword case) keep the same
+    fingerprint; any change to identifiers, literals or structure changes it.
+    With ``lift_literals=True`` queries that differ only in constants share a
+    fingerprint, which suits grouping queries by shape in metrics.
+    """
+    normalized = normalize_sql(query, lift_literals=lift_literals)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class _Scope:
+    """Parser state for one parenthesis depth."""
+
+    def __init__(self):
+        self.in_select_list = False
+        self.open_cases = 0
+
+
+def _word_case(
+    word: str, previous: Optional[str], following: Optional[str], scope: _Scope
+) -> str:
+    """
+    Upper-case a word in keyword or function-name position.
+
+    ``previous`` and ``following`` are the upper-cased neighbouring tokens.
+    Names keep their case: parts of qualified names, aliases after ``AS``,
+    operands of comparisons and arithmetic, and the last word of a SELECT
+    list item, which Databricks reports as the column name
+    (``SELECT first, x last FROM t``).
+    """
+    upper = word.upper()
+    if previous in (".", "AS") or previous in _VALUE_OPERATORS:
+        return word
+    if upper not in SQL_KEYWORDS:
+        # Function names are case-insensitive
+        return upper if following == "(" else word
+    if upper == "END" and scope.open_cases:
+        scope.open_cases -= 1
+        return upper
+    if following in _VALUE_OPERATORS or (
+        scope.in_select_list and following in _ITEM_END
+    ):
+        return word
+
+    if upper == "SELECT":
+        scope.in_select_list = True
+    elif upper in _SELECT_LIST_END:
+        scope.in_select_list = False
+    elif upper == "CASE":
+        scope.open_cases += 1
+    return upper
+
+
+def _normalize(query: str, lift_literals: bool = False) -> Tuple[str, List[str]]:
+    tokens = [
+        token for token in tokenize_sql(query) if token.kind not in _SKIPPED_KINDS
+    ]
+    parts: List[str] = []
+    literals: List[str] = []
+    scopes = [_Scope()]
+    previous_kind = None
+    previous = None
+    for i, (kind, text) in enumerate(tokens):
+        upper = text.upper()
+        if kind == "word":
+            following = tokens[i + 1].text.upper() if i + 1 < len(tokens) else None
+            text = _word_case(text, previous, following, scopes[-1])
+        elif lift_literals and kind in _LITERAL_KINDS:
+            literals.append(text)
+            text = "?"
+        elif text == "(":
+            scopes.append(_Scope())
+        elif text == ")" and len(scopes) > 1:
+            scopes.pop()
+
+        # A function's "(" stays attached to its name
+        attached = text == "(" and previous_kind == "word"
+        if parts and not attached and _needs_space(parts[-1], text):
+            parts.append(" ")
+        parts.append(text)
+        previous_kind = kind
+        previous = upper
+
+    while parts and parts[-1] in (";", " "):
+        parts.pop()
+
+    return "".join(parts), literals
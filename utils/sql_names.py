@@ -0,0 +1,20 @@
+# ABOUTME: Databricks SQL name and type helpers shared by the query utilities
+# ABOUTME: Validates (qualified) table names, quotes identifiers and reduces column types to their base name
+
+import re
+
+# Catalog, schema and table parts: plain identifiers or backquoted names
+NAME_PART = r"(?:`(?:[^`]|``)+`|[A-Za-z0-9_]+)"
+
+# A table name of one to three parts, e.g. ``catalog.schema.table``
+QUALIFIED_NAME = re.compile(rf"^{NAME_PART}(?:\.{NAME_PART}){{0,2}}$")
+
+
+def quote_identifier(name: str) -> str:
+    """Backquote one identifier (a column or name part), e.g. a`b -> `a``b`."""
+    return f"`{name.replace('`', '``')}`"
+
+
+def base_type(data_type: str) -> str:
+    """Type name without parameters, e.g. decimal(10,2) -> decimal."""
+    return re.split(r"[(<\s]", data_type.strip().lower(), maxsplit=1)[0]
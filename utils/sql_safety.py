@@ -0,0 +1,205 @@
+# ABOUTME: Single-pass SQL safety classifier used by the Databricks query clients
+# ABOUTME: Allows read-only statements and blocks data-modifying ones, ignoring literals and comments
+
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+# Lexer tuned for classification. Run over the upper-cased query, findall()
+# yields (literal, token) pairs: string and numeric literals land in the
+# first group, words, quoted identifiers and punctuation in the second, and
+# comments and whitespace in neither, so the whole scan happens in C. The
+# lexical rules mirror sql_fingerprint.tokenize_sql.
+_SCANNER = re.compile(
+    r"""
+      --[^\n]* | /\*.*?(?:\*/|\Z)
+    | ('(?:[^'\\]|\\.|'')*(?:'|\Z)|"(?:[^"\\]|\\.|"")*(?:"|\Z)
+      |(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?[a-zA-Z]*)
+    | ([A-Z_][A-Z0-9_]*|`(?:[^`]|``)*(?:`|\Z)|[^\sA-Z0-9_])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Stands in for a literal in the token list
+_LITERAL = "<literal>"
+
+# Words that begin a dangerous sequence, and the statement separator. A
+# query without any of them (even inside literals or comments) can only be
+# rejected for how it starts, so just its first few tokens are lexed.
+_TRIGGERS = re.compile(r"INSERT|UPDATE|DELETE|MERGE|TRUNCATE|DROP|CREATE|ALTER|;")
+
+# Statements a query may start with; DESC is reported as DESCRIBE
+_ALLOWED_STARTS = frozenset({"SELECT", "SHOW", "DESCRIBE", "DESC", "WITH"})
+
+# Read-only SHOW commands (SHOW CREATE TABLE is handled separately)
+_SAFE_SHOW_TARGETS = frozenset(
+    {"TABLES", "DATABASES", "SCHEMAS", "COLUMNS", "PARTITIONS", "VIEWS"}
+)
+
+# Objects that DROP/CREATE/ALTER must not target
+_DDL_OBJECTS = frozenset({"TABLE", "VIEW", "DATABASE", "SCHEMA"})
+_DDL_VERBS = frozenset({"DROP", "CREATE", "ALTER"})
+
+# Last words of the dangerous sequences; only these need a closer look
+_PATTERN_ENDS = _DDL_OBJECTS | {"INTO", "OVERWRITE", "FROM", "SET"}
+
+# MERGE WITH SCHEMA EVOLUTION INTO, the longer spelling of MERGE INTO
+_MERGE_WITH_EVOLUTION = ["MERGE", "WITH", "SCHEMA", "EVOLUTION"]
+
+_NOT_ALLOWED = "Only SELECT, SHOW, DESCRIBE, and WITH queries are allowed"
+_UNSAFE_SHOW = (
+    "Only safe read-only SHOW commands are allowed "
+    "(TABLES, DATABASES, SCHEMAS, COLUMNS, etc.)"
+)
+_MULTIPLE_STATEMENTS = "Only a single statement is allowed"
+
+
+class SqlClassification(NamedTuple):
+    """
+    Verdict for one query.
+
+    Attributes:
+        statement_type: SELECT, WITH, SHOW or DESCRIBE; for rejected queries
+            the first word (or UNKNOWN)
+        is_safe: True if the query may be sent to the warehouse
+        reason: Why the query was rejected, when it was
+    """
+
+    statement_type: str
+    is_safe: bool
+    reason: Optional[str] = None
+
+
+@lru_cache(maxsize=4096)
+def classify(query: str) -> SqlClassification:
+    """
+    Classify a query as a safe read-only statement or not.
+
+    The query is lexed once, left to right, by a precompiled scanner, so
+    keywords inside string literals, quoted identifiers and comments are
+    ignored and the cost is linear in the query length. Queries that
+    contain no data-modifying keyword or semicolon at all are only lexed up
+    to their first few tokens. Verdicts are
+    memoized per query text, so re-validating a repeated query is a dict
+    lookup.
+
+    Rules:
+
+    - The statement must start with SELECT, WITH, SHOW, DESCRIBE or DESC
+    - SHOW is limited to TABLES, DATABASES, SCHEMAS, COLUMNS, CREATE TABLE,
+      PARTITIONS and VIEWS
+    - INSERT INTO/OVERWRITE, UPDATE ... SET, DELETE FROM, MERGE INTO,
+      DROP/CREATE/ALTER TABLE/VIEW/DATABASE/SCHEMA and TRUNCATE TABLE are
+      rejected anywhere (a WITH clause may precede INSERT and MERGE)
+    - Only one statement is allowed (a trailing semicolon is fine)
+
+    Args:
+        query: SQL text
+
+    Returns:
+        SqlClassification: The statement type and verdict
+    """
+    upper = query.upper()
+    if _TRIGGERS.search(upper):
+        tokens = [
+            token or _LITERAL
+            for literal, token in _SCANNER.findall(upper)
+            if literal or token
+        ]
+    else:
+        tokens = _leading_tokens(upper, 3)
+
+    first = tokens[0] if tokens else "UNKNOWN"
+    if first not in _ALLOWED_STARTS:
+        if not _is_name(first) or first[0] == "`":
+            first = "UNKNOWN"
+        return SqlClassification(first, False, _NOT_ALLOWED)
+    statement_type = "DESCRIBE" if first == "DESC" else first
+
+    start = 1
+    if statement_type == "SHOW":
+        target = tokens[1:3]
+        if target[:1] == ["CREATE"]:
+            if target != ["CREATE", "TABLE"]:
+                return SqlClassification(statement_type, False, _UNSAFE_SHOW)
+        elif not target or target[0] not in _SAFE_SHOW_TARGETS:
+            return SqlClassification(statement_type, False, _UNSAFE_SHOW)
+        start = 3
+
+    for i in range(start, len(tokens)):
+        if tokens[i] in _PATTERN_ENDS:
+            danger = _dangerous_pattern(tokens, i)
+            if danger:
+                return SqlClassification(
+                    statement_type, False, f"Dangerous SQL pattern detected: {danger}"
+                )
+
+    # One statement, optionally followed by semicolons
+    if ";" in tokens and any(t != ";" for t in tokens[tokens.index(";") :]):
+        return SqlClassification(statement_type, False, _MULTIPLE_STATEMENTS)
+    return SqlClassification(statement_type, True)
+
+
+def _leading_tokens(upper: str, count: int) -> List[str]:
+    """Lex only as far as the first ``count`` significant tokens."""
+    tokens = []
+    for match in _SCANNER.finditer(upper):
+        literal, token = match.groups()
+        if literal or token:
+            tokens.append(token or _LITERAL)
+            if len(tokens) == count:
+                break
+    return tokens
+
+
+def _dangerous_pattern(tokens: List[str], i: int) -> Optional[str]:
+    """Return the data-modifying keyword sequence ending at ``tokens[i]``, if any."""
+    previous, value = tokens[i - 1], tokens[i]
+
+    if previous == "INSERT" and value in ("INTO", "OVERWRITE"):
+        return f"INSERT {value}"
+    if value == "INTO" and (
+        previous == "MERGE" or tokens[max(i - 4, 0) : i] == _MERGE_WITH_EVOLUTION
+    ):
+        return "MERGE INTO"
+    if previous == "DELETE" and value == "FROM":
+        return "DELETE FROM"
+    if previous == "TRUNCATE" and value == "TABLE":
+        return "TRUNCATE TABLE"
+    if previous in _DDL_VERBS and value in _DDL_OBJECTS:
+        return f"{previous} {value}"
+    if value == "SET":
+        # UPDATE <name> SET, where <name> may be qualified (a.b.c): walk back
+        # over alternating name and "." tokens looking for UPDATE
+        expect_name = True
+        for j in range(i - 1, -1, -1):
+            token = tokens[j]
+            if expect_name:
+                if not _is_name(token):
+                    return None
+            elif token == "UPDATE":
+                return " ".join(tokens[j:i]) + " SET"
+            elif token != ".":
+                return None
+            expect_name = not expect_name
+    return None
+
+
+def _is_name(token: str) -> bool:
+    """Whether a token is a word or a quoted identifier."""
+    return token[0] in "`_" or token[0].isalpha()
+
+
+def check_sql_safety(query: str) -> None:
+    """
+    Raise if a query is not a safe read-only statement.
+
+    Args:
+        query: SQL query string to validate
+
+    Raises:
+        ValueError: If the query is not allowed (see classify())
+    """
+    verdict = classify(query)
+    if not verdict.is_safe:
+        raise ValueError(verdict.reason)
@@ -0,0 +1,255 @@
+# ABOUTME: One-scan column profiler for Databricks tables
+# ABOUTME: Reads the schema from the metadata cache and computes every per-column statistic in one aggregation query
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .sql_names import QUALIFIED_NAME, base_type, quote_identifier
+except ImportError:  # utils/ itself is on sys.path (the temp_code scripts)
+    from sql_names import QUALIFIED_NAME, base_type, quote_identifier
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_NUMERIC_TYPES = (
+    "tinyint",
+    "smallint",
+    "int",
+    "integer",
+    "bigint",
+    "long",
+    "float",
+    "double",
+    "decimal",
+    "byte",
+    "short",
+)
+# Values that can't be compared or counted distinctly in a useful way
+_COMPLEX_TYPES = ("array", "map", "struct", "binary", "variant", "interval", "void")
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+
+def quantile_column(q: float) -> str:
+    """Name of a quantile's profile column: 0.5 -> "p50", 0.999 -> "p99.9"."""
+    return f"p{q * 100:g}"
+
+
+def read_schema(client, table: str) -> List[Tuple[str, str]]:
+    """
+    Return ``[(column, data_type), ...]`` for a table.
+
+    The columns come from the client's MetadataCache, so a table profiled
+    again (or already looked up) is not described on the warehouse.
+    """
+    return [
+        (info.column, info.data_type)
+        for info in client.metadata_cache.get_columns(client, table)
+    ]
+
+
+def build_profile_query(
+    table: str,
+    schema: Sequence[Tuple[str, str]],
+    top_k: int = 5,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+) -> str:
+    """
+    Build one aggregation query that profiles every column in ``schema``.
+
+    Every column gets its non-NULL count. Comparable columns also get an
+    approximate distinct count, min, max and approximate top-k values, and
+    numeric ones mean, stddev and approximate quantiles. Result columns are
+    named ``c<i>_<stat>`` after the column's position in ``schema``.
+    """
+    selects = ["COUNT(*) AS row_count"]
+    quantile_list = ", ".join(f"{q:g}" for q in quantiles)
+    for i, (name, data_type) in enumerate(schema):
+        column = quote_identifier(name)
+        base = base_type(data_type)
+        selects.append(f"COUNT({column}) AS c{i}_non_null")
+        if base in _COMPLEX_TYPES:
+            continue
+        selects += [
+            f"approx_count_distinct({column}) AS c{i}_distinct",
+            f"MIN({column}) AS c{i}_min",
+            f"MAX({column}) AS c{i}_max",
+        ]
+        if top_k:
+            selects.append(
+                f"approx_top_k(CAST({column} AS STRING), {int(top_k)}) AS c{i}_top_k"
+            )
+        if base in _NUMERIC_TYPES:
+            selects += [
+                f"AVG({column}) AS c{i}_mean",
+                f"STDDEV({column}) AS c{i}_stddev",
+            ]
+            if quantiles:
+                selects.append(
+                    f"percentile_approx({column}, array({quantile_list}))"
+                    f" AS c{i}_quantiles"
+                )
+
+    body = ",\n    ".join(selects)
+    return f"SELECT\n    {body}\nFROM {table}"
+
+
+def _scalar(value):
+    """The statistic, or None for SQL NULL (None, NaN, NA or NaT)."""
+    import pandas as pd
+
+    return None if pd.api.types.is_scalar(value) and pd.isna(value) else value
+
+
+def _parse_array(value) -> Optional[list]:
+    """
+    An ARRAY result as a list, or None for NULL.
+
+    JSON_ARRAY results carry arrays as JSON text; Arrow results as lists or
+    numpy arrays.
+    """
+    if isinstance(value, str):
+        return json.loads(value)
+    if value is None or isinstance(value, (bytes, dict)):
+        return None
+    return list(value) if hasattr(value, "__iter__") else None
+
+
+def _profile_rows(
+    stats: pd.Series,
+    schema: Sequence[Tuple[str, str]],
+    offset: int,
+    quantiles: Sequence[float],
+) -> List[dict]:
+    """Turn one batch's single-row result into one profile row per column."""
+    total = int(stats["row_count"])
+    rows = []
+    for i, (name, data_type) in enumerate(schema):
+        prefix = f"c{i}_"
+        non_null = int(stats[f"{prefix}non_null"])
+        row = {
+            "column": name,
+            "data_type": data_type,
+            "position": offset + i,
+            "rows": total,
+            "nulls": total - non_null,
+            "null_pct": (total - non_null) * 100.0 / total if total else None,
+        }
+        for stat in ("distinct", "min", "max", "mean", "stddev"):
+            key = "distinct_approx" if stat == "distinct" else stat
+            row[key] = _scalar(stats.get(f"{prefix}{stat}"))
+        values = _parse_array(stats.get(f"{prefix}quantiles"))
+        for q_index, q in enumerate(quantiles):
+            row[quantile_column(q)] = values[q_index] if values is not None else None
+        top = _parse_array(stats.get(f"{prefix}top_k"))
+        row["top_values"] = (
+            [(entry["item"], entry["count"]) for entry in top]
+            if top is not None
+            else None
+        )
+        rows.append(row)
+    return rows
+
+
+def profile_table(
+    client,
+    table: str,
+    columns: Optional[Sequence[str]] = None,
+    top_k: int = 5,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    max_columns_per_query: int = 50,
+    timeout: Optional[float] = 300,
+    **query_options,
+) -> pd.DataFrame:
+    """
+    Profile a table's columns in as few table scans as possible.
+
+    The schema is read from the metadata cache, then one aggregation query
+    computes every statistic for up to ``max_columns_per_query`` columns in
+    a single pass. Wider tables are split into batches that run
+    concurrently with execute_many(). Distinct counts, quantiles and top
+    values use Databricks' approximate aggregates (approx_count_distinct,
+    percentile_approx, approx_top_k), so they are estimates.
+
+    Args:
+        client: A DatabricksQueryClient
+        table: Table name, optionally qualified (``catalog.schema.table``)
+        columns: Only profile these columns (default: all)
+        top_k: Most frequent values reported per column; 0 to skip
+        quantiles: Quantiles reported for numeric columns
+        max_columns_per_query: Columns profiled per aggregation query
+        timeout: Deadline in seconds for each query
+        **query_options: Extra execute_query() arguments (e.g. ``cache``)
+
+    Returns:
+        pandas.DataFrame: One row per column with ``column``, ``data_type``,
+        ``position``, ``rows``, ``nulls``, ``null_pct``, ``distinct_approx``,
+        ``min``, ``max``, ``mean``, ``stddev``, one ``p<N>`` column per
+        quantile and ``top_values`` (a list of ``(value, count)``, values as
+        strings). Statistics that don't apply to a column's type are
+        missing. ``df.attrs["quantile_columns"]`` lists the quantile
+        columns in the order of ``quantiles``.
+
+    Raises:
+        ValueError: If the table name or a requested column is invalid
+        RuntimeError: If a query fails
+    """
+    import pandas as pd
+
+    if not QUALIFIED_NAME.match(table):
+        raise ValueError(f"Invalid table name: {table!r}")
+    if max_columns_per_query < 1:
+        raise ValueError("max_columns_per_query must be at least 1")
+
+    schema = read_schema(client, table)
+    if columns is not None:
+        types = dict(schema)
+        missing = [name for name in columns if name not in types]
+        if missing:
+            raise ValueError(f"{table} has no column(s): {', '.join(missing)}")
+        schema = [(name, types[name]) for name in columns]
+
+    batches: Dict[str, Tuple[int, List[Tuple[str, str]]]] = {}
+    for offset in range(0, len(schema), max_columns_per_query):
+        batch = schema[offset : offset + max_columns_per_query]
+        name = f"Profile {table} [{offset + 1}-{offset + len(batch)}]"
+        batches[name] = (offset, batch)
+
+    queries = {
+        name: build_profile_query(table, batch, top_k, quantiles)
+        for name, (_, batch) in batches.items()
+    }
+    if len(queries) == 1:
+        name, query = next(iter(queries.items()))
+        results = {name: client.execute_query(query, name, timeout, **query_options)}
+    else:
+        results, errors = client.execute_many(queries, timeout=timeout, **query_options)
+        if errors:
+            name, error = next(iter(errors.items()))
+            raise RuntimeError(f"{name} failed: {error}") from error
+
+    rows = []
+    for name, (offset, batch) in batches.items():
+        rows += _profile_rows(results[name].iloc[0], batch, offset, quantiles)
+
+    columns_out = [
+        "column",
+        "data_type",
+        "position",
+        "rows",
+        "nulls",
+        "null_pct",
+        "distinct_approx",
+        "min",
+        "max",
+        "mean",
+        "stddev",
+        *(quantile_column(q) for q in quantiles),
+        "top_values",
+    ]
+    profile = pd.DataFrame(rows, columns=columns_out)
+    profile.attrs["quantile_columns"] = [quantile_column(q) for q in quantiles]
+    return profile